@@ -0,0 +1,283 @@
+import asyncio
+import os
+import time
+from multiprocessing.connection import AuthenticationError, Client
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+
+from event_log import LEVELS as LOG_LEVELS, log
+from ipc import Channel, ChannelClosed, RemoteError, default_address, default_authkey_path, read_authkey
+from shm_state import StateReader
+from snapshot import AccountSnapshot
+from ws_hub import WSHub
+
+load_dotenv()
+
+# Durumsuz API işçisi: `uvicorn api:app --workers N`
+#
+# Terminale ve bota dokunmaz; tek sahip motor süreci (engine.py) çalışıyor
+# olmalıdır. Her işçi:
+#   - /status, /account, /positions, /stream ve /ws yanıtlarını motorun
+#     paylaşımlı bellekteki seqlock bölgesinden kilitsiz okur (durum
+#     değişmedikçe istek başına sadece sıra numarası okunur),
+#   - /stream için kendi abone kümesini tutar: bölgedeki görüntü değiştikçe
+#     snapshot.AccountSnapshot ile aynı JSON Merge Patch farklarını üretir,
+#   - /toggle, /logs, /cache, /metrics ve diğer tüm uçları (/ohlc, /rsi,
+#     /indicators, /ticks) kontrol kanalından motora iletir.
+# Bölge ENGINE_STALE sn'den eskiyse motor ölü sayılır (503) ve yeniden
+# bağlanılır (motor yeniden başlayınca bölgeyi yeniden oluşturur).
+# Kontrol anahtarı ENGINE_AUTHKEY ya da motorun ürettiği ENGINE_AUTHKEY_FILE;
+# motor her başlangıçta yeni anahtar ürettiği için her bağlanmada yeniden okunur.
+
+STATE_NAME = os.getenv("ENGINE_STATE", "mt5bot-state")
+CONTROL_ADDRESS = os.getenv("ENGINE_CONTROL") or default_address("mt5bot-engine")
+AUTHKEY_FILE = os.getenv("ENGINE_AUTHKEY_FILE") or default_authkey_path("mt5bot-engine")
+STALE = float(os.getenv("ENGINE_STALE", "15"))
+CONTROL_TIMEOUT = float(os.getenv("ENGINE_CONTROL_TIMEOUT", "10"))
+ACCOUNT_FIELDS = ("login", "balance", "equity", "profit", "margin", "margin_free", "currency", "leverage", "name",
+                  "server")
+# Yönlendirmede taşınmayan (bağlantıya özgü) başlıklar
+HOP_HEADERS = {"host", "connection", "keep-alive", "transfer-encoding", "content-length", "upgrade"}
+
+
+app = FastAPI()
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:5173"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["ETag", "X-Cursor"],
+)
+
+state_reader = StateReader(STATE_NAME)
+
+
+def engine_authkey():
+    key = os.getenv("ENGINE_AUTHKEY")
+    return key.encode() if key else read_authkey(AUTHKEY_FILE)
+
+
+def engine_state():
+    data = state_reader.get()
+    if data is not None and time.time() - data["time"] > STALE:
+        state_reader.reset()  # motor yeniden başlamış olabilir: yeni bölgeye bağlan
+        data = state_reader.get()
+    if data is None or time.time() - data["time"] > STALE or data["snapshot"] is None:
+        raise HTTPException(status_code=503, detail="Motor çalışmıyor")
+    return data
+
+
+# authkey: her bağlanmada çağrılan anahtar okuyucu
+class ControlClient:
+    def __init__(self, address, authkey, timeout: float = 10.0):
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self.channel = None
+        self.lock = asyncio.Lock()
+        self.connects = 0
+
+    async def _connect(self):
+        async with self.lock:
+            if self.channel is None or self.channel.closed:
+                loop = asyncio.get_running_loop()
+                try:
+                    authkey = self.authkey()
+                    conn = await loop.run_in_executor(None, lambda: Client(self.address, authkey=authkey))
+                except (OSError, EOFError, ValueError, AuthenticationError) as e:
+                    raise HTTPException(status_code=503, detail=f"Motora bağlanılamadı: {e}")
+                self.channel = Channel(conn, name="api-control").start(loop)
+                self.connects += 1
+            return self.channel
+
+    async def call(self, op: str, timeout: float = None, **args):
+        channel = await self._connect()
+        try:
+            return await channel.call(op, timeout or self.timeout, **args)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Motor zaman aşımı")
+        except ChannelClosed:
+            raise HTTPException(status_code=503, detail="Motor bağlantısı kapandı")
+        except RemoteError as e:
+            raise HTTPException(status_code=e.status, detail=e.detail)
+
+    def stats(self):
+        return {"connects": self.connects, "channel": self.channel.stats() if self.channel is not None else None}
+
+
+control = ControlClient(CONTROL_ADDRESS, engine_authkey, CONTROL_TIMEOUT)
+
+
+# Bölgedeki görüntüyü izleyen yerel SSE yayıncısı; terminal okumaz
+class SharedSnapshot(AccountSnapshot):
+    def __init__(self, interval: float = 0.1, queue_size: int = 32):
+        super().__init__(None, None, interval=interval, queue_size=queue_size)
+        self.seq = None
+
+    async def refresh(self, force: bool = False):
+        try:
+            data = engine_state()
+        except HTTPException:
+            return self.state  # motor yok: aboneler son görüntüde kalır
+        if state_reader.seq != self.seq:
+            self.seq = state_reader.seq
+            self.refreshes += 1
+            self.updated = time.monotonic()
+            self.apply(data["snapshot"])
+        return self.state
+
+
+account_snapshot = SharedSnapshot(interval=float(os.getenv("API_POLL_INTERVAL", "0.1")))
+
+
+async def ws_payload(symbol: str):
+    quote = engine_state()["quotes"].get(symbol)
+    if quote is None:
+        raise KeyError(symbol)
+    return quote
+
+
+ws_hub = WSHub(ws_payload, interval=float(os.getenv("WS_INTERVAL", "5")), queue_size=int(os.getenv("WS_QUEUE_SIZE", "8")))
+
+
+@app.get("/status")
+async def get_status():
+    return engine_state()["snapshot"]["status"]
+
+
+@app.get("/status/{symbol}")
+async def get_symbol_status(symbol: str):
+    state = engine_state()["snapshot"]["status"]["symbols"].get(symbol)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Symbol not traded")
+    return state
+
+
+@app.post("/toggle")
+async def toggle_bot(state: bool, symbol: str = None):
+    return await control.call("toggle", state=state, symbol=symbol)
+
+
+@app.get("/account")
+async def get_account_info():
+    info = engine_state()["snapshot"]["account"]
+    if info is None:
+        raise HTTPException(status_code=500, detail="MT5 account info alınamadı")
+    return {field: info.get(field) for field in ACCOUNT_FIELDS}
+
+
+@app.get("/positions")
+async def get_positions(symbol: str = None):
+    positions = engine_state()["snapshot"]["positions"].values()
+    return [p for p in positions if symbol is None or p["symbol"] == symbol]
+
+
+@app.get("/stream")
+async def stream_snapshot(request: Request):
+    async def events_stream():
+        if account_snapshot.state is None:
+            await account_snapshot.refresh()
+        queue = account_snapshot.subscribe()  # ilk mesaj tam görüntü
+        try:
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), 15.0)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+        finally:
+            account_snapshot.unsubscribe(queue)
+
+    return StreamingResponse(events_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.websocket("/ws/{symbol}")
+async def websocket_endpoint(websocket: WebSocket, symbol: str):
+    await websocket.accept()
+    try:
+        published = symbol in engine_state()["quotes"]
+    except HTTPException:
+        published = False
+    if not published:
+        await websocket.close(code=1008)  # motor bu sembolün yükünü yayınlamıyor (ENGINE_WS_SYMBOLS)
+        return
+    sub = ws_hub.subscribe(symbol)
+    try:
+        while True:
+            message = await sub.queue.get()
+            if message is None:
+                await websocket.close(code=1013)
+                break
+            await websocket.send_text(message)
+    except WebSocketDisconnect:
+        log("WS", "info", "WebSocket bağlantısı kesildi: {symbol}", symbol=symbol)
+    finally:
+        ws_hub.unsubscribe(sub)
+
+
+@app.get("/logs")
+async def get_logs(level: str = None, category: str = None, since: int = None, contains: str = None,
+                   limit: int = 200):
+    if level is not None and level not in LOG_LEVELS:
+        raise HTTPException(status_code=400, detail=f"level: {', '.join(LOG_LEVELS)}")
+    categories = {c.strip() for c in category.split(",") if c.strip()} if category else None
+    items = await control.call("logs", level=level, categories=categories, since=since, contains=contains,
+                               limit=max(1, min(limit, 5000)))
+    return {"events": items, "cursor": items[-1]["seq"] if items else since}
+
+
+@app.get("/cache")
+async def get_cache_stats():
+    stats = await control.call("cache")
+    stats["snapshot_api"] = account_snapshot.stats()
+    stats["ws_api"] = ws_hub.stats()
+    return stats
+
+
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(await control.call("metrics"), media_type="text/plain; version=0.0.4")
+
+
+# Bu işçinin bölge / kanal durumu ve motorun yayın sayaçları
+@app.get("/engine")
+async def get_engine():
+    data = state_reader.get()
+    return {
+        "pid": os.getpid(),
+        "engine_pid": data["pid"] if data else None,
+        "age": round(time.time() - data["time"], 3) if data else None,
+        "reader": state_reader.stats(),
+        "control": control.stats(),
+        "engine": await control.call("engine"),
+    }
+
+
+# Diğer tüm uçlar (/ohlc, /rsi, /indicators, /ticks, ...) motordaki main.app'e
+@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
+async def forward(request: Request, path: str):
+    headers = [(k, v) for k, v in request.headers.items() if k.lower() not in HOP_HEADERS]
+    response = await control.call("http", method=request.method, path="/" + path,
+                                  query=request.url.query, headers=headers, body=await request.body())
+    # CORS başlıklarını bu uygulamanın ara katmanı ekler
+    out = [(k, v) for k, v in response["headers"]
+           if k.lower() not in HOP_HEADERS and not k.lower().startswith("access-control-")]
+    result = Response(response["body"], status_code=response["status"])
+    for k, v in out:
+        result.headers.append(k, v)
+    return result
+
+
+@app.on_event("startup")
+async def startup_event():
+    asyncio.create_task(account_snapshot.run())
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("api:app", host="0.0.0.0", port=8000, workers=int(os.getenv("API_WORKERS", "4")))
@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+
+from bar_cache import BARS_DTYPE
+from pipeline import RSIThreshold
+
+# Çevrimdışı backtest: RSI martingale stratejisi
+#
+# Yerel dosyadaki M1 barları okunur, M5 türetilir ve bot_logic / open_position /
+# close_all_positions kuralları aynen uygulanır:
+#   - 1dk RSI >= upper -> BUY, <= lower -> SELL (aynı sinyal tekrar açılmaz)
+#   - Trend dönerse lot ikiye katlanır (max_lot sınırı; reset_on_max ile
+#     test.py'deki gibi sınıra gelince başa döner)
+#   - BUY sepetinde 5dk RSI >= upper, SELL sepetinde <= lower -> tüm pozisyonlar kapanır
+#   - Günlük gerçekleşen kar profit_target'a ulaşınca gün sonuna kadar işlem yok
+#
+# Göstergeler vektörel hesaplanır. Canlı bot her kontrolde oluşan 5dk barını da
+# hesaba kattığından, her M1 kapanışında 5dk RSI "o anki" oluşan bar ile bulunur.
+# Durumlu pozisyon mantığı sadece sinyal bölgesindeki barlarda dönen sıkı bir
+# döngüdedir; özsermaye eğrisi olaylardan vektörel olarak doldurulur.
+#
+# Çalıştırma: python backtest.py bars.npy --out sonuc/
+
+DEFAULT_PARAMS = {
+    "period": 5,
+    "upper": 80.0,
+    "lower": 20.0,
+    "base_lot": 0.01,
+    "max_lot": 0.16,
+    "reset_on_max": False,    # True: lot max_lot'a ulaşınca base_lot'a döner (test.py)
+    "profit_target": 100.0,
+    "contract_size": 100.0,   # XAUUSD: 1 lot = 100 ons
+    "spread": 0.20,           # Fiyat biriminde (ask = bid + spread)
+    "htf_seconds": 300,       # Kapanış timeframe'i (M5)
+    "cooldown": 0,            # Sepet kapandıktan sonra değerlendirme yok (data["time"] biriminde; canlı bot 10 sn)
+}
+
+
+# Yerel bar dosyasını oku: .npy (BARS_DTYPE) veya başlıklı CSV (time,open,high,low,close[,tick_volume])
+def load_bars(path: str):
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    with open(path) as f:
+        header = f.readline().strip().lower().split(",")
+    raw = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    bars = np.zeros(len(raw), dtype=BARS_DTYPE)
+    for i, name in enumerate(header):
+        if name in BARS_DTYPE.names:
+            bars[name] = raw[:, i]
+    return bars
+
+
+# Bir periyot için gösterge dizileri (optimizer bunları süreçler arası paylaşır)
+def prepare(bars, period: int = 5, htf_seconds: int = 300):
+    bars = np.asarray(bars)
+    series = RSIThreshold(period, htf_seconds=htf_seconds).graph.batch(bars)
+    return {
+        "time": np.ascontiguousarray(bars["time"], dtype=np.int64),
+        "close": np.ascontiguousarray(bars["close"], dtype=np.float64),
+        "day": (bars["time"] // 86400).astype(np.int64),
+        "rsi_1m": series["rsi_1m"],
+        "rsi_htf": series["rsi_htf"],
+    }
+
+
+# Durumlu strateji döngüsü. Sadece sinyal bölgesindeki barlar dolaşılır.
+def simulate(data, params=None):
+    p = dict(DEFAULT_PARAMS, **(params or {}))
+    upper, lower = p["upper"], p["lower"]
+    base_lot, max_lot = p["base_lot"], p["max_lot"]
+    reset_on_max = p["reset_on_max"]
+    target, contract, spread = p["profit_target"], p["contract_size"], p["spread"]
+    cooldown = p["cooldown"]
+
+    # Kurallar canlı botla aynı strateji nesnesinden
+    rule = RSIThreshold(p["period"], upper, lower, p["htf_seconds"])
+    values = {}
+    rsi1, rsi5 = data["rsi_1m"], data["rsi_htf"]
+    closes, times, days = data["close"], data["time"], data["day"]
+    with np.errstate(invalid="ignore"):
+        mask = (rsi1 >= upper) | (rsi1 <= lower) | (rsi5 >= upper) | (rsi5 <= lower)
+    candidates = np.flatnonzero(mask)
+
+    trades = []       # kapanan pozisyonlar
+    events = []       # (bar, bakiye, buy_lot, buy_cost, sell_lot, sell_cost)
+    positions = []    # [yön (1/-1), lot, fiyat, açılış zamanı]
+    balance = 0.0
+    buy_lot = buy_cost = sell_lot = sell_cost = 0.0
+    profit_today = 0.0
+    current_lot = base_lot
+    direction = 0
+    last_signal = 0
+    no_trade = False
+    today = -1
+    max_depth = 0
+    max_lot_used = 0.0
+    baskets = 0
+    cooldown_until = None
+
+    for i in candidates.tolist():
+        d = days[i]
+        if d != today:
+            today = d
+            profit_today = 0.0
+            current_lot = base_lot
+            direction = 0
+            last_signal = 0
+            no_trade = False
+        if no_trade:
+            continue
+        if cooldown_until is not None and times[i] < cooldown_until:
+            continue
+        r1, r5 = rsi1[i], rsi5[i]
+        if r1 != r1 or r5 != r5:  # NaN
+            continue
+        values["rsi_1m"], values["rsi_htf"] = r1, r5
+        if rule.exit(values, direction):
+            bid = closes[i]
+            ask = bid + spread
+            profit = 0.0
+            for side, lot, price, opened in positions:
+                pnl = ((bid - price) if side == 1 else (price - ask)) * lot * contract
+                profit += pnl
+                trades.append((opened, int(times[i]), side, lot, price, bid if side == 1 else ask, pnl, len(positions)))
+            max_depth = max(max_depth, len(positions))
+            positions = []
+            baskets += 1
+            balance += profit
+            profit_today += profit
+            buy_lot = buy_cost = sell_lot = sell_cost = 0.0
+            events.append((i, balance, 0.0, 0.0, 0.0, 0.0))
+            direction = 0
+            last_signal = 0
+            current_lot = base_lot
+            if cooldown:
+                cooldown_until = times[i] + cooldown
+            if profit_today >= target:
+                no_trade = True
+            continue
+        signal = rule.entry(values)
+        if not signal:
+            continue
+        if last_signal == signal:
+            continue
+        if direction and direction != signal:
+            current_lot = min(current_lot * 2, max_lot)
+            if reset_on_max and current_lot >= max_lot:
+                current_lot = base_lot
+        else:
+            current_lot = base_lot
+        lot = round(current_lot, 2)
+        if signal == 1:
+            price = closes[i] + spread
+            buy_lot += lot
+            buy_cost += lot * price
+        else:
+            price = closes[i]
+            sell_lot += lot
+            sell_cost += lot * price
+        positions.append((signal, lot, price, int(times[i])))
+        max_lot_used = max(max_lot_used, lot)
+        direction = signal
+        last_signal = signal
+        events.append((i, balance, buy_lot, buy_cost, sell_lot, sell_cost))
+
+    return {
+        "trades": trades,
+        "events": events,
+        "open_positions": positions,
+        "balance": balance,
+        "max_depth": max(max_depth, len(positions)),
+        "max_lot_used": max_lot_used,
+        "baskets": baskets,
+        "params": p,
+    }
+
+
+# Olaylardan bar bazında özsermaye eğrisi (vektörel ileri doldurma)
+def equity_curve(data, result):
+    n = len(data["close"])
+    contract, spread = result["params"]["contract_size"], result["params"]["spread"]
+    equity = np.zeros(n)
+    if not result["events"]:
+        return equity
+    ev = np.array(result["events"], dtype=np.float64)
+    idx = np.full(n, -1, dtype=np.int64)
+    # Aynı barda birden fazla olay varsa sonuncusu geçerli
+    idx[ev[:, 0].astype(np.int64)] = np.arange(len(ev))
+    idx = np.maximum.accumulate(idx)
+    started = idx >= 0
+    state = ev[idx[started]]
+    bid = data["close"][started]
+    floating = (bid * state[:, 2] - state[:, 3] + state[:, 5] - (bid + spread) * state[:, 4]) * contract
+    equity[started] = state[:, 1] + floating
+    return equity
+
+
+def summarize(data, result, equity):
+    trades = result["trades"]
+    profits = np.array([t[6] for t in trades]) if trades else np.zeros(0)
+    peak = np.maximum.accumulate(equity) if len(equity) else equity
+    drawdown = peak - equity if len(equity) else equity
+    gross_win = float(profits[profits > 0].sum())
+    gross_loss = float(-profits[profits < 0].sum())
+    return {
+        "bars": int(len(data["close"])),
+        "net_profit": round(float(result["balance"]), 2),
+        "final_equity": round(float(equity[-1]), 2) if len(equity) else 0.0,
+        "max_drawdown": round(float(drawdown.max()), 2) if len(drawdown) else 0.0,
+        "trades": int(len(trades)),
+        "baskets": int(result["baskets"]),
+        "win_rate": round(float((profits > 0).mean()), 4) if len(profits) else 0.0,
+        "profit_factor": round(gross_win / gross_loss, 3) if gross_loss else None,
+        "max_depth": int(result["max_depth"]),
+        "max_lot_used": round(float(result["max_lot_used"]), 2),
+        "open_positions": len(result["open_positions"]),
+    }
+
+
+def run_backtest(bars, params=None):
+    p = dict(DEFAULT_PARAMS, **(params or {}))
+    data = prepare(bars, p["period"], p["htf_seconds"])
+    result = simulate(data, p)
+    equity = equity_curve(data, result)
+    return data, result, equity, summarize(data, result, equity)
+
+
+def write_outputs(out_dir, data, result, equity, summary):
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, "equity.npy"), np.rec.fromarrays([data["time"], equity], names="time,equity"))
+    with open(os.path.join(out_dir, "trades.csv"), "w") as f:
+        f.write("open_time,close_time,direction,lot,open_price,close_price,profit,basket_depth\n")
+        for opened, closed, side, lot, price, close_price, pnl, depth in result["trades"]:
+            f.write(f"{opened},{closed},{'BUY' if side == 1 else 'SELL'},{lot},{price:.5f},{close_price:.5f},{pnl:.2f},{depth}\n")
+    with open(os.path.join(out_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSI martingale backtest (M1 bar dosyası)")
+    parser.add_argument("bars", help=".npy (BARS_DTYPE) veya CSV dosyası")
+    parser.add_argument("--params", default="{}", help='JSON, ör. \'{"max_lot": 0.32}\'')
+    parser.add_argument("--out", help="Özsermaye eğrisi, işlem listesi ve özetin yazılacağı klasör")
+    args = parser.parse_args()
+
+    bars = load_bars(args.bars)
+    start = time.perf_counter()
+    data, result, equity, summary = run_backtest(bars, json.loads(args.params))
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    print(json.dumps(summary, indent=2))
+    if args.out:
+        write_outputs(args.out, data, result, equity, summary)
+
+
+if __name__ == "__main__":
+    main()
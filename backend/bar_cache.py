@@ -0,0 +1,209 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+# Süreç genelinde bar önbelleği
+#
+# Her (sembol, timeframe) için barlar NumPy yapılandırılmış dizide tutulur.
+# İlk istekte tam geçmiş çekilir; sonraki yenilemelerde MT5'ten sadece son
+# önbellekteki bar (oluşan bar) ve sonrası istenir. Oluşan bar yerinde
+# güncellenir, yeni barlar sona eklenir. `min_refresh` saniyesi içinde gelen
+# istekler MT5'e hiç gitmeden bellekten karşılanır; böylece istemci sayısı
+# artsa da terminal çağrı sayısı sabit kalır.
+#
+# MT5 çağrıları MT5Gateway üzerinden yapılır; önbellek yalnızca event loop
+# thread'inde değişir. Aynı seri için eşzamanlı ıskalar tek bir terminal
+# çağrısında birleşir (seri başına kilit).
+
+BARS_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("tick_volume", "<u8"),
+    ("spread", "<i4"),
+    ("real_volume", "<u8"),
+])
+
+
+# MT5 timeframe sabitini saniyeye çevir (H1 = 0x4000 | 1 ...)
+def timeframe_seconds(timeframe: int) -> int:
+    if timeframe >= 16384:
+        return (timeframe - 16384) * 3600
+    return timeframe * 60
+
+
+# MT5'in döndürdüğü diziyi sabit dtype'a çevir
+def to_bars(rates):
+    bars = np.zeros(len(rates), dtype=BARS_DTYPE)
+    if len(rates):
+        for name in BARS_DTYPE.names:
+            if name in rates.dtype.names:
+                bars[name] = rates[name]
+    return bars
+
+
+# MT5 thread'inde çalışır: planlanan copy_rates çağrılarını sırayla yap
+def _fetch_many(mt5, plans):
+    out = []
+    for plan in plans:
+        fn = mt5.copy_rates_from_pos if plan[0] == "pos" else mt5.copy_rates_range
+        out.append(fn(*plan[1:]))
+    return out
+
+
+class _Series:
+    __slots__ = ("bars", "capacity", "last_refresh", "complete", "lock")
+
+    def __init__(self, capacity):
+        self.bars = np.zeros(0, dtype=BARS_DTYPE)
+        self.capacity = capacity
+        self.last_refresh = 0.0
+        self.complete = False  # Terminal istenenden az bar döndürdüyse tüm geçmiş elimizde
+        self.lock = asyncio.Lock()
+
+
+class BarCache:
+    def __init__(self, gateway, capacity: int = 5000, max_capacity: int = 100000, min_refresh: float = 1.0):
+        self.gateway = gateway
+        self.capacity = capacity
+        self.max_capacity = max_capacity
+        self.min_refresh = min_refresh
+        self.series = {}
+        self.hits = 0
+        self.misses = 0
+        self.mt5_calls = 0
+        self.full_fetches = 0
+        self.delta_fetches = 0
+
+    def _fresh(self, series, count, now):
+        enough = series.complete or len(series.bars) >= min(count, series.capacity)
+        return enough and now - series.last_refresh < self.min_refresh
+
+    # Son `count` barı döndür (eski -> yeni). Dönen dizi salt okunur kabul edilmeli.
+    async def get(self, symbol: str, timeframe: int, count: int = 100):
+        key = (symbol, timeframe)
+        series = self.series.get(key)
+        if series is None:
+            series = _Series(self.capacity)
+            self.series[key] = series
+        if count > series.capacity:
+            series.capacity = min(count, self.max_capacity)
+        if self._fresh(series, count, time.monotonic()):
+            self.hits += 1
+            return series.bars[-count:]
+        async with series.lock:
+            # Kilidi beklerken başka bir istek yenilemiş olabilir
+            now = time.monotonic()
+            if self._fresh(series, count, now):
+                self.hits += 1
+                return series.bars[-count:]
+            self.misses += 1
+            enough = series.complete or len(series.bars) >= min(count, series.capacity)
+            if await self._refresh(symbol, timeframe, series, count, full=not enough):
+                series.last_refresh = now
+        if len(series.bars) == 0:
+            return None
+        return series.bars[-count:]
+
+    async def _refresh(self, symbol, timeframe, series, count, full):
+        plan = self._plan(symbol, timeframe, series, count, full)
+        fn = self.gateway.copy_rates_from_pos if plan[0] == "pos" else self.gateway.copy_rates_range
+        rates = await fn(*plan[1:])
+        return self._apply(series, plan, rates)
+
+    # Terminal isteği: tam geçmiş ("pos") ya da sadece oluşan bar ve sonrası ("range")
+    def _plan(self, symbol, timeframe, series, count, full):
+        self.mt5_calls += 1
+        if full or len(series.bars) == 0:
+            self.full_fetches += 1
+            return ("pos", symbol, timeframe, 0, max(count, series.capacity))
+        # Terminal saati UTC kabul edilir
+        self.delta_fetches += 1
+        last_time = int(series.bars["time"][-1])
+        date_from = datetime.fromtimestamp(last_time, tz=timezone.utc)
+        date_to = datetime.now(timezone.utc) + timedelta(days=2)
+        return ("range", symbol, timeframe, date_from, date_to)
+
+    def _apply(self, series, plan, rates):
+        if plan[0] == "pos":
+            if rates is None or len(rates) == 0:
+                return False
+            series.bars = to_bars(rates)
+            series.complete = len(rates) < plan[4]
+            return True
+        if rates is None:
+            return False
+        if len(rates) == 0:
+            return True
+        self._merge(series, to_bars(rates))
+        return True
+
+    # Birden çok serinin bayat olanlarını tek bir MT5 thread işinde yenile.
+    # Çok sembollü zamanlayıcı her turda bunu çağırır; sembol başına ayrı
+    # event loop <-> thread gidiş-dönüşü olmaz. Yenilenen seri sayısını döndürür.
+    async def prefetch(self, keys, count: int = 100):
+        now = time.monotonic()
+        jobs = []
+        for key in keys:
+            series = self.series.get(key)
+            if series is None:
+                series = _Series(self.capacity)
+                self.series[key] = series
+            if self._fresh(series, count, now) or series.lock.locked():
+                continue
+            self.misses += 1
+            enough = series.complete or len(series.bars) >= min(count, series.capacity)
+            jobs.append((series, self._plan(key[0], key[1], series, count, full=not enough)))
+        if not jobs:
+            return 0
+        results = await self.gateway.run(_fetch_many, self.gateway.mt5, [plan for _, plan in jobs])
+        for (series, plan), rates in zip(jobs, results):
+            if self._apply(series, plan, rates):
+                series.last_refresh = now
+        return len(jobs)
+
+    def _merge(self, series, new):
+        bars = series.bars
+        idx = int(np.searchsorted(bars["time"], new["time"][0]))
+        if idx + len(new) == len(bars):
+            # Yeni bar yok: oluşan bar(lar)ı yerinde güncelle
+            bars[idx:] = new
+            return
+        merged = np.concatenate((bars[:idx], new))
+        if len(merged) > series.capacity:
+            merged = merged[-series.capacity:]
+        series.bars = merged
+
+    # Yeni tick ile oluşan barları MT5'e gitmeden güncelle (bid fiyatı üzerinden).
+    # Yeni bar sınırı geçildiyse seri bayat işaretlenir; sonraki get yeniler.
+    def apply_tick(self, symbol: str, tick):
+        for (s, timeframe), series in self.series.items():
+            if s != symbol or len(series.bars) == 0:
+                continue
+            secs = timeframe_seconds(timeframe)
+            bar_open = tick.time - tick.time % secs
+            last = series.bars[-1]
+            if bar_open == last["time"]:
+                last["close"] = tick.bid
+                if tick.bid > last["high"]:
+                    last["high"] = tick.bid
+                if tick.bid < last["low"]:
+                    last["low"] = tick.bid
+                last["tick_volume"] += 1
+            elif bar_open > last["time"]:
+                series.last_refresh = 0.0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "mt5_calls": self.mt5_calls,
+            "full_fetches": self.full_fetches,
+            "delta_fetches": self.delta_fetches,
+            "series": {f"{s}:{tf}": len(v.bars) for (s, tf), v in self.series.items()},
+        }
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+from bar_cache import BARS_DTYPE, timeframe_seconds, to_bars
+from event_log import log
+
+# Yerel, yalnızca-ekleme (append-only) bar deposu
+#
+# Her (sembol, timeframe) bir klasördür; her sütun sabit genişlikli ham bir
+# dosyadır (time.bin, open.bin, ...). Okumalar np.memmap ile kopyasız yapılır.
+# Zaman sütunu sıralı olduğundan aralık sorgusu ikili aramadır; ayrıca her
+# INDEX_STRIDE barda bir zaman değerini bellekte tutan seyrek bir indeks,
+# aramanın diskte sadece tek bir bloğa dokunmasını sağlar.
+#
+# Sadece kapanmış barlar yazılır. meta.json'daki `count` tek doğruluk
+# kaynağıdır: yazma yarıda kalırsa fazlalık açılışta kesilir.
+
+INDEX_STRIDE = 4096
+
+
+class StoreSeries:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.count = self._read_meta()
+        self._repair()
+        self._maps = None
+        self._index = None
+
+    def _meta_path(self):
+        return os.path.join(self.path, "meta.json")
+
+    def _column_path(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _read_meta(self):
+        try:
+            with open(self._meta_path()) as f:
+                return int(json.load(f)["count"])
+        except (FileNotFoundError, ValueError, KeyError):
+            return 0
+
+    def _write_meta(self):
+        tmp = self._meta_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"count": self.count, "dtype": BARS_DTYPE.descr}, f)
+        os.replace(tmp, self._meta_path())
+
+    # Yarıda kalmış eklemeden kalan fazla baytları kes
+    def _repair(self):
+        for name in BARS_DTYPE.names:
+            path = self._column_path(name)
+            size = self.count * BARS_DTYPE[name].itemsize
+            if not os.path.exists(path):
+                open(path, "wb").close()
+            elif os.path.getsize(path) != size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    # Sütunların memmap görünümleri (sayı değişince yeniden eşlenir)
+    def columns(self):
+        if self._maps is None or len(self._maps["time"]) != self.count:
+            if self.count == 0:
+                self._maps = {name: np.zeros(0, dtype=BARS_DTYPE[name]) for name in BARS_DTYPE.names}
+            else:
+                self._maps = {
+                    name: np.memmap(self._column_path(name), dtype=BARS_DTYPE[name], mode="r", shape=(self.count,))
+                    for name in BARS_DTYPE.names
+                }
+            self._index = np.array(self._maps["time"][::INDEX_STRIDE])
+        return self._maps
+
+    def last_time(self):
+        if self.count == 0:
+            return None
+        return int(self.columns()["time"][-1])
+
+    def append(self, bars):
+        if len(bars) == 0:
+            return 0
+        last = self.last_time()
+        if last is not None:
+            bars = bars[bars["time"] > last]
+            if len(bars) == 0:
+                return 0
+        for name in BARS_DTYPE.names:
+            with open(self._column_path(name), "ab") as f:
+                f.write(np.ascontiguousarray(bars[name], dtype=BARS_DTYPE[name]).tobytes())
+        self.count += len(bars)
+        self._write_meta()
+        return len(bars)
+
+    def _search(self, t, side):
+        times = self.columns()["time"]
+        block = int(np.searchsorted(self._index, t, side)) - 1
+        lo = max(block, 0) * INDEX_STRIDE
+        hi = min(lo + 2 * INDEX_STRIDE, self.count)
+        return lo + int(np.searchsorted(times[lo:hi], t, side))
+
+    # [start, end] aralığındaki satır indeksleri (O(log n))
+    def locate(self, start=None, end=None):
+        if self.count == 0:
+            return 0, 0
+        lo = 0 if start is None else self._search(start, "left")
+        hi = self.count if end is None else self._search(end, "right")
+        return lo, max(lo, hi)
+
+    # Kopyasız sütun dilimleri
+    def range_columns(self, start=None, end=None, limit=None):
+        lo, hi = self.locate(start, end)
+        if limit is not None and hi - lo > limit:
+            lo = hi - limit
+        return {name: col[lo:hi] for name, col in self.columns().items()}
+
+    # Yapılandırılmış dizi olarak (kopya)
+    def range(self, start=None, end=None, limit=None):
+        cols = self.range_columns(start, end, limit)
+        out = np.zeros(len(cols["time"]), dtype=BARS_DTYPE)
+        for name, col in cols.items():
+            out[name] = col
+        return out
+
+
+class BarStore:
+    def __init__(self, root: str):
+        self.root = root
+        self.series = {}
+
+    def get(self, symbol: str, timeframe: int):
+        key = (symbol, timeframe)
+        series = self.series.get(key)
+        if series is None:
+            series = StoreSeries(os.path.join(self.root, symbol, str(timeframe)))
+            self.series[key] = series
+        return series
+
+    def stats(self):
+        return {f"{s}:{tf}": {"count": v.count, "last_time": v.last_time()} for (s, tf), v in self.series.items()}
+
+
+# Arkaplan senkronizasyonu: depodaki son bardan sonrasını terminalden çeker.
+# İlk çalıştırmada `initial_count` bar geçmiş indirilir; kesinti sonrası oluşan
+# boşluklar tek bir copy_rates_range çağrısıyla doldurulur.
+class BarSyncer:
+    def __init__(self, store: BarStore, gateway, pairs, interval: float = 60.0, initial_count: int = 100000):
+        self.store = store
+        self.gateway = gateway
+        self.pairs = list(pairs)  # [(sembol, timeframe), ...]
+        self.interval = interval
+        self.initial_count = initial_count
+        self.appended = 0
+        self.syncs = 0
+
+    async def sync_once(self, symbol, timeframe):
+        series = self.store.get(symbol, timeframe)
+        last = series.last_time()
+        if last is None:
+            rates = await self.gateway.copy_rates_from_pos(symbol, timeframe, 0, self.initial_count)
+        else:
+            date_from = datetime.fromtimestamp(last + timeframe_seconds(timeframe), tz=timezone.utc)
+            date_to = datetime.now(timezone.utc) + timedelta(days=2)
+            rates = await self.gateway.copy_rates_range(symbol, timeframe, date_from, date_to)
+        if rates is None or len(rates) < 2:
+            return 0
+        # Son bar hâlâ oluşuyor; sadece kapanmış barlar yazılır
+        added = series.append(to_bars(rates[:-1]))
+        self.appended += added
+        self.syncs += 1
+        return added
+
+    async def run(self):
+        while True:
+            for symbol, timeframe in self.pairs:
+                try:
+                    added = await self.sync_once(symbol, timeframe)
+                    if added:
+                        log("STORE", "info", "{symbol}:{timeframe} +{added} bar", symbol=symbol, timeframe=timeframe,
+                            added=added)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    log("STORE", "error", "{symbol}:{timeframe} {error}", symbol=symbol, timeframe=timeframe, error=e)
+            await asyncio.sleep(self.interval)
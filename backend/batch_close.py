@@ -0,0 +1,247 @@
+import asyncio
+import time
+
+from deal_journal import PnL
+from mt5_gateway import MT5Timeout
+
+# Toplu pozisyon kapama
+#
+# Eski döngü her pozisyon için ayrı tick okuyup bir önceki emrin sonucunu
+# bekliyordu; derin bir martingale sepetinde son bacak ilkinden birçok terminal
+# gidiş-dönüşü sonra kapanıyordu. Burada:
+#   - sembol başına tek bir tick anlık görüntüsü alınır,
+#   - tüm kapama istekleri önceden hazırlanır,
+#   - istekler sınırlı eşzamanlılıkla (semaphore) gateway'e gönderilir,
+#   - requote / fiyat değişti yanıtları yenilenmiş fiyatla tekrar denenir.
+#     Aynı anda requote alan bacaklar tek bir tick yenilemesini paylaşır.
+#
+# Zaman aşımı tekrar denenmez: emir terminalde gerçekleşmiş olabilir.
+#
+# Kısmi dolum (DONE_PARTIAL): pozisyon terminalden yeniden okunur ve kalan hacim
+# düz olana kadar kapatılmaya devam edilir. Pozisyon küçülmüyorsa ya da
+# okunamıyorsa bacak kısmi (partial) olarak bırakılır. Kar, pozisyonun açık
+# karından değil bacağın gerçekleşen deal'larından (kar + komisyon + swap +
+# ücret) hesaplanır.
+
+
+def build_close_request(mt5, pos, tick, deviation: int = 10, magic: int = 234000,
+                        comment: str = "RSI Bot Kapat", filling=None):
+    buy = pos.type == mt5.ORDER_TYPE_BUY
+    return {
+        "action": mt5.TRADE_ACTION_DEAL,
+        "symbol": pos.symbol,
+        "volume": pos.volume,
+        "type": mt5.ORDER_TYPE_SELL if buy else mt5.ORDER_TYPE_BUY,
+        "position": pos.ticket,
+        "price": tick.bid if buy else tick.ask,
+        "deviation": deviation,
+        "magic": magic,
+        "comment": comment,
+        "type_time": mt5.ORDER_TIME_GTC,
+        "type_filling": mt5.ORDER_FILLING_IOC if filling is None else filling,
+    }
+
+
+def retry_retcodes(mt5):
+    return (mt5.TRADE_RETCODE_REQUOTE, mt5.TRADE_RETCODE_PRICE_CHANGED, mt5.TRADE_RETCODE_PRICE_OFF)
+
+
+def filled_retcodes(mt5):
+    return (mt5.TRADE_RETCODE_DONE, mt5.TRADE_RETCODE_DONE_PARTIAL)
+
+
+class CloseResult:
+    __slots__ = ("ticket", "symbol", "volume", "filled", "deals", "retcode", "price", "profit", "attempts",
+                 "elapsed_ms", "comment", "ok", "partial")
+
+    def __init__(self, pos):
+        self.ticket = pos.ticket
+        self.symbol = pos.symbol
+        self.volume = pos.volume
+        self.filled = 0.0  # kapatılan hacim (emir sonuçlarının toplamı)
+        self.deals = []    # kapama deal ticket'ları
+        self.profit = 0.0  # gerçekleşen net kar (deal'lardan)
+        self.retcode = None
+        self.price = None
+        self.attempts = 0
+        self.elapsed_ms = 0.0  # toplu işlemin başlangıcından bu bacağın sonucuna kadar
+        self.comment = ""
+        self.ok = False       # pozisyon tamamen kapandı
+        self.partial = False  # bir kısmı kapandı, kalan açık
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class BatchCloseReport:
+    def __init__(self, results, elapsed_ms: float, tick_reads: int):
+        self.results = results
+        self.elapsed_ms = elapsed_ms
+        self.tick_reads = tick_reads
+
+    # Kısmen kapanan bacakların gerçekleşen karı da dahil
+    @property
+    def profit(self):
+        return sum(r.profit for r in self.results)
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.ok]
+
+    def as_dict(self):
+        return {
+            "closed": sum(1 for r in self.results if r.ok),
+            "failed": len(self.failed),
+            "partial": sum(1 for r in self.results if r.partial),
+            "profit": round(self.profit, 2),
+            "elapsed_ms": round(self.elapsed_ms, 2),
+            "tick_reads": self.tick_reads,
+            "results": [r.as_dict() for r in self.results],
+        }
+
+
+# Sembol başına paylaşılan tick görüntüsü; requote alan bacaklar aynı yenilemeyi kullanır
+class _Prices:
+    def __init__(self, gateway):
+        self.gateway = gateway
+        self.ticks = {}
+        self.versions = {}
+        self.locks = {}
+        self.reads = 0
+
+    async def load(self, symbols):
+        ticks = await asyncio.gather(*(self.gateway.symbol_info_tick(s) for s in symbols))
+        self.reads += len(symbols)
+        for symbol, tick in zip(symbols, ticks):
+            self.ticks[symbol] = tick
+            self.versions[symbol] = 0
+            self.locks[symbol] = asyncio.Lock()
+
+    async def refresh(self, symbol, seen_version):
+        async with self.locks[symbol]:
+            if self.versions[symbol] == seen_version:
+                tick = await self.gateway.symbol_info_tick(symbol)
+                self.reads += 1
+                if tick is not None:
+                    self.ticks[symbol] = tick
+                self.versions[symbol] += 1
+        return self.ticks[symbol], self.versions[symbol]
+
+
+class BatchCloser:
+    def __init__(self, gateway, mt5, concurrency: int = 4, deviation: int = 10, max_retries: int = 3,
+                 magic: int = 234000, comment: str = "RSI Bot Kapat", filling=None):
+        self.gateway = gateway
+        self.mt5 = mt5
+        self.concurrency = concurrency
+        self.deviation = deviation
+        self.max_retries = max_retries
+        self.magic = magic
+        self.comment = comment
+        self.filling = filling
+        self.batches = 0
+        self.closed = 0
+        self.failed = 0
+        self.partials = 0
+        self.retries = 0
+        self.last_elapsed_ms = 0.0
+
+    async def close(self, positions):
+        start = time.perf_counter()
+        positions = list(positions or ())
+        prices = _Prices(self.gateway)
+        await prices.load(sorted({p.symbol for p in positions}))
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+        results = await asyncio.gather(*(self._close_one(pos, prices, semaphore, start) for pos in positions))
+        report = BatchCloseReport(results, (time.perf_counter() - start) * 1000, prices.reads)
+        # Kar tüm kapamalar gönderildikten sonra okunur; bacakları geciktirmez
+        await asyncio.gather(*(self._book(r) for r in results if r.deals))
+        self.batches += 1
+        self.closed += len(results) - len(report.failed)
+        self.failed += len(report.failed)
+        self.partials += sum(1 for r in results if r.partial)
+        self.last_elapsed_ms = report.elapsed_ms
+        return report
+
+    async def _close_one(self, pos, prices, semaphore, start):
+        result = CloseResult(pos)
+        tick, version = prices.ticks[pos.symbol], 0
+        retry = retry_retcodes(self.mt5)
+        filled = filled_retcodes(self.mt5)
+        leg = pos  # kalan hacim; kısmi dolumdan sonra terminalden yeniden okunur
+        retries = 0
+        async with semaphore:
+            while True:
+                if tick is None:
+                    result.comment = "Tick verisi alınamadı"
+                    break
+                request = build_close_request(self.mt5, leg, tick, self.deviation, self.magic, self.comment, self.filling)
+                result.attempts += 1
+                try:
+                    sent = await self.gateway.order_send(request)
+                except MT5Timeout as e:
+                    result.comment = str(e)
+                    break
+                if sent is None:
+                    result.comment = str(await self.gateway.run(self.mt5.last_error))
+                    break
+                result.retcode = sent.retcode
+                result.comment = sent.comment
+                if sent.retcode in filled:
+                    result.filled = round(result.filled + sent.volume, 8)
+                    result.price = sent.price
+                    if sent.deal:
+                        result.deals.append(sent.deal)
+                    if sent.retcode == self.mt5.TRADE_RETCODE_DONE and sent.volume >= leg.volume - 1e-9:
+                        result.ok = True
+                        break
+                    # Kalan hacim terminalden okunur
+                    try:
+                        remaining = await self.gateway.positions_get(ticket=pos.ticket)
+                    except MT5Timeout as e:
+                        result.comment = str(e)
+                        break
+                    if remaining is None:
+                        result.comment = str(await self.gateway.run(self.mt5.last_error))
+                        break
+                    if not remaining:
+                        result.ok = True
+                        break
+                    if sent.volume <= 0 or remaining[0].volume >= leg.volume - 1e-9:
+                        break  # ilerleme yok
+                    leg = remaining[0]
+                elif sent.retcode not in retry or retries >= self.max_retries:
+                    break
+                else:
+                    retries += 1
+                    self.retries += 1
+                tick, version = await prices.refresh(pos.symbol, version)
+            result.partial = not result.ok and result.filled > 0
+        result.elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+        return result
+
+    # Gerçekleşen kar bacağın kapama deal'larından
+    async def _book(self, result):
+        try:
+            deals = await self.gateway.history_deals_get(position=result.ticket)
+        except MT5Timeout:
+            deals = None
+        if deals is None:
+            result.comment = f"{result.comment} | deal geçmişi okunamadı".strip(" |")
+            return
+        pnl = PnL()
+        tickets = set(result.deals)
+        for deal in deals:
+            if deal.ticket in tickets:
+                pnl.add(deal)
+        result.profit = round(pnl.net, 2)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "closed": self.closed,
+            "failed": self.failed,
+            "partials": self.partials,
+            "retries": self.retries,
+            "last_elapsed_ms": round(self.last_elapsed_ms, 2),
+        }
@@ -0,0 +1,92 @@
+import asyncio
+import sys
+import time
+
+import fake_mt5 as mt5
+from mt5_gateway import MT5Gateway
+from batch_close import BatchCloser
+
+# Sepet kapama: eski sıralı döngü ile BatchCloser karşılaştırması
+#
+# Sahte terminalde her çağrıya LATENCY kadar gecikme eklenir. Eski döngü her
+# pozisyon için tick okuyup emrin sonucunu bekler; BatchCloser tek tick
+# görüntüsüyle istekleri sınırlı eşzamanlılıkla gönderir. Tüm çağrılar tek MT5
+# thread'inde kalır; kazanç tick okumalarından ve event loop gidiş-dönüşlerinden
+# gelir.
+#
+# Çalıştırma: python bench_close.py [gecikme_ms] [requote_oranı]
+
+SYMBOL = "XAUUSD"
+SIZES = (4, 16, 32)
+
+
+async def open_basket(gateway, n):
+    for i in range(n):
+        tick = await gateway.symbol_info_tick(SYMBOL)
+        buy = i % 2 == 0
+        await gateway.order_send({
+            "action": mt5.TRADE_ACTION_DEAL, "symbol": SYMBOL, "volume": 0.01 * (i + 1),
+            "type": mt5.ORDER_TYPE_BUY if buy else mt5.ORDER_TYPE_SELL,
+            "price": tick.ask if buy else tick.bid, "deviation": 1000,
+        })
+
+
+# main.py'deki eski close_all_positions döngüsü
+async def sequential_close(gateway):
+    start = time.perf_counter()
+    positions = await gateway.positions_get(symbol=SYMBOL)
+    legs = []
+    for pos in positions:
+        tick = await gateway.symbol_info_tick(SYMBOL)
+        price = tick.bid if pos.type == mt5.ORDER_TYPE_BUY else tick.ask
+        result = await gateway.order_send({
+            "action": mt5.TRADE_ACTION_DEAL, "symbol": pos.symbol, "volume": pos.volume,
+            "type": mt5.ORDER_TYPE_SELL if pos.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY,
+            "position": pos.ticket, "price": price, "deviation": 10,
+            "type_time": mt5.ORDER_TIME_GTC, "type_filling": mt5.ORDER_FILLING_IOC,
+        })
+        legs.append(((time.perf_counter() - start) * 1000, result.retcode == mt5.TRADE_RETCODE_DONE))
+    return (time.perf_counter() - start) * 1000, legs
+
+
+async def batch_close(gateway, closer):
+    start = time.perf_counter()
+    positions = await gateway.positions_get(symbol=SYMBOL)
+    report = await closer.close(positions)
+    return (time.perf_counter() - start) * 1000, [(r.elapsed_ms, r.ok) for r in report.results]
+
+
+def report(label, n, elapsed, legs):
+    times = sorted(t for t, _ in legs)
+    closed = sum(1 for _, ok in legs if ok)
+    print(f"{label:<26} n={n:3d}  toplam={elapsed:8.1f} ms  ilk bacak={times[0]:7.1f} ms  "
+          f"son bacak={times[-1]:8.1f} ms  kapanan={closed}/{n}")
+
+
+async def main(latency_ms, requote_rate):
+    mt5.initialize()
+    print(f"gecikme={latency_ms} ms/çağrı  requote oranı={requote_rate}")
+    for n in SIZES:
+        for label in ("sıralı döngü", "BatchCloser"):
+            gateway = MT5Gateway(mt5)
+            mt5.LATENCY = 0.0
+            mt5.REQUOTE_RATE = 0.0
+            await open_basket(gateway, n)
+            mt5.LATENCY = latency_ms / 1000
+            mt5.REQUOTE_RATE = requote_rate
+            if label == "sıralı döngü":
+                elapsed, legs = await sequential_close(gateway)
+            else:
+                elapsed, legs = await batch_close(gateway, BatchCloser(gateway, mt5, concurrency=8, max_retries=5))
+            report(label, n, elapsed, legs)
+            # Başarısız kalanları temizle
+            mt5.LATENCY = 0.0
+            mt5.REQUOTE_RATE = 0.0
+            await BatchCloser(gateway, mt5, max_retries=10).close(await gateway.positions_get(symbol=SYMBOL))
+            gateway.executor.shutdown()
+        print()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 20.0,
+                     float(sys.argv[2]) if len(sys.argv) > 2 else 0.1))
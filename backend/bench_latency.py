@@ -0,0 +1,95 @@
+import asyncio
+import statistics
+import sys
+import time
+
+import fake_mt5 as mt5
+from mt5_gateway import MT5Gateway
+from market_watcher import MarketWatcher
+
+# Sinyal -> emir gecikmesi: eski sabit `sleep(5)` döngüsü ile olay tabanlı
+# MarketWatcher karşılaştırması (sahte terminal üzerinde, gerçek zamanlı).
+#
+# Sahte terminalde tick her saniye başında değişir. Her tick değişiminin bir
+# sinyal başlattığı varsayılır; gecikme, o değişimden sonra gelen ilk emrin
+# (değişimi görmüş bir tick ile) sonuçlandığı ana kadar geçen süredir. Sabit
+# uykuda iki yoklama arasındaki değişimler bir sonraki yoklamayı bekler.
+#
+# Çalıştırma: python bench_latency.py [saniye]
+
+SYMBOL = "XAUUSD"
+
+
+def order_request(tick):
+    return {
+        "action": mt5.TRADE_ACTION_DEAL,
+        "symbol": SYMBOL,
+        "volume": 0.01,
+        "type": mt5.ORDER_TYPE_BUY,
+        "price": tick.ask,
+        "deviation": 10,
+        "type_time": mt5.ORDER_TIME_GTC,
+        "type_filling": mt5.ORDER_FILLING_IOC,
+    }
+
+
+async def send_and_measure(gateway, tick, samples):
+    await gateway.order_send(order_request(tick))
+    samples.append((time.time(), tick.time_msc / 1000))
+
+
+async def fixed_sleep(gateway, duration, samples):
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        tick = await gateway.symbol_info_tick(SYMBOL)
+        await send_and_measure(gateway, tick, samples)
+        await asyncio.sleep(5)
+
+
+async def event_driven(gateway, duration, samples):
+    watcher = MarketWatcher(gateway, SYMBOL, timeframes=(mt5.TIMEFRAME_M1,))
+    task = asyncio.create_task(watcher.run())
+    end = time.monotonic() + duration
+    version = 0
+    while time.monotonic() < end:
+        event = await watcher.wait(version, timeout=1)
+        if event is None:
+            continue
+        version = event.version
+        await send_and_measure(gateway, event.tick, samples)
+    task.cancel()
+
+
+# Her tick değişimi (saniye başı) için, onu görmüş ilk emrin gecikmesi
+def latencies(orders):
+    result = []
+    first, last = int(orders[0][1]) + 1, int(orders[-1][1])
+    for change in range(first, last + 1):
+        for done, seen in orders:
+            if seen >= change:
+                result.append(done - change)
+                break
+    return result
+
+
+def report(label, orders):
+    samples = sorted(latencies(orders))
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<22} n={len(samples):4d}  ort={statistics.mean(samples) * 1000:8.1f} ms  "
+          f"p50={statistics.median(samples) * 1000:8.1f} ms  p99={p99 * 1000:8.1f} ms")
+
+
+async def main(duration):
+    mt5.LATENCY = 0.002
+    gateway = MT5Gateway(mt5)
+    gateway.call(mt5.initialize)
+    before, after = [], []
+    await fixed_sleep(gateway, duration, before)
+    await event_driven(gateway, duration, after)
+    report("sabit sleep(5)", before)
+    report("MarketWatcher", after)
+    gateway.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 30.0))
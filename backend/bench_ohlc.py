@@ -0,0 +1,69 @@
+import sys
+import time
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import ohlc_codec
+from bar_cache import BARS_DTYPE
+
+# /ohlc kodlama maliyeti: eski satır-sözlük yanıtı ile sütunlu / ikili biçimler
+#
+# Eski yol: satır başına dict listesi -> FastAPI jsonable_encoder -> JSONResponse.
+# Yeni yollar ohlc_codec ile; gzip ve (kuruluysa) brotli boyutları da ölçülür.
+#
+# Çalıştırma: python bench_ohlc.py [bar_sayısı ...]
+
+
+def synthetic(n):
+    rng = np.random.default_rng(0)
+    bars = np.zeros(n, dtype=BARS_DTYPE)
+    bars["time"] = 1_700_000_000 + np.arange(n) * 60
+    close = np.round(2000 + np.cumsum(rng.normal(0, 0.5, n)), 2)
+    bars["open"] = np.r_[close[0], close[:-1]]
+    bars["close"] = close
+    bars["high"] = np.maximum(bars["open"], close) + np.round(rng.random(n), 2)
+    bars["low"] = np.minimum(bars["open"], close) - np.round(rng.random(n), 2)
+    bars["tick_volume"] = rng.integers(1, 500, n)
+    return bars
+
+
+def legacy(rates):
+    fields = ohlc_codec.FIELDS
+    columns = [rates[f].tolist() for f in fields]
+    rows = [dict(zip(fields, row)) for row in zip(*columns)]
+    return JSONResponse(jsonable_encoder(rows)).body
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def main(sizes):
+    for n in sizes:
+        bars = synthetic(n)
+        repeat = 5 if n <= 100_000 else 1
+        base_t, base_body = timed(lambda: legacy(bars), repeat)
+        print(f"n={n}: eski satır-dict {len(base_body):>11,} B  {base_t * 1000:9.2f} ms")
+        for fmt in ohlc_codec.FORMATS:
+            if not ohlc_codec.available(fmt):
+                print(f"  {fmt:<8} kurulu değil")
+                continue
+            t, body = timed(lambda: ohlc_codec.encode(ohlc_codec.select(bars), fmt), repeat)
+            gz_t, gz = timed(lambda: ohlc_codec.compress(body, "gzip")[0], repeat)
+            line = (f"  {fmt:<8} {len(body):>11,} B  {t * 1000:9.2f} ms | gzip {len(gz):>10,} B  "
+                    f"{(t + gz_t) * 1000:9.2f} ms  (x{len(base_body) / len(gz):5.1f} bayt, x{base_t / (t + gz_t):5.1f} CPU)")
+            if ohlc_codec.brotli is not None:
+                br_t, br = timed(lambda: ohlc_codec.compress(body, "br")[0], repeat)
+                line += f" | br {len(br):>10,} B {(t + br_t) * 1000:8.2f} ms"
+            print(line)
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [100, 10_000, 1_000_000])
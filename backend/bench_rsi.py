@@ -0,0 +1,77 @@
+import time
+import numpy as np
+
+from rsi_engine import RSIEngine, calculate_rsi
+
+# Mikro benchmark: eski tam pencere hesaplaması ile artımlı motoru karşılaştırır.
+# Senaryo: her döngüde 100 barlık pencere gelir, son bar oluşmaktadır
+# (bot_logic'teki 5 saniyelik kontrolün birebir karşılığı).
+#
+# Çalıştırma: python bench_rsi.py
+
+RATES_DTYPE = np.dtype([("time", "<i8"), ("close", "<f8")])
+
+
+def make_rates(n, seed=1):
+    rng = np.random.default_rng(seed)
+    rates = np.zeros(n, dtype=RATES_DTYPE)
+    rates["time"] = np.arange(n, dtype=np.int64) * 60
+    rates["close"] = 2000.0 + np.cumsum(rng.normal(0, 0.5, n))
+    return rates
+
+
+def bench(label, fn, loops):
+    start = time.perf_counter()
+    for i in range(loops):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed / loops * 1e6:8.2f} us/çağrı")
+    return elapsed / loops
+
+
+def main(window=100, ticks_per_bar=12, bars=2000, period=5):
+    rates = make_rates(bars + window)
+    loops = bars * ticks_per_bar
+    rng = np.random.default_rng(2)
+    noise = rng.normal(0, 0.1, loops)
+
+    # Eski yöntem: her tickte pencereden Python listesi kur + calculate_rsi
+    def old(i):
+        end = window + i // ticks_per_bar
+        closes = [r["close"] for r in rates[end - window:end]]
+        closes[-1] += noise[i]
+        return calculate_rsi(closes, period)
+
+    # Yeni yöntem: sadece oluşan bar motora bildirilir
+    engine = RSIEngine(period)
+    engine.feed(rates[:window])
+
+    def new(i):
+        end = window + i // ticks_per_bar
+        return engine.update(int(rates["time"][end - 1]), rates["close"][end - 1] + noise[i])
+
+    # Doğruluk kontrolü
+    check = RSIEngine(period)
+    check.feed(rates[:window])
+    for i in range(0, loops, 97):
+        end = window + i // ticks_per_bar
+        chunk = rates[end - window:end].copy()
+        chunk["close"][-1] += noise[i]
+        closes = list(chunk["close"])
+        rsi_new = check.feed(chunk)
+        if abs(rsi_new - calculate_rsi(closes, period)) > 0.011:
+            raise AssertionError(f"RSI uyuşmazlığı: {rsi_new} != {calculate_rsi(closes, period)}")
+
+    print(f"Pencere: {window} bar, periyot: {period}, {loops} güncelleme")
+    t_old = bench("calculate_rsi (tam pencere)", old, loops)
+    t_new = bench("RSIEngine.update (artımlı)", new, loops)
+    wilder = RSIEngine(period, "wilder")
+    wilder.feed(rates[:window])
+    bench("RSIEngine.update (wilder)", lambda i: wilder.update(
+        int(rates["time"][window + i // ticks_per_bar - 1]),
+        rates["close"][window + i // ticks_per_bar - 1] + noise[i]), loops)
+    print(f"Hızlanma: {t_old / t_new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
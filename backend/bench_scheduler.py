@@ -0,0 +1,96 @@
+import asyncio
+import sys
+import time
+
+import fake_mt5 as mt5
+from bar_cache import BarCache
+from batch_close import BatchCloser
+from mt5_gateway import MT5Gateway
+from resampler import ResamplerSet
+from strategy import RSIMartingale, StrategyScheduler
+
+# Çok sembollü zamanlayıcı: tur başına maliyetin sembol sayısıyla değişimi
+#
+# Karşılaştırma:
+#   - sembol başına döngü: her sembol kendi tick okumasını ve bar yenilemesini
+#     ayrı gateway çağrılarıyla yapar (eski tek sembollü bot_logic'in N kopyası)
+#   - StrategyScheduler: tüm tick'ler tek işte, bayat barlar tek işte
+#
+# En kötü durum ölçülür: her turda her sembolde yeni tick vardır ve her seri
+# terminalden yenilenir. Emir açılmaması için eşikler erişilemez seçilir.
+# LATENCY sahte terminalde çağrı başına gecikmedir (IPC maliyeti yerine).
+#
+# Çalıştırma: python bench_scheduler.py [gecikme_ms]
+
+SIZES = (1, 5, 10, 30, 60)
+ROUNDS = 20
+
+
+def build(n):
+    gateway = MT5Gateway(mt5)
+    bar_cache = BarCache(gateway, min_refresh=60.0)
+    resamplers = ResamplerSet(bar_cache, mt5.TIMEFRAME_M1, m1_window=500)
+
+    async def indicators(symbol, graph):
+        rates = {}
+        for seconds in graph.timeframes():
+            if seconds == 60:
+                rates[seconds] = await bar_cache.get(symbol, mt5.TIMEFRAME_M1, 500)
+            else:
+                rates[seconds] = await resamplers.get(symbol, seconds, 100)
+        return graph.evaluate(symbol, rates)
+
+    closer = BatchCloser(gateway, mt5)
+    symbols = [f"SYM{i:02d}" for i in range(n)]
+    strategies = [RSIMartingale(s, gateway, mt5, closer, indicators, upper=101.0, lower=-1.0) for s in symbols]
+    scheduler = StrategyScheduler(gateway, bar_cache, strategies, mt5.TIMEFRAME_M1, bar_count=500)
+    return gateway, bar_cache, scheduler, strategies
+
+
+async def per_symbol_round(gateway, bar_cache, strategies):
+    async def one(strategy):
+        tick = await gateway.symbol_info_tick(strategy.symbol)
+        bar_cache.apply_tick(strategy.symbol, tick)
+        await strategy.evaluate()
+    await asyncio.gather(*(one(s) for s in strategies))
+
+
+async def scheduler_round(scheduler):
+    for watcher in scheduler.watchers.values():
+        watcher.last_time_msc = None  # her sembolde değişim varmış gibi
+    await scheduler.cycle()
+
+
+async def measure(n, mode):
+    gateway, bar_cache, scheduler, strategies = build(n)
+    # Isınma: ilk tam geçmiş çekimi ölçüme girmesin
+    await per_symbol_round(gateway, bar_cache, strategies)
+    calls = gateway.completed
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for series in bar_cache.series.values():
+            series.last_refresh = 0.0  # her seri terminalden yenilensin
+        if mode == "scheduler":
+            await scheduler_round(scheduler)
+        else:
+            await per_symbol_round(gateway, bar_cache, strategies)
+    elapsed = (time.perf_counter() - start) / ROUNDS
+    jobs = (gateway.completed - calls) / ROUNDS
+    gateway.executor.shutdown()
+    return elapsed, jobs
+
+
+async def main(latency_ms):
+    mt5.initialize()
+    mt5.LATENCY = latency_ms / 1000
+    print(f"gecikme={latency_ms} ms/çağrı, tur başına (her sembolde yeni tick, her seri yenilenir)")
+    print(f"{'sembol':>6} | {'sembol başına döngü':>30} | {'StrategyScheduler':>30} | {'sembol başına (sched)':>22}")
+    for n in SIZES:
+        base, base_jobs = await measure(n, "per_symbol")
+        sched, sched_jobs = await measure(n, "scheduler")
+        print(f"{n:6d} | {base * 1000:9.2f} ms {base_jobs:6.0f} MT5 işi      | "
+              f"{sched * 1000:9.2f} ms {sched_jobs:6.0f} MT5 işi      | {sched / n * 1000:12.3f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.0))
@@ -0,0 +1,279 @@
+import argparse
+import asyncio
+import gzip
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+import fake_mt5 as mt5
+import ohlc_codec
+from bench_close import SYMBOL, open_basket
+from bench_ohlc import synthetic
+from bench_scheduler import build, scheduler_round
+from batch_close import BatchCloser
+from indicators import (IndicatorCache, atr, bollinger, ema, parse_spec, rsi_sma, rsi_wilder, spec_key, stochastic,
+                        stream)
+from mt5_gateway import MT5Gateway
+from rsi_engine import calculate_rsi
+from ws_hub import WSHub
+
+# Sıcak yollar için tekrarlanabilir benchmark takımı
+#
+# Tek komutla gösterge hesaplarını, /ohlc kodlamasını, websocket yayınını ve
+# bot turunu ölçer; sonuçları commit'ler arasında karşılaştırılabilir JSON'a
+# yazar. Sahte terminal sabit tohum ve donmuş saatle çalışır (FAKE_MT5_SEED,
+# set_clock(speed=0)), böylece her çalıştırma aynı verilerle ölçülür; bar
+# verileri bench_ohlc.synthetic ile üretilir.
+#
+# Her ölçüm, çağrı sayısı en az --min-time sürecek şekilde ayarlanır ve
+# --repeat kez tekrarlanır; en iyi ve medyan çağrı süresi raporlanır.
+#
+# Gruplar:
+#   indicators  pencere boyutu başına toplu göstergeler, kuyruk önbelleği ve
+#               akış güncellemesi
+#   ohlc        100 / 10k / 1M bar için biçim başına kodlama ve gzip
+#   ws          WSHub üzerinden 1 / 100 / 1000 aboneye tek yayın (dağıtım +
+#               abonelerin kuyruktan alması); gerçek soket yükü için loadtest.py
+#   bot         StrategyScheduler turu (1 ve 10 sembol) ve sepet kapama
+#
+# Çalıştırma:
+#   python bench_suite.py --out bench/HEAD.json
+#   python bench_suite.py --only ohlc ws --quick
+#   python bench_suite.py --out bench/yeni.json --compare bench/eski.json
+
+GROUPS = ("indicators", "ohlc", "ws", "bot")
+WINDOWS = (100, 1_000, 10_000, 100_000)
+OHLC_SIZES = (100, 10_000, 1_000_000)
+WS_CLIENTS = (1, 100, 1000)
+BOT_SYMBOLS = (1, 10)
+CLOSE_SIZES = (16,)
+CLOCK_START = 1_700_000_000
+
+
+class Runner:
+    def __init__(self, min_time: float, repeat: int):
+        self.min_time = min_time
+        self.repeat = repeat
+        self.results = []
+
+    def _record(self, group, name, params, samples, extra):
+        best = min(samples)
+        entry = {"group": group, "name": name, "params": params, "best_s": best,
+                 "median_s": float(np.median(samples)), "ops_per_s": 1.0 / best if best > 0 else None}
+        if extra:
+            entry["extra"] = extra
+        self.results.append(entry)
+        label = f"{group}.{name}" + "".join(f" {k}={v}" for k, v in params.items())
+        print(f"{label:<48} {best * 1e6:14.2f} us" + "".join(f"  {k}={v}" for k, v in (extra or {}).items()))
+
+    def _loops(self, once):
+        return max(1, int(self.min_time / max(once, 1e-7)))
+
+    def run(self, group, name, params, fn, extra=None):
+        start = time.perf_counter()
+        fn()
+        loops = self._loops(time.perf_counter() - start)
+        samples = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            samples.append((time.perf_counter() - start) / loops)
+        self._record(group, name, params, samples, extra)
+
+    async def run_async(self, group, name, params, fn, extra=None):
+        start = time.perf_counter()
+        await fn()
+        loops = self._loops(time.perf_counter() - start)
+        samples = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            for _ in range(loops):
+                await fn()
+            samples.append((time.perf_counter() - start) / loops)
+        self._record(group, name, params, samples, extra)
+
+
+def bench_indicators(runner, quick):
+    bars = synthetic(max(WINDOWS))
+    for n in WINDOWS[:3] if quick else WINDOWS:
+        window = bars[-n:]
+        close, high, low = window["close"], window["high"], window["low"]
+        closes = close.tolist()
+        params = {"bars": n}
+        runner.run("indicators", "calculate_rsi", params, lambda: calculate_rsi(closes, 5))
+        runner.run("indicators", "rsi_sma", params, lambda: rsi_sma(close, 5))
+        runner.run("indicators", "rsi_wilder", params, lambda: rsi_wilder(close, 14))
+        runner.run("indicators", "ema", params, lambda: ema(close, 20))
+        runner.run("indicators", "atr", params, lambda: atr(high, low, close, 14))
+        runner.run("indicators", "bollinger", params, lambda: bollinger(close, 20, 2.0))
+        runner.run("indicators", "stochastic", params, lambda: stochastic(high, low, close, 14, 3))
+        # Önbellek: pencere bir bar kayar, sadece kuyruk yeniden hesaplanır
+        cache = IndicatorCache()
+        name, spec_params = parse_spec("rsi:14:wilder")
+        key = spec_key(name, spec_params)
+        shifted = (bars[-n - 1:-1], window)
+        state = {"i": 0}
+
+        def cached():
+            state["i"] ^= 1
+            cache.get(key, shifted[state["i"]], name, spec_params)
+        runner.run("indicators", "cache_tail", params, cached)
+    # Akış: oluşan barın tick başına güncellemesi (pencereden bağımsız)
+    for spec in ("rsi:5", "rsi:14:wilder", "ema:20", "atr:14", "bb:20", "stoch:14:3"):
+        s = stream(spec)
+        s.feed(bars[-500:])
+        last = bars[-1]
+        t, c, h, lo = int(last["time"]), float(last["close"]), float(last["high"]), float(last["low"])
+        runner.run("indicators", "stream_update", {"spec": spec}, lambda: s.update(t, c, h, lo))
+
+
+def bench_ohlc(runner, quick):
+    for n in OHLC_SIZES[:2] if quick else OHLC_SIZES:
+        columns = ohlc_codec.select(synthetic(n))
+        for fmt in ohlc_codec.FORMATS:
+            if not ohlc_codec.available(fmt):
+                continue
+            body = ohlc_codec.encode(columns, fmt)
+            runner.run("ohlc", "encode", {"bars": n, "format": fmt}, lambda: ohlc_codec.encode(columns, fmt),
+                       {"bytes": len(body)})
+        body = ohlc_codec.encode(columns, "delta")
+        runner.run("ohlc", "gzip", {"bars": n, "format": "delta"}, lambda: gzip.compress(body, compresslevel=1),
+                   {"bytes": len(gzip.compress(body, compresslevel=1))})
+
+
+async def bench_ws(runner, quick):
+    payload = {"rsi": 55.5, "bid": 2000.12, "ask": 2000.32, "time": datetime.utcnow().isoformat()}
+
+    async def produce(symbol):
+        return payload
+
+    for n in WS_CLIENTS:
+        hub = WSHub(produce, interval=3600.0, queue_size=8)
+        subs = [hub.subscribe(SYMBOL) for _ in range(n)]
+        state = {"left": 0, "done": None}
+
+        async def consume(sub):
+            while True:
+                message = await sub.queue.get()
+                if message is None:
+                    return
+                state["left"] -= 1
+                if state["left"] == 0 and state["done"] is not None:
+                    state["done"].set()
+
+        consumers = [asyncio.create_task(consume(sub)) for sub in subs]
+        await asyncio.sleep(0.05)  # ilk (üreticinin) yayını tüketilsin
+
+        async def broadcast():
+            state["left"] = n
+            state["done"] = asyncio.Event()
+            hub.publish(SYMBOL, json.dumps(payload))
+            await state["done"].wait()
+
+        await runner.run_async("ws", "broadcast", {"clients": n}, broadcast)
+        for sub in subs:
+            hub.unsubscribe(sub)
+        for task in consumers:
+            task.cancel()
+        await asyncio.gather(*consumers, return_exceptions=True)
+
+
+async def bench_bot(runner, quick):
+    mt5.initialize()
+    mt5.LATENCY = 0.0
+    for n in BOT_SYMBOLS:
+        gateway, bar_cache, scheduler, strategies = build(n)
+
+        async def cycle():
+            for series in bar_cache.series.values():
+                series.last_refresh = 0.0  # her seri terminalden yenilensin
+            await scheduler_round(scheduler)
+
+        await runner.run_async("bot", "cycle", {"symbols": n}, cycle)
+        gateway.executor.shutdown()
+    for n in CLOSE_SIZES:
+        gateway = MT5Gateway(mt5)
+        closer = BatchCloser(gateway, mt5, concurrency=8)
+
+        # Sadece kapama ölçülür; sepet her turda ölçüm dışında yeniden açılır
+        samples = []
+        for _ in range(runner.repeat * 5):
+            await open_basket(gateway, n)
+            positions = await gateway.positions_get(symbol=SYMBOL)
+            start = time.perf_counter()
+            report = await closer.close(positions)
+            samples.append(time.perf_counter() - start)
+            if report.failed:
+                await BatchCloser(gateway, mt5, max_retries=10).close(await gateway.positions_get(symbol=SYMBOL))
+        runner._record("bot", "close_all", {"positions": n}, samples, None)
+        gateway.executor.shutdown()
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                                    text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {"commit": commit, "dirty": dirty, "time": datetime.utcnow().isoformat(), "python": sys.version.split()[0],
+            "numpy": np.__version__, "platform": platform.platform(), "machine": platform.machine()}
+
+
+def _key(entry):
+    return (entry["group"], entry["name"], json.dumps(entry["params"], sort_keys=True))
+
+
+# Eski sonuca göre oran: >1 yavaşlama, <1 hızlanma
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {_key(e): e for e in json.load(f)["results"]}
+    print(f"\nkarşılaştırma: {baseline_path}")
+    for entry in results:
+        old = baseline.get(_key(entry))
+        if old is None:
+            continue
+        ratio = entry["best_s"] / old["best_s"]
+        mark = "  YAVAŞ" if ratio > 1.1 else "  hızlı" if ratio < 0.9 else ""
+        label = f"{entry['group']}.{entry['name']}" + "".join(f" {k}={v}" for k, v in entry["params"].items())
+        print(f"{label:<48} {old['best_s'] * 1e6:12.2f} -> {entry['best_s'] * 1e6:12.2f} us  x{ratio:5.2f}{mark}")
+
+
+async def main(args):
+    mt5.set_clock(start=CLOCK_START, speed=0)
+    runner = Runner(args.min_time, args.repeat)
+    groups = args.only or GROUPS
+    if "indicators" in groups:
+        bench_indicators(runner, args.quick)
+    if "ohlc" in groups:
+        bench_ohlc(runner, args.quick)
+    if "ws" in groups:
+        await bench_ws(runner, args.quick)
+    if "bot" in groups:
+        await bench_bot(runner, args.quick)
+    report = {"meta": metadata(), "settings": {"min_time": args.min_time, "repeat": args.repeat, "quick": args.quick},
+              "results": runner.results}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"\n[BENCH] {len(runner.results)} ölçüm -> {args.out}")
+    if args.compare:
+        compare(runner.results, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backend sıcak yol benchmark takımı")
+    parser.add_argument("--out", help="JSON sonuç dosyası")
+    parser.add_argument("--compare", help="karşılaştırılacak eski JSON sonucu")
+    parser.add_argument("--only", nargs="+", choices=GROUPS)
+    parser.add_argument("--quick", action="store_true", help="en büyük boyutları atla")
+    parser.add_argument("--min-time", type=float, default=0.2, help="ölçüm başına en az süre, sn")
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,144 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from event_log import log
+
+# Artımlı gerçekleşen kar/zarar defteri
+#
+# Her seferinde son 24 saatin tüm işlemlerini çekip toplamak yerine bir imleç
+# (son görülen deal ticket'ı ve zamanı) tutulur; terminalden sadece son görülen
+# işlemin saniyesinden sonrası istenir. Aynı saniyedeki işlemler ticket ile
+# elenir. Yeni işlemler günlük (UTC tarih) ve oturum (süreç başından beri)
+# toplamlarına eklenir; okumalar O(1)'dir.
+#
+# Manuel ya da broker tarafından yapılan kapamalar da sayılır. Sadece alım /
+# satım işlemleri toplanır (bakiye, kredi vb. hareketler hariç); komisyon,
+# swap ve ücret net kara dahildir.
+
+# MetaTrader5: DEAL_TYPE_BUY = 0, DEAL_TYPE_SELL = 1
+_TRADE_DEAL_TYPES = (0, 1)
+
+
+class PnL:
+    __slots__ = ("profit", "commission", "swap", "fee", "deals")
+
+    def __init__(self):
+        self.profit = 0.0
+        self.commission = 0.0
+        self.swap = 0.0
+        self.fee = 0.0
+        self.deals = 0
+
+    def add(self, deal):
+        self.profit += deal.profit
+        self.commission += deal.commission
+        self.swap += deal.swap
+        self.fee += getattr(deal, "fee", 0.0)
+        self.deals += 1
+
+    @property
+    def net(self):
+        return self.profit + self.commission + self.swap + self.fee
+
+    def as_dict(self):
+        return {
+            "net": round(self.net, 2),
+            "profit": round(self.profit, 2),
+            "commission": round(self.commission, 2),
+            "swap": round(self.swap, 2),
+            "fee": round(self.fee, 2),
+            "deals": self.deals,
+        }
+
+
+class DealJournal:
+    def __init__(self, keep_days: int = 7):
+        self.keep_days = keep_days
+        self.last_ticket = 0
+        self.last_time = None  # son görülen işlemin zamanı (epoch saniye)
+        self.started = datetime.now(timezone.utc)
+        self.daily = {}    # tarih -> {sembol: PnL}
+        self.day_totals = {}  # tarih -> PnL (tüm semboller)
+        self.session = PnL()
+        self.fetches = 0
+        self.fetched = 0  # terminalden dönen toplam işlem (sabit kalmalı)
+
+    # Bir sonraki sorgunun aralığı: ilk seferde günün başından, sonra imleçten
+    def window(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        if self.last_time is None:
+            date_from = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
+        else:
+            date_from = datetime.fromtimestamp(self.last_time, tz=timezone.utc)
+        # Terminal saati ileri olabilir; üst sınır geniş tutulur
+        return date_from, now + timedelta(days=1)
+
+    def ingest(self, deals):
+        self.fetches += 1
+        if not deals:
+            return 0
+        self.fetched += len(deals)
+        added = 0
+        for deal in sorted(deals, key=lambda d: d.ticket):
+            if deal.ticket <= self.last_ticket:
+                continue
+            self.last_ticket = deal.ticket
+            if self.last_time is None or deal.time > self.last_time:
+                self.last_time = deal.time
+            if deal.type not in _TRADE_DEAL_TYPES:
+                continue
+            day = datetime.fromtimestamp(deal.time, tz=timezone.utc).date()
+            by_symbol = self.daily.get(day)
+            if by_symbol is None:
+                by_symbol = self.daily[day] = {}
+                self.day_totals[day] = PnL()
+                self._trim(day)
+            pnl = by_symbol.get(deal.symbol)
+            if pnl is None:
+                pnl = by_symbol[deal.symbol] = PnL()
+            pnl.add(deal)
+            self.day_totals[day].add(deal)
+            if deal.time >= self.started.timestamp():
+                self.session.add(deal)
+            added += 1
+        return added
+
+    def _trim(self, newest):
+        for day in [d for d in self.daily if (newest - d).days >= self.keep_days]:
+            del self.daily[day]
+            del self.day_totals[day]
+
+    # Bugünün gerçekleşen net karı (symbol=None: tüm semboller)
+    def today(self, symbol: str = None):
+        day = datetime.now(timezone.utc).date()
+        if symbol is None:
+            pnl = self.day_totals.get(day)
+        else:
+            pnl = self.daily.get(day, {}).get(symbol)
+        return pnl.net if pnl is not None else 0.0
+
+    async def sync(self, gateway):
+        deals = await gateway.history_deals_get(*self.window())
+        return self.ingest(deals)
+
+    async def run(self, gateway, interval: float = 2.0):
+        while True:
+            try:
+                await self.sync(gateway)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log("JOURNAL", "error", "{error}", error=e)
+            await asyncio.sleep(interval)
+
+    def as_dict(self):
+        day = datetime.now(timezone.utc).date()
+        return {
+            "today": self.day_totals[day].as_dict() if day in self.day_totals else PnL().as_dict(),
+            "today_by_symbol": {s: p.as_dict() for s, p in self.daily.get(day, {}).items()},
+            "session": self.session.as_dict(),
+            "last_ticket": self.last_ticket,
+        }
+
+    def stats(self):
+        return {"fetches": self.fetches, "fetched": self.fetched, "last_ticket": self.last_ticket}
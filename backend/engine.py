@@ -0,0 +1,179 @@
+import asyncio
+import os
+import signal
+import threading
+import time
+from multiprocessing.connection import Listener
+
+from fastapi.encoders import jsonable_encoder
+
+import main
+import worker
+from event_log import log
+from ipc import Server, create_authkey, default_address, default_authkey_path
+from shm_state import StateWriter
+
+# Tek sahipli motor süreci: bot, terminal ve tüm durum burada
+#
+# main.py'yi `uvicorn --workers N` ile çalıştırmak N ayrı botun aynı hesapta
+# işlem açması demekti. Motor tek süreçtir: main'i içe aktarır (terminal,
+# zamanlayıcı, depolar), arka plan görevlerini başlatır ve HTTP sunmaz.
+# Durumsuz API işçileri (api.py) şunlarla konuşur:
+#   - durum: hesap görüntüsü (hesap, pozisyonlar, bot durumu) ve sembol başına
+#     websocket yükü paylaşımlı bellekteki seqlock bölgesine (shm_state)
+#     yazılır; görüntü sürümü değiştikçe ya da `quote_interval`'da bir,
+#   - komutlar: kontrol kanalı (ENGINE_CONTROL; Unix soketi ya da Windows
+#     named pipe) üzerinden ipc istekleri: toggle, logs, cache, metrics ve
+#     diğer uçlar için http yönlendirmesi (worker.handlers ile aynı
+#     işleyiciler).
+#
+# Kanal mesajları pickle'lanır: bağlanabilen ve anahtarı bilen süreç motorda
+# kod çalıştırabilir. Bu yüzden sabit anahtar yoktur: ENGINE_AUTHKEY verilmezse
+# motor her başlangıçta rastgele bir anahtarı ENGINE_AUTHKEY_FILE'a (0600)
+# yazar, API işçileri (aynı kullanıcı) oradan okur. Unix soketi de sadece
+# sahibine açıktır (0600).
+#
+# Ortam:
+#   ENGINE_STATE=mt5bot-state       paylaşımlı bellek adı
+#   ENGINE_STATE_SIZE=1048576       bölge kapasitesi, bayt
+#   ENGINE_CONTROL=...              kontrol adresi (varsayılan: ipc.default_address)
+#   ENGINE_AUTHKEY=                 kontrol kanalı anahtarı (boşsa rastgele üretilir)
+#   ENGINE_AUTHKEY_FILE=...         üretilen anahtarın dosyası (varsayılan: ipc.default_authkey_path)
+#   ENGINE_PUBLISH_INTERVAL=0.1     görüntü sürümü kontrol aralığı, sn
+#   ENGINE_WS_SYMBOLS=XAUUSD        websocket yükü yayınlanan semboller (varsayılan BOT_SYMBOLS)
+#
+# Çalıştırma:
+#   python engine.py
+#   uvicorn api:app --workers 4 --port 8000
+
+STATE_NAME = os.getenv("ENGINE_STATE", "mt5bot-state")
+CONTROL_ADDRESS = os.getenv("ENGINE_CONTROL") or default_address("mt5bot-engine")
+AUTHKEY_FILE = os.getenv("ENGINE_AUTHKEY_FILE") or default_authkey_path("mt5bot-engine")
+WS_SYMBOLS = [s.strip() for s in os.getenv("ENGINE_WS_SYMBOLS", ",".join(main.BOT_SYMBOLS)).split(",") if s.strip()]
+
+
+class Publisher:
+    def __init__(self, writer, snapshot, symbols, interval: float = 0.1, quote_interval: float = 5.0):
+        self.writer = writer
+        self.snapshot = snapshot
+        self.symbols = symbols
+        self.interval = interval
+        self.quote_interval = quote_interval
+        self.quotes = {}
+        self.version = None
+        self.quoted = 0.0
+        self.errors = 0
+
+    async def _refresh_quotes(self):
+        for symbol in self.symbols:
+            try:
+                self.quotes[symbol] = await main.ws_payload(symbol)
+            except Exception as e:
+                self.errors += 1
+                log("ENGINE", "error", "{symbol}: websocket yükü alınamadı: {error}", symbol=symbol, error=e)
+        self.quoted = time.monotonic()
+
+    def publish(self):
+        self.writer.publish_json(jsonable_encoder({
+            "time": time.time(),
+            "pid": os.getpid(),
+            "version": self.snapshot.version,
+            "snapshot": self.snapshot.state,
+            "symbols": main.BOT_SYMBOLS,
+            "quotes": self.quotes,
+            "ws_interval": self.quote_interval,
+        }))
+        self.version = self.snapshot.version
+
+    async def run(self):
+        while True:
+            try:
+                quotes = time.monotonic() - self.quoted >= self.quote_interval
+                if quotes:
+                    await self._refresh_quotes()
+                # Canlılık için en geç quote_interval'da bir yazılır (okuyucular zamana bakar)
+                if quotes or self.snapshot.version != self.version:
+                    self.publish()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                log("ENGINE", "error", "durum yayınlanamadı: {error}", error=e)
+            await asyncio.sleep(self.interval)
+
+
+# Listener.accept bloke eder: kabul döngüsü ayrı thread'de, her bağlantı
+# event loop'ta kendi ipc.Server'ı ile
+def _accept_loop(listener, loop, handlers, servers):
+    while True:
+        try:
+            conn = listener.accept()
+        except (OSError, EOFError):
+            return  # listener kapandı
+        except Exception as e:  # yanlış anahtar vb.
+            log("ENGINE", "warn", "kontrol bağlantısı reddedildi: {error}", error=e)
+            continue
+
+        def start(conn=conn):
+            server = Server(conn, handlers, name="engine-control")
+            server.on_close = lambda: servers.discard(server)
+            servers.add(server.start(loop))
+        loop.call_soon_threadsafe(start)
+
+
+async def run():
+    # Bölge, soket ve anahtar çalışan bir motorunkilerin üzerine yazılmadan önce
+    main.claim_bot()
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    writer = StateWriter(STATE_NAME, int(os.getenv("ENGINE_STATE_SIZE", str(1 << 20))))
+    publisher = Publisher(writer, main.account_snapshot, WS_SYMBOLS,
+                          interval=float(os.getenv("ENGINE_PUBLISH_INTERVAL", "0.1")),
+                          quote_interval=main.ws_hub.interval)
+    handlers = worker.handlers(main, stop)
+
+    async def engine_stats():
+        return {"state": writer.stats(), "control_connections": len(servers), "publisher_errors": publisher.errors}
+    handlers["engine"] = engine_stats
+
+    generated = not os.getenv("ENGINE_AUTHKEY")
+    authkey = create_authkey(AUTHKEY_FILE) if generated else os.getenv("ENGINE_AUTHKEY").encode()
+    unix = not CONTROL_ADDRESS.startswith("\\\\")
+    if unix and os.path.exists(CONTROL_ADDRESS):
+        os.unlink(CONTROL_ADDRESS)  # önceki motordan kalan Unix soketi
+    listener = Listener(CONTROL_ADDRESS, authkey=authkey)
+    if unix:
+        os.chmod(CONTROL_ADDRESS, 0o600)
+    servers = set()
+    threading.Thread(target=_accept_loop, args=(listener, loop, handlers, servers), name="engine-accept",
+                     daemon=True).start()
+    log("ENGINE", "info", "motor hazır: durum {state}, kontrol {address}", state=STATE_NAME, address=CONTROL_ADDRESS)
+
+    try:
+        loop.add_signal_handler(signal.SIGTERM, stop.set)  # bölge ve soket temizlensin
+    except (NotImplementedError, AttributeError):
+        pass  # Windows: Ctrl+C (KeyboardInterrupt) ile kapanır
+    task = None
+    try:
+        await main.startup_event()
+        task = asyncio.create_task(publisher.run())
+        await stop.wait()
+    finally:
+        if task is not None:
+            task.cancel()
+        listener.close()
+        for server in list(servers):
+            server.close()
+        writer.close()
+        if generated:
+            try:
+                os.unlink(AUTHKEY_FILE)
+            except FileNotFoundError:
+                pass
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
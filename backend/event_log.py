@@ -0,0 +1,236 @@
+import atexit
+import itertools
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Kuyruk tabanlı yapılandırılmış günlük
+#
+# Sıcak yollar eskiden her çağrıda stdout'a print ediyordu; yük altında
+# senkron yazma event loop'u bloke eder. Burada log() sadece:
+#   - kategori seviyesine bakar (altındaki olay hiç oluşturulmaz),
+#   - kategori hız sınırını uygular (token kovası; bastırılanlar sayılır ve
+#     bir sonraki geçen olaya "suppressed" alanı olarak eklenir),
+#   - olayı ham hâliyle (şablon + alanlar) halka tampona ve yazma kuyruğuna koyar.
+# Metin biçimlendirme ve stdout / dosya yazma arka plan thread'inde yapılır;
+# kuyruk doluysa olay yazılmaz (halka tamponda yine durur) ve sayılır.
+# /logs halka tampondaki son olayları süzerek döner.
+#
+# Ortam:
+#   LOG_LEVEL=info               varsayılan seviye (debug, info, warn, error)
+#   LOG_LEVELS=RSI=debug,WS=warn kategori başına seviye
+#   LOG_RATE=WS=5,RSI=5          kategori başına saniyede olay (varsayılan; 0: sınırsız)
+#   LOG_BUFFER=5000              halka tampon boyu
+#   LOG_FILE=bot.log             ayrıca dosyaya yaz
+#   LOG_STDOUT=1                 stdout'a yaz
+
+LEVELS = {"debug": 10, "info": 20, "warn": 30, "error": 40}
+_NAMES = {v: k for k, v in LEVELS.items()}
+_PLAIN = (str, int, float, bool, type(None))
+
+
+def _plain(value):
+    if isinstance(value, _PLAIN):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    return str(value)
+
+
+class Event:
+    __slots__ = ("seq", "time", "level", "category", "message", "fields")
+
+    def __init__(self, seq, level, category, message, fields):
+        self.seq = seq
+        self.time = time.time()
+        self.level = level
+        self.category = category
+        self.message = message
+        self.fields = fields
+
+    def text(self):
+        if not self.fields:
+            return self.message
+        try:
+            return self.message.format(**self.fields)
+        except (KeyError, IndexError, ValueError):
+            return self.message
+
+    def line(self):
+        stamp = datetime.fromtimestamp(self.time).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        line = f"{stamp} {_NAMES[self.level].upper():<5} [{self.category}] {self.text()}"
+        suppressed = self.fields.get("suppressed") if self.fields else None
+        if suppressed:
+            line += f" (+{suppressed} bastırıldı)"
+        return line
+
+    def as_dict(self):
+        return {"seq": self.seq, "time": self.time, "level": _NAMES[self.level], "category": self.category,
+                "message": self.text(), "fields": _plain(self.fields) if self.fields else {}}
+
+
+class _Bucket:
+    __slots__ = ("rate", "tokens", "last", "suppressed")
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = max(rate, 1.0)
+        self.last = time.monotonic()
+        self.suppressed = 0
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(max(self.rate, 1.0), self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens < 1.0:
+            self.suppressed += 1
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+def _pairs(spec):
+    result = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        key, value = item.split("=", 1)
+        result[key.strip()] = value.strip()
+    return result
+
+
+class EventLog:
+    def __init__(self, capacity: int = 5000, level: str = "info", levels=None, rates=None, path: str = None,
+                 stdout: bool = True, queue_size: int = 10000):
+        self.ring = deque(maxlen=capacity)
+        self.level = LEVELS[level]
+        self.levels = {c: LEVELS[v] for c, v in (levels or {}).items()}
+        self.buckets = {c: _Bucket(float(r)) for c, r in (rates or {}).items() if float(r) > 0}
+        self.path = path
+        self.stdout = stdout
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.seq = itertools.count(1)
+        self.thread = None
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.filtered = 0
+        self.dropped = 0
+        self.written = 0
+
+    def enabled(self, category: str, level: str):
+        return LEVELS[level] >= self.levels.get(category, self.level)
+
+    def log(self, category: str, level: str, message: str, **fields):
+        value = LEVELS[level]
+        if value < self.levels.get(category, self.level):
+            self.filtered += 1
+            return
+        bucket = self.buckets.get(category)
+        if bucket is not None and value < LEVELS["error"]:  # hatalar sınırlanmaz
+            if not bucket.take():
+                return
+            if bucket.suppressed:
+                fields["suppressed"] = bucket.suppressed
+                bucket.suppressed = 0
+        event = Event(next(self.seq), value, category, message, fields)
+        self.ring.append(event)
+        self.counts[category] = self.counts.get(category, 0) + 1
+        if self.thread is None:
+            self._start()
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._writer, name="event-log", daemon=True)
+                self.thread.start()
+
+    def _writer(self):
+        f = open(self.path, "a", encoding="utf-8") if self.path else None
+        try:
+            while True:
+                batch = [self.queue.get()]
+                while len(batch) < 512:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in batch
+                text = "".join(e.line() + "\n" for e in batch if e is not None)
+                if text:
+                    if self.stdout:
+                        sys.stdout.write(text)
+                        sys.stdout.flush()
+                    if f is not None:
+                        f.write(text)
+                        f.flush()
+                    self.written += len(batch) - stop
+                if stop:
+                    return
+        finally:
+            if f is not None:
+                f.close()
+
+    # Bekleyen olayları yazıp thread'i durdur
+    def close(self, timeout: float = 2.0):
+        thread = self.thread
+        if thread is None:
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+    def query(self, level: str = None, categories=None, since: int = None, contains: str = None, limit: int = 200):
+        minimum = LEVELS[level] if level else 0
+        needle = contains.lower() if contains else None
+        ring = list(self.ring)  # başka thread eklerken güvenli kopya
+        if since is None:
+            candidates = reversed(ring)  # ilk yükleme: en yeni `limit` olay
+        else:
+            # Takip: since'ten sonraki en eski `limit` olay; imleç görülmemiş olayların üstünden atlamaz
+            candidates = (e for e in ring if e.seq > since)
+        result = []
+        for event in candidates:
+            if event.level < minimum or (categories and event.category not in categories):
+                continue
+            if needle is not None and needle not in event.text().lower():
+                continue
+            result.append(event)
+            if len(result) >= limit:
+                break
+        if since is None:
+            result.reverse()
+        return [e.as_dict() for e in result]
+
+    def stats(self):
+        return {
+            "buffered": len(self.ring),
+            "capacity": self.ring.maxlen,
+            "counts": dict(self.counts),
+            "filtered": self.filtered,
+            "suppressed": {c: b.suppressed for c, b in self.buckets.items() if b.suppressed},
+            "queued": self.queue.qsize(),
+            "dropped": self.dropped,
+            "written": self.written,
+        }
+
+
+events = EventLog(
+    capacity=int(os.getenv("LOG_BUFFER", "5000")),
+    level=os.getenv("LOG_LEVEL", "info"),
+    levels=_pairs(os.getenv("LOG_LEVELS")),
+    rates=_pairs(os.getenv("LOG_RATE", "WS=5,RSI=5")),
+    path=os.getenv("LOG_FILE") or None,
+    stdout=os.getenv("LOG_STDOUT", "1") == "1",
+)
+log = events.log
+atexit.register(events.close)
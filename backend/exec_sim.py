@@ -0,0 +1,498 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+import fake_mt5 as mt5  # sadece sabitler (retcode / filling değerleri MT5 ile aynı)
+from backtest import DEFAULT_PARAMS, simulate
+from batch_close import retry_retcodes
+from indicators import rsi_forming
+from tick_store import TickStore
+
+# Tik tekrarlı emir gerçekleşme simülatörü
+#
+# Bar backtest'i emirleri karar barının kapanışından sabit spread ile
+# doldurur; canlı botta ise karar anı yoklama aralığına bağlıdır, emir
+# brokere gecikmeyle ulaşır, fiyat deviation'dan fazla kaydıysa requote
+# gelir ve sepet bacakları birbiri ardına kapanır. Burada kayıtlı bid/ask
+# akışı (TickStore klasörü, TICK_DTYPE .npy ya da sentetik) üzerinde:
+#   - strateji kararları yoklama ızgarasında alınır (her `poll` sn'de son tik;
+#     0: her tik); RSI'lar o tikte oluşan M1 / üst timeframe barı dahil
+#     hesaplanır ve backtest.simulate aynı kurallarla (kapama sonrası
+#     bekleme dahil) çalışır,
+#   - her emir: karar + tik okuma -> gönderim, + tek yön gecikme (sabit +
+#     üstel jitter) -> sunucuya varış; varıştaki son tikin ask/bid'i
+#     istenen fiyattan deviation * point'ten fazla uzaksa requote (instant
+#     execution; "market" execution'da deviation yok sayılır), yanıt bir
+#     gecikme sonra döner, kapamalar taze fiyatla max_retries kez tekrar
+#     dener (BatchCloser), açılışlar tekrar denemez (RSIMartingale),
+#   - likidite (tik başına lot) sınırlıysa FOK reddedilir, IOC kısmi dolar,
+#     RETURN kalanı sonraki tiklerin fiyatından doldurur,
+#   - sepet kapama: "sequential" her bacak için tik okuyup bir öncekinin
+#     yanıtını bekler (eski döngü); "batch" tek anlık fiyatla hazırlanır ve
+#     `close_concurrency` bacak aynı anda yoldadır (gateway tek MT5
+#     thread'inde olduğundan gerçekte 1).
+#
+# Tik başına işler (bar üretimi, RSI, örnekleme, fiyat arama) vektöreldir
+# (searchsorted + önek toplamları); Python döngüsü sadece sinyal bölgesindeki
+# örneklerde (simulate) ve sepet derinliği kadar bacak turunda döner.
+# On milyonlarca tik tek çalıştırmada işlenir.
+#
+# Rapor (yoklama aralığı x kapama biçimi): kararların tik anı bid'iyle
+# ("mid") ve ask/bid'iyle ("quote") P&L'i, gerçekleşen P&L ("exec"),
+# spread ve gerçekleşme maliyeti, requote / başarısız / kısmi emirler,
+# kayma (point) ve sepet kapama süresi. Gerçekleşme maliyeti aynı dolan hacim
+# üzerinden ölçülür (quote_filled - exec); dolmayan açılışların karar anı
+# P&L'i ayrıca "missed" olarak verilir.
+#
+# Sınır: simulate emirlerin sonucunu bilmez; dolmayan bir açılıştan sonra da
+# martingale merdivenini (yön, lot katlama, sepet kapama) dolmuş gibi sürdürür.
+# Dolmayan açılış sayısı yüksekse sonraki kararlar canlı bottan ayrışır.
+#
+# Çalıştırma:
+#   python exec_sim.py ticks/ --symbol XAUUSD --json sonuc.json
+#   python exec_sim.py ticks.npy --polls 5 1 0.25 --latency 40 --jitter 20
+#   python exec_sim.py --synthetic 20000000 --polls 5 0.25
+
+POLLS = (5.0, 2.0, 1.0, 0.25)
+CLOSE_MODES = ("sequential", "batch")
+FILLINGS = {"fok": mt5.ORDER_FILLING_FOK, "ioc": mt5.ORDER_FILLING_IOC, "return": mt5.ORDER_FILLING_RETURN}
+EXECUTIONS = ("instant", "market")
+BAR_DTYPE = np.dtype([("time", "<i8"), ("close", "<f8")])
+
+
+class ExecutionModel:
+    __slots__ = ("latency_ms", "jitter_ms", "tick_ms", "deviation", "point", "filling", "liquidity", "max_retries",
+                 "execution", "close_concurrency")
+
+    def __init__(self, latency_ms: float = 40.0, jitter_ms: float = 10.0, tick_ms: float = 1.0, deviation: int = 10,
+                 point: float = 0.01, filling: int = mt5.ORDER_FILLING_IOC, liquidity: float = float("inf"),
+                 max_retries: int = 3, execution: str = "instant", close_concurrency: int = 1):
+        self.latency_ms = latency_ms        # tek yön, terminal -> işlem sunucusu
+        self.jitter_ms = jitter_ms          # üstel ek gecikme ortalaması
+        self.tick_ms = tick_ms              # symbol_info_tick okuma süresi
+        self.deviation = deviation          # point
+        self.point = point
+        self.filling = filling
+        self.liquidity = liquidity          # tik başına doldurulabilir lot
+        self.max_retries = max_retries      # kapamalarda requote sonrası deneme
+        self.execution = execution
+        self.close_concurrency = close_concurrency
+
+    def delays(self, n, rng):
+        delay = np.full(n, self.latency_ms)
+        if self.jitter_ms > 0:
+            delay += rng.exponential(self.jitter_ms, n)
+        return delay
+
+    def as_dict(self):
+        out = {name: getattr(self, name) for name in self.__slots__}
+        if not np.isfinite(self.liquidity):
+            out["liquidity"] = None  # JSON'da sınırsız
+        return out
+
+
+# Sütunlar: time_msc (int64, artan), bid, ask (float64, bitişik)
+def columns(ticks):
+    return {
+        "time_msc": np.ascontiguousarray(ticks["time_msc"], dtype=np.int64),
+        "bid": np.ascontiguousarray(ticks["bid"], dtype=np.float64),
+        "ask": np.ascontiguousarray(ticks["ask"], dtype=np.float64),
+    }
+
+
+# TickStore klasörü (sembol + aralık) ya da TICK_DTYPE .npy
+def load_ticks(path: str, symbol: str = None, start: float = None, end: float = None):
+    if path.endswith(".npy"):
+        ticks = np.load(path, mmap_mode="r")
+        if start is not None or end is not None:
+            t = ticks["time_msc"]
+            lo = np.searchsorted(t, int(start * 1000)) if start is not None else 0
+            hi = np.searchsorted(t, int(end * 1000), "right") if end is not None else len(t)
+            ticks = ticks[lo:hi]
+        return columns(ticks)
+    lo = int(start * 1000) if start is not None else 0
+    hi = int(end * 1000) if end is not None else np.iinfo(np.int64).max
+    ticks, _ = TickStore(path).range(symbol, lo, hi)
+    return columns(ticks)
+
+
+# Rastgele yürüyüş bid, üstel tik aralığı, değişken spread (tekrarlanabilir)
+def synthetic_ticks(count: int, start: int = 1_700_000_000, seed: int = 1, interval_ms: float = 250.0,
+                    price: float = 2000.0, volatility: float = 0.05, spread: float = 0.20, point: float = 0.01):
+    rng = np.random.default_rng(seed)
+    gaps = rng.exponential(interval_ms, count)
+    time_msc = start * 1000 + np.cumsum(gaps).astype(np.int64)
+    del gaps
+    steps = rng.standard_normal(count)
+    steps *= volatility * np.sqrt(interval_ms / 1000.0)
+    bid = np.cumsum(steps)
+    del steps
+    bid += price
+    np.round(bid / point, out=bid)
+    bid *= point
+    widen = rng.integers(0, 3, count) * (spread / 4)
+    ask = bid + spread + widen
+    return {"time_msc": time_msc, "bid": bid, "ask": ask}
+
+
+# Tiklerden kapanmış bar kapanışları (bar zamanı, son tikin bid'i)
+def tick_bars(ticks, seconds: int):
+    sec = ticks["time_msc"] // 1000
+    bar_time = sec - sec % seconds
+    last = np.r_[np.flatnonzero(np.diff(bar_time)), len(bar_time) - 1]
+    bars = np.empty(len(last), dtype=BAR_DTYPE)
+    bars["time"] = bar_time[last]
+    bars["close"] = ticks["bid"][last]
+    return bars
+
+
+# Yoklama ızgarasında karar örnekleri; simulate'in beklediği diziler
+def sample(ticks, bars, poll: float, period: int, htf_seconds: int):
+    t = ticks["time_msc"]
+    if poll <= 0:
+        idx = np.arange(len(t))
+        decision = t
+    else:
+        step = int(round(poll * 1000))
+        decision = np.arange(t[0] + step, t[-1] + 1, step, dtype=np.int64)
+        idx = np.searchsorted(t, decision, "right") - 1
+    view = np.empty(len(idx), dtype=BAR_DTYPE)
+    view["time"] = t[idx] // 1000
+    view["close"] = ticks["bid"][idx]
+    return {
+        "time": decision,
+        "close": view["close"],
+        "day": decision // 86_400_000,
+        "rsi_1m": rsi_forming(view, bars[60], period, 60),
+        "rsi_htf": rsi_forming(view, bars[htf_seconds], period, htf_seconds),
+    }
+
+
+# Bir zamandaki son tik ve yönüne göre fiyat (alış ask, satış bid)
+def _quote(ticks, msc, side):
+    j = np.searchsorted(ticks["time_msc"], msc, "right") - 1
+    np.maximum(j, 0, out=j)
+    return np.where(side > 0, ticks["ask"][j], ticks["bid"][j]), j
+
+
+def _prefix(ticks, name):
+    key = "_sum_" + name
+    if key not in ticks:
+        ticks[key] = np.r_[0.0, np.cumsum(ticks[name])]
+    return ticks[key]
+
+
+# RETURN: kalan hacim sonraki tiklerden, tik başına `liquidity` lot
+def _walk(ticks, j, side, volume, liquidity):
+    last = len(ticks["time_msc"]) - 1
+    steps = np.ceil(volume / liquidity).astype(np.int64)
+    end = np.minimum(j + steps - 1, last)
+    taken = end - j  # son tikten önceki tam dolumlar
+    rest = volume - taken * liquidity
+    price = np.empty(len(j))
+    for s, name in ((1, "ask"), (-1, "bid")):
+        m = side == s
+        if m.any():
+            prefix = _prefix(ticks, name)
+            full = prefix[end[m]] - prefix[j[m]]
+            price[m] = (full * liquidity + rest[m] * ticks[name][end[m]]) / volume[m]
+    return price, ticks["time_msc"][end]
+
+
+# Vektörel emir gerçekleşmesi. `requested` NaN ise gönderim anındaki fiyat
+# istenir. Requote alanlar taze fiyatla en çok `retries` kez yeniden gönderilir.
+def execute(ticks, send_msc, side, volume, model, rng, requested=None, retries: int = 0):
+    n = len(send_msc)
+    send = np.asarray(send_msc, dtype=np.float64).copy()
+    side = np.asarray(side)
+    volume = np.asarray(volume, dtype=np.float64)
+    if requested is None:
+        requested = np.full(n, np.nan)
+    requested = np.asarray(requested, dtype=np.float64).copy()
+    stale = np.isnan(requested)
+    if stale.any():
+        requested[stale] = _quote(ticks, send[stale], side[stale])[0]
+    out = {
+        "first_price": requested.copy(),
+        "price": np.full(n, np.nan),
+        "filled": np.zeros(n),
+        "fill_msc": np.full(n, -1.0),
+        "done_msc": send.copy(),
+        "retcode": np.zeros(n, dtype=np.int32),
+        "attempts": np.zeros(n, dtype=np.int16),
+    }
+    limit = model.deviation * model.point + 1e-9
+    pending = np.flatnonzero(volume > 0)
+    for attempt in range(1, retries + 2):
+        if not pending.size:
+            break
+        s = side[pending]
+        arrive = send[pending] + model.delays(len(pending), rng)
+        quote, j = _quote(ticks, arrive, s)
+        back = arrive + model.delays(len(pending), rng)
+        out["attempts"][pending] = attempt
+        out["done_msc"][pending] = back
+        if model.execution == "instant":
+            off = np.abs(quote - requested[pending]) > limit
+        else:
+            off = np.zeros(len(pending), dtype=bool)
+        out["retcode"][pending[off]] = mt5.TRADE_RETCODE_REQUOTE
+
+        ok = ~off
+        rows, vol, price, at = pending[ok], volume[pending[ok]], quote[ok], arrive[ok]
+        filled = vol.copy()
+        retcode = np.full(len(rows), mt5.TRADE_RETCODE_DONE, dtype=np.int32)
+        if np.isfinite(model.liquidity):
+            deep = vol > model.liquidity + 1e-9
+            if model.filling == mt5.ORDER_FILLING_FOK:
+                filled[deep] = 0.0
+                retcode[deep] = mt5.TRADE_RETCODE_REJECT
+            elif model.filling == mt5.ORDER_FILLING_IOC:
+                filled[deep] = model.liquidity
+                retcode[deep] = mt5.TRADE_RETCODE_DONE_PARTIAL
+            elif deep.any():
+                price[deep], walked = _walk(ticks, j[ok][deep], s[ok][deep], vol[deep], model.liquidity)
+                at[deep] = np.maximum(at[deep], walked)
+                out["done_msc"][rows[deep]] = np.maximum(out["done_msc"][rows[deep]], at[deep])
+        done = filled > 0
+        out["price"][rows[done]] = price[done]
+        out["filled"][rows] = filled
+        out["fill_msc"][rows[done]] = at[done]
+        out["retcode"][rows] = retcode
+
+        # Requote: yanıt dönünce tik okunur, taze fiyatla yeniden gönderilir
+        pending = pending[off]
+        if attempt <= retries and pending.size:
+            send[pending] = back[off] + model.tick_ms
+            requested[pending] = _quote(ticks, send[pending], side[pending])[0]
+    return out
+
+
+# Kapanan pozisyonlar (simulate trades) -> sepet / bacak dizileri
+def book(result):
+    trades = result["trades"]
+    n = len(trades)
+    if not n:
+        empty = np.zeros(0)
+        return {"open_msc": empty.astype(np.int64), "close_msc": empty.astype(np.int64), "side": empty.astype(np.int8),
+                "lot": empty, "leg": empty.astype(np.int64), "baskets": 0}
+    arr = np.array([t[:4] for t in trades], dtype=np.float64)
+    sizes = [trades[0][7]]
+    i = sizes[0]
+    while i < n:
+        sizes.append(trades[i][7])
+        i += trades[i][7]
+    starts = np.repeat(np.cumsum([0] + sizes[:-1]), sizes)
+    return {
+        "open_msc": arr[:, 0].astype(np.int64),
+        "close_msc": arr[:, 1].astype(np.int64),
+        "side": arr[:, 2].astype(np.int8),
+        "lot": arr[:, 3],
+        "leg": np.arange(n) - starts,
+        "baskets": len(sizes),
+    }
+
+
+# Sepet kapamaları bacak sırasıyla; her turda tüm sepetlerin k. bacağı vektörel
+def close_baskets(ticks, positions, volume, model, mode: str, rng):
+    n = len(volume)
+    side = -positions["side"].astype(np.int64)
+    decision = positions["close_msc"].astype(np.float64)
+    leg = positions["leg"]
+    width = 1 if mode == "sequential" else max(1, model.close_concurrency)
+    snapshot = None
+    if mode == "batch":  # sembol başına tek tik okuması, tüm bacaklar bu fiyatla hazırlanır
+        snapshot = _quote(ticks, decision + model.tick_ms, side)[0]
+    out = {key: None for key in ("first_price", "price", "filled", "fill_msc", "done_msc", "retcode", "attempts")}
+    merged = {}
+    for k in range(int(leg.max()) + 1 if n else 0):
+        rows = np.flatnonzero(leg == k)
+        if k < width:
+            start = decision[rows] + (model.tick_ms if mode == "batch" else 0.0)
+        else:
+            start = merged["done_msc"][rows - width]
+        if mode == "sequential":
+            send, requested = start + model.tick_ms, None
+        else:
+            send, requested = start, snapshot[rows]
+        res = execute(ticks, send, side[rows], volume[rows], model, rng, requested, model.max_retries)
+        if not merged:
+            merged = {key: np.empty(n, dtype=value.dtype) for key, value in res.items()}
+        for key, value in res.items():
+            merged[key][rows] = value
+        # Açılışı dolmamış bacak yer tutmaz: sıradaki bacak hemen başlar
+        idle = volume[rows] <= 0
+        merged["done_msc"][rows[idle]] = start[idle]
+    return merged or out
+
+
+def _pnl(side, entry, exit_, lot, contract):
+    return float(np.sum(side * (exit_ - entry) * lot) * contract)
+
+
+# Tek senaryo raporu: karar anı fiyatları vs gerçekleşen dolumlar
+def report(ticks, positions, opens, closes, params, model, poll, mode):
+    contract = params["contract_size"]
+    side = positions["side"].astype(np.int64)
+    lot = positions["lot"]
+    open_dec = positions["open_msc"]
+    close_dec = positions["close_msc"]
+    mid_open = _quote(ticks, open_dec, np.full(len(side), -1))[0]
+    mid_close = _quote(ticks, close_dec, np.full(len(side), -1))[0]
+    quote_open = _quote(ticks, open_dec, side)[0]
+    quote_close = _quote(ticks, close_dec, -side)[0]
+
+    held = opens["filled"]
+    closed = closes["filled"] if len(side) else held
+    entry = np.where(held > 0, opens["price"], 0.0)
+    # Kapanamayan hacim son yanıt anındaki fiyattan değerlenir (açık kalır)
+    left = held - closed
+    mark = _quote(ticks, closes["done_msc"], -side)[0] if len(side) else entry
+    exit_price = np.where(closed > 0, closes["price"], 0.0)
+    pnl_exec = _pnl(side, entry, exit_price, closed, contract) + _pnl(side, entry, mark, left, contract)
+
+    pnl_mid = _pnl(side, mid_open, mid_close, lot, contract)
+    pnl_quote = _pnl(side, quote_open, quote_close, lot, contract)
+    # Aynı dolan hacim üzerinden karar anı fiyatları; kalan kısım kaçırılan açılışlar
+    pnl_quote_filled = _pnl(side, quote_open, quote_close, held, contract)
+    pnl_missed = _pnl(side, quote_open, quote_close, lot - held, contract)
+    # Kayma: karar anındaki fiyata göre aleyhte point (pozitif = kötü)
+    slip_open = (side * (opens["price"] - quote_open))[held > 0] / model.point
+    slip_close = (-side * (closes["price"] - quote_close))[closed > 0] / model.point if len(side) else np.zeros(0)
+    basket_ms = np.zeros(0)
+    if len(side):
+        last = np.r_[np.flatnonzero(np.diff(positions["leg"]) <= 0), len(side) - 1]
+        first = np.r_[0, last[:-1] + 1]
+        basket_ms = np.maximum.reduceat(closes["done_msc"], first) - close_dec[first]
+    requote = mt5.TRADE_RETCODE_REQUOTE
+    retry = retry_retcodes(mt5)
+
+    def pct(values, q):
+        return round(float(np.percentile(values, q)), 2) + 0.0 if len(values) else None
+
+    return {
+        "poll": poll,
+        "close_mode": mode,
+        "baskets": positions["baskets"],
+        "positions": int(len(side)),
+        "lots": round(float(lot.sum()), 2),
+        "pnl_mid": round(pnl_mid, 2),
+        "pnl_quote": round(pnl_quote, 2),
+        "pnl_exec": round(pnl_exec, 2),
+        "pnl_quote_filled": round(pnl_quote_filled, 2),
+        "pnl_missed": round(pnl_missed, 2),
+        "spread_cost": round(pnl_mid - pnl_quote, 2),
+        "exec_cost": round(pnl_quote_filled - pnl_exec, 2),
+        "missed_lots": round(float((lot - held).sum()), 2),
+        "open_failed": int(np.sum(held <= 0)),
+        "open_requotes": int(np.sum(opens["retcode"] == requote)),
+        "close_failed": int(np.sum((held > 0) & (closed < held - 1e-9))) if len(side) else 0,
+        "close_retries": int(np.sum(np.maximum(closes["attempts"].astype(np.int64) - 1, 0))) if len(side) else 0,
+        "close_requote_failed": int(np.sum(np.isin(closes["retcode"], retry))) if len(side) else 0,
+        "partial": int(np.sum(opens["retcode"] == mt5.TRADE_RETCODE_DONE_PARTIAL)
+                       + (np.sum(closes["retcode"] == mt5.TRADE_RETCODE_DONE_PARTIAL) if len(side) else 0)),
+        "slip_open_p50": pct(slip_open, 50),
+        "slip_open_p99": pct(slip_open, 99),
+        "slip_close_p50": pct(slip_close, 50),
+        "slip_close_p99": pct(slip_close, 99),
+        "basket_close_ms_p50": pct(basket_ms, 50),
+        "basket_close_ms_max": pct(basket_ms, 100),
+    }
+
+
+def run(ticks, params=None, model=None, polls=POLLS, close_modes=CLOSE_MODES, cooldown: float = 10.0,
+        seed: int = 1):
+    p = dict(DEFAULT_PARAMS, **(params or {}))
+    p["cooldown"] = cooldown * 1000  # karar zamanı ms
+    model = model or ExecutionModel()
+    bars = {s: tick_bars(ticks, s) for s in {60, p["htf_seconds"]}}
+    reports = []
+    for poll in polls:
+        start = time.perf_counter()
+        data = sample(ticks, bars, poll, p["period"], p["htf_seconds"])
+        result = simulate(data, p)
+        del data
+        positions = book(result)
+        # Açılışlar tek sefer; kapama biçimleri aynı dolumlar üzerinden karşılaştırılır
+        rng = np.random.default_rng([seed, int(poll * 1000)])
+        opens = execute(ticks, positions["open_msc"] + model.tick_ms, positions["side"], positions["lot"], model, rng)
+        for mode in close_modes:
+            rng = np.random.default_rng([seed, int(poll * 1000), CLOSE_MODES.index(mode)])
+            closes = close_baskets(ticks, positions, opens["filled"], model, mode, rng)
+            entry = report(ticks, positions, opens, closes, p, model, poll, mode)
+            entry["open_at_end"] = len(result["open_positions"])
+            entry["seconds"] = round(time.perf_counter() - start, 3)
+            reports.append(entry)
+    return reports
+
+
+def print_reports(reports, ticks, elapsed):
+    n = len(ticks["time_msc"])
+    span = (ticks["time_msc"][-1] - ticks["time_msc"][0]) / 86_400_000 if n else 0.0
+    print(f"[EXECSIM] {n} tik, {span:.1f} gün, {elapsed:.2f} sn ({n / max(elapsed, 1e-9) / 1e6:.1f} M tik/sn)")
+    head = (f"{'poll':>6} {'kapama':>10} {'sepet':>6} {'poz':>6} {'mid':>10} {'quote':>10} {'exec':>10} "
+            f"{'spread$':>9} {'exec$':>9} {'kaçan$':>9} {'requote':>7} {'başarısız':>9} {'kayma50':>7} "
+            f"{'sepet ms':>9}")
+    print(head)
+    for r in reports:
+        failed = r["open_failed"] + r["close_failed"]
+        print(f"{r['poll']:>6} {r['close_mode']:>10} {r['baskets']:>6} {r['positions']:>6} {r['pnl_mid']:>10} "
+              f"{r['pnl_quote']:>10} {r['pnl_exec']:>10} {r['spread_cost']:>9} {r['exec_cost']:>9} "
+              f"{r['pnl_missed']:>9} {r['open_requotes'] + r['close_retries']:>7} {failed:>9} "
+              f"{r['slip_close_p50']!s:>7} {r['basket_close_ms_p50']!s:>9}")
+    if any(r["open_failed"] for r in reports):
+        print("not: exec$ sadece dolan hacim üzerinden; kaçan$ dolmayan açılışların karar anı P&L'i. "
+              "simulate dolmayan açılışlardan sonra da martingale merdivenini dolmuş gibi sürdürür.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kayıtlı bid/ask üzerinde emir gerçekleşme simülasyonu")
+    parser.add_argument("ticks", nargs="?", help="TickStore klasörü ya da TICK_DTYPE .npy")
+    parser.add_argument("--symbol", default="XAUUSD")
+    parser.add_argument("--start", type=float, help="unix sn")
+    parser.add_argument("--end", type=float, help="unix sn")
+    parser.add_argument("--synthetic", type=int, help="kayıt yerine bu kadar sentetik tik")
+    parser.add_argument("--params", default="{}", help='backtest parametreleri, JSON')
+    parser.add_argument("--polls", nargs="+", type=float, default=list(POLLS), help="karar aralığı, sn (0: her tik)")
+    parser.add_argument("--close-modes", nargs="+", choices=CLOSE_MODES, default=list(CLOSE_MODES))
+    parser.add_argument("--cooldown", type=float, default=10.0, help="sepet kapandıktan sonra bekleme, sn")
+    parser.add_argument("--latency", type=float, default=40.0, help="tek yön gecikme, ms")
+    parser.add_argument("--jitter", type=float, default=10.0, help="üstel ek gecikme ortalaması, ms")
+    parser.add_argument("--tick-ms", type=float, default=1.0, help="tik okuma süresi, ms")
+    parser.add_argument("--deviation", type=int, default=10, help="point (test.py / test2.py: 100)")
+    parser.add_argument("--point", type=float, default=0.01)
+    parser.add_argument("--filling", choices=FILLINGS, default="ioc")
+    parser.add_argument("--liquidity", type=float, default=float("inf"), help="tik başına lot")
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--execution", choices=EXECUTIONS, default="instant")
+    parser.add_argument("--close-concurrency", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="raporu bu dosyaya yaz")
+    args = parser.parse_args()
+    if args.ticks is None and args.synthetic is None:
+        parser.error("tik kaynağı gerekli (yol ya da --synthetic)")
+
+    start = time.perf_counter()
+    if args.synthetic:
+        ticks = synthetic_ticks(args.synthetic, seed=args.seed, point=args.point)
+    else:
+        ticks = load_ticks(args.ticks, args.symbol, args.start, args.end)
+    if len(ticks["time_msc"]) < 2:
+        parser.error("yeterli tik yok")
+    model = ExecutionModel(args.latency, args.jitter, args.tick_ms, args.deviation, args.point, FILLINGS[args.filling],
+                           args.liquidity, args.max_retries, args.execution, args.close_concurrency)
+    params = json.loads(args.params)
+    reports = run(ticks, params, model, args.polls, args.close_modes, args.cooldown, args.seed)
+    elapsed = time.perf_counter() - start
+    print_reports(reports, ticks, elapsed)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"ticks": len(ticks["time_msc"]), "seconds": round(elapsed, 3), "model": model.as_dict(),
+                       "params": dict(DEFAULT_PARAMS, **params), "cooldown": args.cooldown, "reports": reports},
+                      f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
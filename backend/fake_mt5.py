@@ -0,0 +1,600 @@
+import os
+import threading
+import time
+import zlib
+from collections import namedtuple
+import numpy as np
+
+# Linux'ta test için sahte MetaTrader5 modülü
+#
+# Gerçek paketle aynı isimleri sunar; fiyatlar sembol başına sabit tohumlu bir
+# rastgele yürüyüşten (saniyelik) üretilir. main.py'de MT5_FAKE=1 ile seçilir:
+#   MT5_FAKE=1 uvicorn main:app
+#
+# Saat: modül kendi simülasyon saatini kullanır (_now). FAKE_MT5_START (epoch
+# saniye) başlangıç anını, FAKE_MT5_SPEED hızı belirler (1: gerçek zaman,
+# 60: dakikada bir saat, 0: donmuş; advance() ile elle ilerletilir). Aynı
+# START ve SEED ile aynı simülasyon anı hep aynı fiyatı verir.
+#
+# Tekrar oynatma: replay() kayıtlı tik/saniye fiyatlarını, replay_bars() M1
+# barlarını (open -> high/low -> close yolu) piyasa olarak yükler; veri bitince
+# fiyat son değerde kalır. FAKE_MT5_REPLAY="XAUUSD=bars.npy,EURUSD=ticks.npy"
+# ile açılışta yüklenir (.npy: RATES_DTYPE barlar ya da time/bid(/ask) tikleri).
+#
+# Hata enjeksiyonu (çağrı başına, modül değişkenleri ya da FAKE_MT5_* ortamı):
+#   LATENCY (+ LATENCY_JITTER)  yapay gecikme, saniye
+#   FAIL_RATE                   çağrı None/False döner, last_error IPC hatası
+#   HANG_RATE, HANG_SECONDS     terminal takılır (çağrı HANG_SECONDS bekler)
+#   REQUOTE_RATE                order_send yanıtlarının bir kısmı requote
+# Emirler gecikmeden sonraki simülasyon fiyatından, isteğin deviation'ı içinde
+# ise doldurulur; sembolün filling_mode'u ve LIQUIDITY (dolum başına lot)
+# FOK / IOC / RETURN davranışını belirler.
+
+# --- Sabitler (MetaTrader5 paketindeki değerler) ---
+TIMEFRAME_M1 = 1
+TIMEFRAME_M2 = 2
+TIMEFRAME_M3 = 3
+TIMEFRAME_M4 = 4
+TIMEFRAME_M5 = 5
+TIMEFRAME_M6 = 6
+TIMEFRAME_M10 = 10
+TIMEFRAME_M12 = 12
+TIMEFRAME_M15 = 15
+TIMEFRAME_M20 = 20
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 16385
+TIMEFRAME_H2 = 16386
+TIMEFRAME_H3 = 16387
+TIMEFRAME_H4 = 16388
+TIMEFRAME_H6 = 16390
+TIMEFRAME_H8 = 16392
+TIMEFRAME_H12 = 16396
+TIMEFRAME_D1 = 16408
+
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+TRADE_ACTION_DEAL = 1
+ORDER_TIME_GTC = 0
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+ORDER_FILLING_RETURN = 2
+SYMBOL_FILLING_FOK = 1
+SYMBOL_FILLING_IOC = 2
+DEAL_TYPE_BUY = 0
+DEAL_TYPE_SELL = 1
+DEAL_TYPE_BALANCE = 2
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+
+COPY_TICKS_ALL = -1
+COPY_TICKS_INFO = 1
+COPY_TICKS_TRADE = 2
+TICK_FLAG_BID = 2
+TICK_FLAG_ASK = 4
+
+SYMBOL_CALC_MODE_FOREX = 0
+SYMBOL_CALC_MODE_CFDLEVERAGE = 4
+
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_REJECT = 10006
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_DONE_PARTIAL = 10010
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_NO_MONEY = 10019
+TRADE_RETCODE_PRICE_CHANGED = 10020
+TRADE_RETCODE_PRICE_OFF = 10021
+TRADE_RETCODE_INVALID_FILL = 10030
+
+RATES_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("tick_volume", "<u8"),
+    ("spread", "<i4"),
+    ("real_volume", "<u8"),
+])
+
+TICKS_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+    ("last", "<f8"),
+    ("volume", "<u8"),
+    ("time_msc", "<i8"),
+    ("flags", "<u4"),
+    ("volume_real", "<f8"),
+])
+
+Tick = namedtuple("Tick", "time bid ask last volume time_msc flags volume_real")
+TradePosition = namedtuple("TradePosition", "ticket time time_msc type magic identifier volume price_open price_current profit swap symbol comment")
+TradeDeal = namedtuple("TradeDeal", "ticket order time time_msc type entry magic position_id volume price commission swap profit fee symbol comment")
+OrderSendResult = namedtuple("OrderSendResult", "retcode deal order volume price bid ask comment request_id retcode_external request")
+AccountInfo = namedtuple("AccountInfo", "login balance equity profit margin margin_free margin_level currency leverage name server")
+SymbolInfo = namedtuple("SymbolInfo", "name digits point spread trade_contract_size volume_min volume_max volume_step trade_stops_level margin_initial currency_profit trade_calc_mode currency_margin filling_mode")
+
+
+def _env(name, default):
+    return float(os.getenv(f"FAKE_MT5_{name}", default))
+
+
+LATENCY = _env("LATENCY", "0")
+LATENCY_JITTER = _env("LATENCY_JITTER", "0")
+FAIL_RATE = _env("FAIL_RATE", "0")
+HANG_RATE = _env("HANG_RATE", "0")
+HANG_SECONDS = _env("HANG_SECONDS", "30")
+REQUOTE_RATE = _env("REQUOTE_RATE", "0")
+LIQUIDITY = _env("LIQUIDITY", "inf")  # dolum başına lot
+FILLING_MODE = SYMBOL_FILLING_FOK | SYMBOL_FILLING_IOC
+SEED = int(_env("SEED", "0"))
+SPEED = _env("SPEED", "1")
+HISTORY_MINUTES = 20000
+LEVERAGE = 100
+VOLUME_MIN = 0.01
+VOLUME_MAX = 100.0
+VOLUME_STEP = 0.01
+STOPS_LEVEL = 0
+
+_lock = threading.RLock()
+_requote_rng = np.random.default_rng(SEED)
+_fault_rng = np.random.default_rng(SEED + 1)
+_markets = {}
+_positions = {}
+_deals = []
+_state = {"initialized": False, "login": 0, "server": "", "balance": 10000.0, "ticket": 1000, "last_error": (1, "Success")}
+
+_SYMBOLS = {
+    # sembol: (başlangıç fiyatı, saniyelik oynaklık, point, spread (point), kontrat büyüklüğü)
+    "XAUUSD": (2000.0, 0.08, 0.01, 20, 100.0),
+    "EURUSD": (1.1000, 0.00003, 0.00001, 10, 100000.0),
+    "GBPUSD": (1.2700, 0.00004, 0.00001, 12, 100000.0),
+}
+
+
+_clock = {"wall": time.time(), "sim": float(os.getenv("FAKE_MT5_START") or time.time())}
+_SUCCESS = (1, "Success")
+_IPC_ERROR = (-10004, "No IPC connection")
+
+
+# Simülasyon saati (epoch saniye)
+def _now():
+    return _clock["sim"] + (time.time() - _clock["wall"]) * SPEED
+
+
+# Saati kur: başlangıç anı ve/veya hız; verilmeyen değer korunur
+def set_clock(start=None, speed=None):
+    global SPEED
+    with _lock:
+        now = _now()
+        _clock["wall"] = time.time()
+        _clock["sim"] = now if start is None else float(start)
+        if speed is not None:
+            SPEED = float(speed)
+
+
+def advance(seconds: float):
+    with _lock:
+        _clock["sim"] += seconds
+
+
+# Her terminal çağrısının başında gecikme, takılma ve hata enjeksiyonu; True
+# dönerse çağrı başarısızdır (gerçek paket gibi None / False döner)
+def _call():
+    delay = LATENCY
+    fail = hang = False
+    if LATENCY_JITTER > 0 or FAIL_RATE > 0 or HANG_RATE > 0:
+        with _lock:
+            if LATENCY_JITTER > 0:
+                delay += _fault_rng.exponential(LATENCY_JITTER)
+            hang = HANG_RATE > 0 and _fault_rng.random() < HANG_RATE
+            fail = FAIL_RATE > 0 and _fault_rng.random() < FAIL_RATE
+    if hang:
+        delay += HANG_SECONDS
+    if delay > 0:
+        time.sleep(delay)
+    _state["last_error"] = _IPC_ERROR if fail else _SUCCESS
+    return fail
+
+
+def timeframe_seconds(timeframe: int) -> int:
+    if timeframe >= 16384:
+        return (timeframe - 16384) * 3600
+    return timeframe * 60
+
+
+def _spec(symbol):
+    if symbol in _SYMBOLS:
+        return _SYMBOLS[symbol]
+    return (100.0, 0.01, 0.01, 10, 1.0)
+
+
+class _Market:
+    # Saniyelik fiyat serisi; zaman ilerledikçe tembel olarak uzatılır
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.base, self.vol, self.point, self.spread, self.contract = _spec(symbol)
+        self.rng = np.random.default_rng(zlib.crc32(symbol.encode()) ^ SEED)
+        self.replayed = False
+        now = int(_now())
+        self.start = (now // 60) * 60 - HISTORY_MINUTES * 60
+        self.prices = np.zeros(0)
+        self._extend(now)
+
+    # Kayıtlı saniyelik fiyatlarla değiştir; veri bitince fiyat son değerde kalır
+    def load(self, start, prices):
+        self.start = int(start)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.replayed = True
+
+    def _extend(self, now):
+        n = now - self.start + 1
+        if n <= len(self.prices):
+            return
+        if self.replayed:
+            new = np.full(n - len(self.prices), self.prices[-1])
+        else:
+            steps = self.rng.normal(0, self.vol, n - len(self.prices))
+            last = self.prices[-1] if len(self.prices) else self.base
+            new = np.round(last + np.cumsum(steps), 5)
+        self.prices = np.concatenate((self.prices, new))
+
+    def price(self, now=None):
+        now = int(_now()) if now is None else now
+        self._extend(now)
+        return float(self.prices[max(now - self.start, 0)])
+
+    def bars(self, timeframe, t_from, t_to):
+        now = int(_now())
+        self._extend(now)
+        secs = timeframe_seconds(timeframe)
+        t_from = max(t_from - t_from % secs, self.start + (-self.start) % secs)  # ilk tam bar
+        t_to = min(t_to, now)
+        if t_to < t_from:
+            return np.zeros(0, dtype=RATES_DTYPE)
+        opens = np.arange(t_from, t_to - t_to % secs + 1, secs, dtype=np.int64)
+        lo = opens - self.start
+        hi = np.minimum(lo + secs, now - self.start + 1)
+        seg = self.prices[lo[0]:hi[-1]]
+        idx = lo - lo[0]
+        rates = np.zeros(len(opens), dtype=RATES_DTYPE)
+        rates["time"] = opens
+        rates["open"] = seg[idx]
+        rates["close"] = seg[hi - lo[0] - 1]
+        rates["high"] = np.maximum.reduceat(seg, idx)
+        rates["low"] = np.minimum.reduceat(seg, idx)
+        rates["tick_volume"] = hi - lo
+        rates["spread"] = self.spread
+        return rates
+
+
+    # Fiyatın değiştiği her saniye bir tik; milisaniye kısmı saniyeden türetilir
+    def ticks(self, t_from, t_to):
+        now = int(_now())
+        self._extend(now)
+        t_from = max(t_from, self.start)
+        t_to = min(t_to, now)
+        if t_to < t_from:
+            return np.zeros(0, dtype=TICKS_DTYPE)
+        seconds = np.arange(t_from, t_to + 1, dtype=np.int64)
+        prices = self.prices[t_from - self.start:t_to - self.start + 1]
+        changed = np.ones(len(prices), dtype=bool)
+        if t_from > self.start:
+            changed[0] = prices[0] != self.prices[t_from - self.start - 1]
+        changed[1:] = prices[1:] != prices[:-1]
+        seconds, prices = seconds[changed], prices[changed]
+        ticks = np.zeros(len(seconds), dtype=TICKS_DTYPE)
+        ticks["time"] = seconds
+        ticks["bid"] = prices
+        ticks["ask"] = np.round(prices + self.spread * self.point, 5)
+        ticks["time_msc"] = seconds * 1000 + seconds * 7919 % 1000
+        ticks["flags"] = TICK_FLAG_BID | TICK_FLAG_ASK
+        return ticks
+
+
+def _market(symbol):
+    market = _markets.get(symbol)
+    if market is None:
+        market = _Market(symbol)
+        _markets[symbol] = market
+    return market
+
+
+def _ts(value):
+    if value is None:
+        return int(_now())
+    if hasattr(value, "timestamp"):
+        return int(value.timestamp())
+    return int(value)
+
+
+# --- Tekrar oynatma ---
+# Tikler (saniye cinsinden zaman, bid, isteğe bağlı ask): her saniyenin fiyatı
+# o saniyeye kadarki son tiktir
+def replay(symbol, times, bids, asks=None):
+    times = np.floor(np.asarray(times, dtype=np.float64)).astype(np.int64)
+    bids = np.asarray(bids, dtype=np.float64)
+    start = int(times[0]) - int(times[0]) % 60
+    seconds = np.arange(start, int(times[-1]) + 1)
+    idx = np.maximum(np.searchsorted(times, seconds, "right") - 1, 0)
+    with _lock:
+        market = _market(symbol)
+        if asks is not None:
+            market.spread = max(int(round(float(np.median(np.asarray(asks) - bids)) / market.point)), 0)
+        market.load(start, bids[idx])
+    return market
+
+
+# M1 barlar: her dakika open -> ilk uç -> ikinci uç -> close yolunu izler
+# (yükselen barda önce low, düşende önce high); bar olmayan dakikalarda fiyat
+# önceki kapanışta bekler. Saniyelik dizi bar başına 60 eleman tutar.
+def replay_bars(symbol, bars):
+    t = bars["time"].astype(np.int64)
+    opens, highs, lows, closes = (bars[f].astype(np.float64) for f in ("open", "high", "low", "close"))
+    rising = closes >= opens
+    first = np.where(rising, lows, highs)
+    second = np.where(rising, highs, lows)
+    anchor_t = np.stack((t, t + 20, t + 40, t + 59), axis=1).ravel()
+    anchor_p = np.stack((opens, first, second, closes), axis=1).ravel()
+    seconds = np.arange(t[0], t[-1] + 60)
+    idx = np.searchsorted(t, seconds, "right") - 1
+    prices = np.where(seconds - t[idx] < 60, np.interp(seconds, anchor_t, anchor_p), closes[idx])
+    with _lock:
+        market = _market(symbol)
+        if "spread" in bars.dtype.names and len(bars):
+            market.spread = int(np.median(bars["spread"]))
+        market.load(t[0], np.round(prices, 5))
+    return market
+
+
+# "XAUUSD=bars.npy,EURUSD=ticks.npy"; saat verinin başına (+ isınma) kurulur
+def load_replay(spec: str, warmup: float = 86400.0):
+    first = last = None
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        symbol, path = item.split("=", 1)
+        data = np.load(path)
+        names = data.dtype.names or ()
+        if "open" in names:
+            market = replay_bars(symbol, data)
+        else:
+            times = data["time_msc"] / 1000 if "time_msc" in names else data["time"]
+            market = replay(symbol, times, data["bid"], data["ask"] if "ask" in names else None)
+        end = market.start + len(market.prices) - 1
+        first = market.start if first is None else min(first, market.start)
+        last = end if last is None else max(last, end)
+        print(f"[FAKE_MT5] {symbol} tekrar oynatma: {path} ({len(data)} kayıt)")
+    if first is not None and not os.getenv("FAKE_MT5_START"):
+        set_clock(start=min(first + warmup, last))
+
+
+# --- Bağlantı ---
+def initialize(path=None, login=None, password=None, server=None, timeout=None, portable=False):
+    if _call():
+        return False
+    _state["initialized"] = True
+    _state["login"] = login or 0
+    _state["server"] = server or "Fake-Server"
+    return True
+
+
+def login(login, password=None, server=None, timeout=None):
+    _state["login"] = login
+    _state["server"] = server or _state["server"]
+    return True
+
+
+def shutdown():
+    _state["initialized"] = False
+    return True
+
+
+def last_error():
+    return _state["last_error"]
+
+
+def symbol_select(symbol, enable=True):
+    return True
+
+
+# --- Piyasa verisi ---
+def copy_rates_from_pos(symbol, timeframe, start_pos, count):
+    if _call():
+        return None
+    with _lock:
+        secs = timeframe_seconds(timeframe)
+        now = int(_now())
+        t_to = now - now % secs - start_pos * secs
+        rates = _market(symbol).bars(timeframe, t_to - (count - 1) * secs, t_to + secs - 1)
+        return rates[-count:] if count else rates[:0]
+
+
+def copy_rates_range(symbol, timeframe, date_from, date_to):
+    if _call():
+        return None
+    with _lock:
+        return _market(symbol).bars(timeframe, _ts(date_from), _ts(date_to))
+
+
+def copy_ticks_from(symbol, date_from, count, flags=COPY_TICKS_ALL):
+    if _call():
+        return None
+    with _lock:
+        t_from = _ts(date_from)
+        return _market(symbol).ticks(t_from, t_from + max(count, 0) - 1)[:count]
+
+
+def copy_ticks_range(symbol, date_from, date_to, flags=COPY_TICKS_ALL):
+    if _call():
+        return None
+    with _lock:
+        return _market(symbol).ticks(_ts(date_from), _ts(date_to))
+
+
+def symbol_info_tick(symbol):
+    if _call():
+        return None
+    with _lock:
+        market = _market(symbol)
+        now = _now()
+        bid = market.price(int(now))
+        ask = round(bid + market.spread * market.point, 5)
+        return Tick(int(now), bid, ask, bid, 1, int(now) * 1000, 6, 1.0)
+
+
+def symbol_info(symbol):
+    if _call():
+        return None
+    market = _market(symbol)
+    digits = len(f"{market.point:.10f}".rstrip("0").split(".")[1])
+    return SymbolInfo(symbol, digits, market.point, market.spread, market.contract, VOLUME_MIN, VOLUME_MAX, VOLUME_STEP,
+                      STOPS_LEVEL, 0.0, "USD", SYMBOL_CALC_MODE_CFDLEVERAGE, symbol[:3], FILLING_MODE)
+
+
+# Marjin: lot * kontrat * fiyat / kaldıraç (CFD kaldıraçlı modu)
+def order_calc_margin(action, symbol, volume, price):
+    if _call():
+        return None
+    return round(volume * _market(symbol).contract * price / LEVERAGE, 2)
+
+
+# --- Hesap ve pozisyonlar ---
+def _position_profit(pos, market, bid, ask):
+    if pos.type == ORDER_TYPE_BUY:
+        return round((bid - pos.price_open) * pos.volume * market.contract, 2)
+    return round((pos.price_open - ask) * pos.volume * market.contract, 2)
+
+
+def positions_get(symbol=None, ticket=None):
+    if _call():
+        return None
+    with _lock:
+        result = []
+        for pos in _positions.values():
+            if symbol is not None and pos.symbol != symbol:
+                continue
+            if ticket is not None and pos.ticket != ticket:
+                continue
+            market = _market(pos.symbol)
+            bid = market.price()
+            ask = bid + market.spread * market.point
+            current = bid if pos.type == ORDER_TYPE_BUY else ask
+            result.append(pos._replace(price_current=current, profit=_position_profit(pos, market, bid, ask)))
+        return tuple(result)
+
+
+def account_info():
+    if _call():
+        return None
+    with _lock:
+        floating = 0.0
+        for pos in _positions.values():
+            market = _market(pos.symbol)
+            bid = market.price()
+            floating += _position_profit(pos, market, bid, bid + market.spread * market.point)
+        balance = _state["balance"]
+        margin = _used_margin()
+        equity = round(balance + floating, 2)
+        return AccountInfo(_state["login"], round(balance, 2), equity, round(floating, 2), round(margin, 2),
+                           round(equity - margin, 2), round(equity / margin * 100, 2) if margin else 0.0,
+                           "USD", LEVERAGE, "Fake Account", _state["server"])
+
+
+def _used_margin():
+    return sum(p.volume * _market(p.symbol).contract * p.price_open / LEVERAGE for p in _positions.values())
+
+
+def history_deals_get(date_from=None, date_to=None, group=None, ticket=None, position=None):
+    if _call():
+        return None
+    with _lock:
+        # Gerçek terminaldeki gibi ticket (emir) / position verilince tarih aralığı kullanılmaz
+        if ticket is not None:
+            return tuple(d for d in _deals if d.order == ticket)
+        if position is not None:
+            return tuple(d for d in _deals if d.position_id == position)
+        t_from, t_to = _ts(date_from), _ts(date_to)
+        return tuple(d for d in _deals if t_from <= d.time <= t_to)
+
+
+def _next_ticket():
+    _state["ticket"] += 1
+    return _state["ticket"]
+
+
+# Dolum: FOK tamamı doldurulamazsa reddedilir; IOC ve RETURN LIQUIDITY kadarını
+# doldurur (DONE_PARTIAL). RETURN'de kalan gerçek terminalde bekleyen emir olarak
+# kalır; burada modellenmez.
+_FILLING_FLAGS = {ORDER_FILLING_FOK: SYMBOL_FILLING_FOK, ORDER_FILLING_IOC: SYMBOL_FILLING_IOC, ORDER_FILLING_RETURN: 0}
+
+
+def _result(retcode, comment, request, bid=0.0, ask=0.0, deal=0, order=0, volume=0.0, price=0.0):
+    return OrderSendResult(retcode, deal, order, volume, price, bid, ask, comment, 0, 0, request)
+
+
+def order_send(request):
+    if _call():
+        return None
+    with _lock:
+        symbol = request.get("symbol")
+        volume = float(request.get("volume", 0))
+        order_type = request.get("type")
+        steps = volume / VOLUME_STEP
+        if volume < VOLUME_MIN or volume > VOLUME_MAX or abs(steps - round(steps)) > 1e-6:
+            return _result(TRADE_RETCODE_INVALID_VOLUME, "Invalid volume", request)
+        filling = request.get("type_filling", ORDER_FILLING_FOK)
+        flag = _FILLING_FLAGS.get(filling)
+        if flag is None or (flag and not FILLING_MODE & flag):
+            return _result(TRADE_RETCODE_INVALID_FILL, "Unsupported filling mode", request)
+        market = _market(symbol)
+        bid = market.price()
+        ask = round(bid + market.spread * market.point, 5)
+        price = ask if order_type == ORDER_TYPE_BUY else bid
+        requested = request.get("price") or price
+        if abs(price - requested) > request.get("deviation", 0) * market.point or _requote_rng.random() < REQUOTE_RATE:
+            return _result(TRADE_RETCODE_REQUOTE, "Requote", request, bid, ask)
+        position_ticket = request.get("position")
+        pos = None
+        if position_ticket:
+            pos = _positions.get(position_ticket)
+            if pos is None:
+                return _result(TRADE_RETCODE_INVALID, "Position not found", request, bid, ask)
+            volume = min(volume, pos.volume)
+        filled = volume
+        if volume > LIQUIDITY:
+            filled = round(int(LIQUIDITY / VOLUME_STEP + 1e-9) * VOLUME_STEP, 8)
+            if filling == ORDER_FILLING_FOK or filled <= 0:
+                return _result(TRADE_RETCODE_REJECT, "No liquidity", request, bid, ask)
+        if pos is None:
+            free = _state["balance"] - _used_margin()  # yaklaşık: açık kar/zarar hariç
+            if filled * market.contract * price / LEVERAGE > free:
+                return _result(TRADE_RETCODE_NO_MONEY, "No money", request, bid, ask)
+        now = _now()
+        order = _next_ticket()
+        deal = _next_ticket()
+        magic = request.get("magic", 0)
+        comment = request.get("comment", "")
+        if pos is not None:
+            closed = pos._replace(volume=filled)
+            profit = _position_profit(closed, market, bid, ask)
+            _state["balance"] += profit
+            if filled < pos.volume - 1e-9:
+                _positions[pos.ticket] = pos._replace(volume=round(pos.volume - filled, 8))
+            else:
+                del _positions[pos.ticket]
+            _deals.append(TradeDeal(deal, order, int(now), int(now * 1000), order_type, DEAL_ENTRY_OUT,
+                                    magic, pos.ticket, filled, price, 0.0, 0.0, profit, 0.0, symbol, comment))
+        else:
+            _positions[order] = TradePosition(order, int(now), int(now * 1000), order_type, magic,
+                                              order, filled, price, price, 0.0, 0.0, symbol, comment)
+            _deals.append(TradeDeal(deal, order, int(now), int(now * 1000), order_type, DEAL_ENTRY_IN,
+                                    magic, order, filled, price, 0.0, 0.0, 0.0, 0.0, symbol, comment))
+        if filled < volume:
+            return _result(TRADE_RETCODE_DONE_PARTIAL, "Request executed partially", request, bid, ask,
+                           deal, order, filled, price)
+        return _result(TRADE_RETCODE_DONE, "Request executed", request, bid, ask, deal, order, filled, price)
+
+
+_replay = os.getenv("FAKE_MT5_REPLAY")
+if _replay:
+    load_replay(_replay, _env("WARMUP", "86400"))
@@ -0,0 +1,663 @@
+import math
+from collections import OrderedDict, deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Vektörel gösterge serileri ve sonuç önbelleği
+#
+# Her gösterge bar dizisinin tamamı için barlarla hizalı bir seri döndürür
+# (ısınma bölgesi NaN). Pencereli göstergeler (SMA, SMA-RSI) önek toplamlarıyla,
+# özyinelemeli olanlar (EMA, Wilder) blok halinde kapalı formla hesaplanır;
+# Python döngüsü bar başına değil blok başına döner.
+#
+# IndicatorCache sonuçları (sembol, timeframe, gösterge, parametreler) başına
+# tutar (LRU). Yeni bar geldiğinde önceki sonucun kapanmış bölümü korunur,
+# sadece oluşan bar ve sonrası yeniden hesaplanır: pencereli göstergeler son
+# pencereyi, özyinelemeli olanlar önceki barın durumundan devam eder.
+
+# Blok içinde (1 - alpha)^-k bu sınırı aşmasın (hassasiyet kaybı olmasın)
+_MAX_GROWTH = 1e15
+
+
+# y[t] = (1 - alpha) * y[t-1] + alpha * x[t], y[-1] = y0
+def _recurse(x, alpha: float, y0: float):
+    out = np.empty(len(x))
+    if len(x) == 0:
+        return out
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        out[:] = x
+        return out
+    block = max(1, min(1024, int(math.log(_MAX_GROWTH) / -math.log(decay))))
+    powers = decay ** np.arange(1, block + 1)
+    prev = y0
+    for lo in range(0, len(x), block):
+        seg = x[lo:lo + block]
+        pw = powers[:len(seg)]
+        out[lo:lo + len(seg)] = pw * (prev + np.cumsum(alpha * seg / pw))
+        prev = out[lo + len(seg) - 1]
+    return out
+
+
+# Kazanç/kayıp toplamlarından (ya da ortalamalarından) RSI; calculate_rsi ile aynı
+def rsi_from_sums(gain, loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+    rsi = np.where(loss <= 1e-12, 100.0, rsi)
+    return np.round(rsi, 2)
+
+
+# calculate_rsi ile aynı (SMA) RSI serisi; ilk `period` değer NaN
+def rsi_sma(closes, period: int = 5):
+    closes = np.asarray(closes, dtype=np.float64)
+    out = np.full(len(closes), np.nan)
+    if len(closes) <= period:
+        return out
+    diff = np.diff(closes)
+    gains = np.cumsum(np.r_[0.0, np.where(diff > 0, diff, 0.0)])
+    losses = np.cumsum(np.r_[0.0, np.where(diff < 0, -diff, 0.0)])
+    out[period:] = rsi_from_sums(gains[period:] - gains[:-period], losses[period:] - losses[:-period])
+    return out
+
+
+# Wilder RSI (RSIEngine "wilder" ile aynı): ilk ortalama SMA ile tohumlanır.
+# Ortalama kazanç/kayıp serileri de döner (artımlı devam için durum).
+def rsi_wilder(closes, period: int = 14, state=None):
+    closes = np.asarray(closes, dtype=np.float64)
+    n = len(closes)
+    avg_gain = np.full(n, np.nan)
+    avg_loss = np.full(n, np.nan)
+    diff = np.diff(closes)
+    gains = np.where(diff > 0, diff, 0.0)
+    losses = np.where(diff < 0, -diff, 0.0)
+    alpha = 1.0 / period
+    if state is not None:
+        # closes[0] önceki hesabın son barı, state o barın ortalamaları
+        avg_gain[0], avg_loss[0] = state
+        avg_gain[1:] = _recurse(gains, alpha, state[0])
+        avg_loss[1:] = _recurse(losses, alpha, state[1])
+    elif n > period:
+        avg_gain[period] = gains[:period].mean()
+        avg_loss[period] = losses[:period].mean()
+        avg_gain[period + 1:] = _recurse(gains[period:], alpha, avg_gain[period])
+        avg_loss[period + 1:] = _recurse(losses[period:], alpha, avg_loss[period])
+    out = np.full(n, np.nan)
+    valid = ~np.isnan(avg_gain)
+    out[valid] = rsi_from_sums(avg_gain[valid], avg_loss[valid])
+    return out, avg_gain, avg_loss
+
+
+# Her M1 kapanışında, oluşan üst timeframe barı dahil RSI (canlı botla aynı bakış)
+def rsi_forming(m1, htf, period: int, seconds: int):
+    closes = htf["close"]
+    k = np.searchsorted(htf["time"], m1["time"] - m1["time"] % seconds)
+    out = np.full(len(m1), np.nan)
+    if len(closes) <= period:
+        return out
+    diff = np.diff(closes)
+    gains = np.cumsum(np.r_[0.0, np.where(diff > 0, diff, 0.0)])
+    losses = np.cumsum(np.r_[0.0, np.where(diff < 0, -diff, 0.0)])
+    valid = k >= period
+    kv = k[valid]
+    # Kapanmış (period - 1) fark: closes[kv-period+1 .. kv-1]
+    closed_gain = gains[kv - 1] - gains[kv - period]
+    closed_loss = losses[kv - 1] - losses[kv - period]
+    live = m1["close"][valid] - closes[kv - 1]
+    gain_sum = closed_gain + np.where(live > 0, live, 0.0)
+    loss_sum = closed_loss + np.where(live < 0, -live, 0.0)
+    out[valid] = rsi_from_sums(gain_sum, loss_sum)
+    return out
+
+
+def sma(values, period: int):
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) < period:
+        return out
+    sums = np.cumsum(np.r_[0.0, values])
+    out[period - 1:] = (sums[period:] - sums[:-period]) / period
+    return out
+
+
+# EMA (alpha = 2 / (period + 1)); ilk değer ilk `period` barın SMA'sı
+def ema(values, period: int, state=None):
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    alpha = 2.0 / (period + 1)
+    if state is not None:
+        # values[0] önceki hesabın son barı, state o barın EMA değeri
+        out[0] = state
+        out[1:] = _recurse(values[1:], alpha, state)
+    elif len(values) >= period:
+        out[period - 1] = values[:period].mean()
+        out[period:] = _recurse(values[period:], alpha, out[period - 1])
+    return out
+
+
+def _true_range(high, low, close):
+    prev = close[:-1]
+    return np.maximum(high[1:] - low[1:], np.maximum(np.abs(high[1:] - prev), np.abs(low[1:] - prev)))
+
+
+# ATR (Wilder): ilk değer ilk `period` gerçek aralığın ortalaması (indeks period)
+def atr(high, low, close, period: int = 14, state=None):
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    out = np.full(len(close), np.nan)
+    tr = _true_range(high, low, close)
+    if state is not None:
+        # ilk bar önceki hesabın son barı, state o barın ATR değeri
+        out[0] = state
+        out[1:] = _recurse(tr, 1.0 / period, state)
+    elif len(close) > period:
+        out[period] = tr[:period].mean()
+        out[period + 1:] = _recurse(tr[period:], 1.0 / period, out[period])
+    return out
+
+
+# Bollinger bantları: SMA ± width * standart sapma (popülasyon)
+def bollinger(close, period: int = 20, width: float = 2.0):
+    close = np.asarray(close, dtype=np.float64)
+    middle = np.full(len(close), np.nan)
+    std = np.full(len(close), np.nan)
+    if len(close) >= period:
+        windows = sliding_window_view(close, period)
+        middle[period - 1:] = windows.mean(axis=1)
+        std[period - 1:] = windows.std(axis=1)
+    return middle, middle + width * std, middle - width * std
+
+
+# Stokastik: %K = 100 * (kapanış - en düşük) / (en yüksek - en düşük), %D = SMA(%K)
+def stochastic(high, low, close, k_period: int = 14, d_period: int = 3):
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    k = np.full(len(close), np.nan)
+    d = np.full(len(close), np.nan)
+    if len(close) >= k_period:
+        highest = sliding_window_view(high, k_period).max(axis=1)
+        lowest = sliding_window_view(low, k_period).min(axis=1)
+        k[k_period - 1:] = _stoch_k(close[k_period - 1:], highest, lowest)
+        d[k_period - 1:] = sma(k[k_period - 1:], d_period)
+    return k, d
+
+
+def _stoch_k(close, highest, lowest):
+    span = highest - lowest
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = 100.0 * (close - lowest) / span
+    # Aralık sıfırsa (düz piyasa) orta değer
+    return np.where(span > 0, k, 50.0)
+
+
+# Kayıtlı göstergeler. Her fonksiyon (bars, start, prev, **params) alır ve
+# bars[start:] ile hizalı çıktıları döndürür. prev, bars ile hizalı önceki
+# sonuçtur (start > 0 iken start'tan önceki satırlar geçerli). "_" ile başlayan
+# çıktılar sadece devam durumu içindir, yanıtta yer almaz.
+
+# Pencereli göstergeler: son `window` bar geriden yeniden hesaplanır
+def _windowed(fn, window):
+    def compute(bars, start, prev, **params):
+        lo = max(0, start - window(**params))
+        return {k: v[start - lo:] for k, v in fn(bars[lo:], **params).items()}
+    return compute
+
+
+def _rsi(bars, start, prev, period: int = 14, method: str = "sma"):
+    if method == "sma":
+        lo = max(0, start - period)
+        return {"value": rsi_sma(bars["close"][lo:], period)[start - lo:]}
+    if start > 0 and not np.isnan(prev["_gain"][start - 1]):
+        state = (prev["_gain"][start - 1], prev["_loss"][start - 1])
+        value, gain, loss = rsi_wilder(bars["close"][start - 1:], period, state)
+        return {"value": value[1:], "_gain": gain[1:], "_loss": loss[1:]}
+    value, gain, loss = rsi_wilder(bars["close"], period)
+    return {"value": value[start:], "_gain": gain[start:], "_loss": loss[start:]}
+
+
+def _ema(bars, start, prev, period: int = 20):
+    if start > 0 and not np.isnan(prev["value"][start - 1]):
+        return {"value": ema(bars["close"][start - 1:], period, prev["value"][start - 1])[1:]}
+    return {"value": ema(bars["close"], period)[start:]}
+
+
+def _atr(bars, start, prev, period: int = 14):
+    if start > 0 and not np.isnan(prev["value"][start - 1]):
+        rows = bars[start - 1:]
+        return {"value": atr(rows["high"], rows["low"], rows["close"], period, prev["value"][start - 1])[1:]}
+    return {"value": atr(bars["high"], bars["low"], bars["close"], period)[start:]}
+
+
+def _sma_outputs(bars, period: int = 20):
+    return {"value": sma(bars["close"], period)}
+
+
+def _bollinger_outputs(bars, period: int = 20, width: float = 2.0):
+    middle, upper, lower = bollinger(bars["close"], period, width)
+    return {"middle": middle, "upper": upper, "lower": lower}
+
+
+def _stochastic_outputs(bars, k_period: int = 14, d_period: int = 3):
+    k, d = stochastic(bars["high"], bars["low"], bars["close"], k_period, d_period)
+    return {"k": k, "d": d}
+
+
+# ad -> (hesap, parametre sırası, varsayılanlar)
+INDICATORS = {
+    "rsi": (_rsi, ("period", "method"), {"period": 14, "method": "sma"}),
+    "sma": (_windowed(_sma_outputs, lambda period: period), ("period",), {"period": 20}),
+    "ema": (_ema, ("period",), {"period": 20}),
+    "atr": (_atr, ("period",), {"period": 14}),
+    "bb": (_windowed(_bollinger_outputs, lambda period, width: period), ("period", "width"),
+           {"period": 20, "width": 2.0}),
+    "stoch": (_windowed(_stochastic_outputs, lambda k_period, d_period: k_period + d_period),
+              ("k_period", "d_period"), {"k_period": 14, "d_period": 3}),
+}
+_CHOICES = {"method": ("sma", "wilder")}
+
+# İlk oturmuş değer için gereken geçmiş (bar): pencereli göstergelerde gerçek
+# pencere, özyinelemelilerde (EMA, ATR, Wilder RSI) ~10 periyot
+_WARMUP = {
+    "rsi": lambda period, method: period + 1 if method == "sma" else 10 * period,
+    "sma": lambda period: period,
+    "ema": lambda period: 10 * period,
+    "atr": lambda period: 10 * period,
+    "bb": lambda period, width: period,
+    "stoch": lambda k_period, d_period: k_period + d_period,
+}
+
+
+def warmup(name: str, params):
+    return _WARMUP[name](**params)
+
+
+# "rsi:14:wilder" -> ("rsi", {"period": 14, "method": "wilder"})
+def parse_spec(spec: str):
+    name, *args = spec.strip().lower().split(":")
+    entry = INDICATORS.get(name)
+    if entry is None:
+        raise ValueError(f"Bilinmeyen gösterge: {name}")
+    _, names, defaults = entry
+    if len(args) > len(names):
+        raise ValueError(f"Fazla parametre: {spec}")
+    params = dict(defaults)
+    for key, raw in zip(names, args):
+        params[key] = type(defaults[key])(raw)
+    for key, value in params.items():
+        if key in _CHOICES and value not in _CHOICES[key]:
+            raise ValueError(f"Geçersiz {key}: {value}")
+        if key.endswith("period") and value < 1:
+            raise ValueError(f"Geçersiz periyot: {spec}")
+    return name, params
+
+
+# Aynı göstergenin farklı yazımları ("rsi:5", "rsi:5:sma") tek anahtara iner
+def spec_key(name: str, params):
+    return (name,) + tuple(sorted(params.items()))
+
+
+# Tek seferlik hesap (önbelleksiz): yanıt sütunları
+def compute(bars, name: str, params):
+    fn = INDICATORS[name][0]
+    return {k: v for k, v in fn(bars, 0, None, **params).items() if not k.startswith("_")}
+
+
+class _Entry:
+    __slots__ = ("times", "outputs")
+
+    def __init__(self, times, outputs):
+        self.times = times
+        self.outputs = outputs
+
+
+class IndicatorCache:
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.full = 0         # baştan hesap
+        self.tail = 0         # sadece kuyruk hesabı
+        self.rows = 0         # hesaplanan toplam satır
+        self.evictions = 0
+
+    # Önceki sonucun yeni barlara hizası: (kaydırma, yeniden hesap başlangıcı)
+    @staticmethod
+    def _resume(entry, times):
+        old = entry.times
+        if len(old) == 0 or len(times) == 0:
+            return None
+        off = int(np.searchsorted(old, times[0]))
+        if off >= len(old) or old[off] != times[0]:
+            return None
+        # Önceki hesabın son barı oluşan bardı; oradan itibaren yeniden hesaplanır
+        start = len(old) - off - 1
+        if start >= len(times) or times[start] != old[-1]:
+            return None
+        return off, start
+
+    def get(self, key, bars, name: str, params):
+        fn = INDICATORS[name][0]
+        times = np.asarray(bars["time"])
+        entry = self.entries.get(key)
+        resume = self._resume(entry, times) if entry is not None else None
+        if resume is None:
+            outputs = fn(bars, 0, None, **params)
+            self.full += 1
+            self.rows += len(times)
+        else:
+            off, start = resume
+            prev = {k: v[off:] for k, v in entry.outputs.items()}
+            tail = fn(bars, start, prev, **params)
+            outputs = {k: np.concatenate((prev[k][:start], tail[k])) for k in tail}
+            self.tail += 1
+            self.rows += len(times) - start
+        self.entries[key] = _Entry(times.copy(), outputs)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return {k: v for k, v in outputs.items() if not k.startswith("_")}
+
+    def stats(self):
+        return {"entries": len(self.entries), "full": self.full, "tail": self.tail,
+                "rows": self.rows, "evictions": self.evictions}
+
+
+# Artımlı (akış) API
+#
+# Her akış kapanmış barları "commit" eder; oluşan bar durumu bozmadan geçici
+# olarak hesaba katılır (aynı bar saniyede birkaç kez güncellense de her
+# güncelleme sabit sürede biter). Bir bar dizisi baştan sona beslendiğinde
+# her adımda dönen değer, toplu fonksiyonun aynı indeksteki değeriyle aynıdır.
+
+class Stream:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.forming_time = None  # Oluşan barın açılış zamanı
+        self.forming = None       # Oluşan bar: (close, high, low)
+        self.closed_count = 0     # Commit edilmiş bar sayısı
+        self._reset()
+
+    def _reset(self):
+        pass
+
+    def _commit(self, close, high, low):
+        raise NotImplementedError
+
+    def _value(self, close, high, low):
+        raise NotImplementedError
+
+    # Yeni veya güncellenmiş bir bar bildir (bar_time: barın açılış zamanı)
+    def update(self, bar_time: int, close: float, high: float = None, low: float = None):
+        if self.forming_time is None or bar_time > self.forming_time:
+            # Yeni bar başladı: önceki oluşan bar artık kapanmış sayılır
+            if self.forming_time is not None:
+                self._commit(*self.forming)
+                self.closed_count += 1
+            self.forming_time = bar_time
+        elif bar_time < self.forming_time:
+            # Geçmişe ait bar, durumu zaten işlenmiş
+            return self.value()
+        close = float(close)
+        self.forming = (close, close if high is None else float(high), close if low is None else float(low))
+        return self.value()
+
+    # MT5 rates dizisini (eski -> yeni) besle; zaten görülen barlar atlanır
+    def feed(self, rates):
+        if rates is None or len(rates) == 0:
+            return self.value()
+        times = rates["time"]
+        closes = rates["close"]
+        names = rates.dtype.names
+        highs = rates["high"] if "high" in names else closes
+        lows = rates["low"] if "low" in names else closes
+        start = 0
+        if self.forming_time is not None:
+            # Yalnızca oluşan bar ve sonrasına bak
+            start = len(times)
+            while start > 0 and times[start - 1] >= self.forming_time:
+                start -= 1
+            if start == 0 and times[0] > self.forming_time:
+                # Arada boşluk var (çok eski durum), baştan ısıt
+                self.reset()
+        for i in range(start, len(times)):
+            self.update(int(times[i]), closes[i], highs[i], lows[i])
+        return self.value()
+
+    # Oluşan bar dahil güncel değer (çok çıktılı göstergelerde sözlük)
+    def value(self):
+        if self.forming is None:
+            return None
+        return self._value(*self.forming)
+
+
+def _rsi_value(gain, loss):
+    if loss <= 1e-12:
+        return 100.0
+    return round(100.0 - (100.0 / (1 + gain / loss)), 2)
+
+
+# method="sma"    -> calculate_rsi ile aynı sonuç (son periyot farkının basit ortalaması)
+# method="wilder" -> Wilder yumuşatması (ilk değer SMA ile tohumlanır)
+class RSIStream(Stream):
+    def __init__(self, period: int = 5, method: str = "sma"):
+        if period < 1:
+            raise ValueError("period en az 1 olmalı")
+        if method not in _CHOICES["method"]:
+            raise ValueError(f"Bilinmeyen RSI yöntemi: {method}")
+        self.period = period
+        self.method = method
+        super().__init__()
+
+    def _reset(self):
+        self.last_closed_close = None   # Son kapanmış barın kapanışı
+        # SMA için: son `period` kapanmış bar farkı ve toplamları
+        self.gains = deque(maxlen=self.period)
+        self.losses = deque(maxlen=self.period)
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        # Wilder için: yumuşatılmış ortalamalar
+        self.avg_gain = None
+        self.avg_loss = None
+
+    def _commit(self, close, high, low):
+        if self.last_closed_close is not None:
+            diff = close - self.last_closed_close
+            gain = diff if diff > 0 else 0.0
+            loss = -diff if diff < 0 else 0.0
+            if len(self.gains) == self.period:
+                self.gain_sum -= self.gains[0]
+                self.loss_sum -= self.losses[0]
+            self.gains.append(gain)
+            self.losses.append(loss)
+            self.gain_sum += gain
+            self.loss_sum += loss
+            if self.method == "wilder":
+                if self.avg_gain is None:
+                    if len(self.gains) == self.period:
+                        self.avg_gain = self.gain_sum / self.period
+                        self.avg_loss = self.loss_sum / self.period
+                else:
+                    self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                    self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        self.last_closed_close = close
+
+    def _value(self, close, high, low):
+        if self.last_closed_close is None:
+            return None
+        diff = close - self.last_closed_close
+        gain = diff if diff > 0 else 0.0
+        loss = -diff if diff < 0 else 0.0
+        p = self.period
+        if self.method == "wilder":
+            if self.avg_gain is not None:
+                return _rsi_value((self.avg_gain * (p - 1) + gain) / p, (self.avg_loss * (p - 1) + loss) / p)
+            if len(self.gains) == p - 1:
+                return _rsi_value((self.gain_sum + gain) / p, (self.loss_sum + loss) / p)
+            return None
+        if len(self.gains) < p - 1:
+            return None
+        # Pencere: son (p - 1) kapanmış fark + oluşan barın farkı
+        gain_sum = self.gain_sum
+        loss_sum = self.loss_sum
+        if len(self.gains) == p:
+            gain_sum -= self.gains[0]
+            loss_sum -= self.losses[0]
+        return _rsi_value(max(gain_sum + gain, 0.0) / p, max(loss_sum + loss, 0.0) / p)
+
+
+class SMAStream(Stream):
+    def __init__(self, period: int = 20):
+        self.period = period
+        super().__init__()
+
+    def _reset(self):
+        self.window = deque(maxlen=max(self.period - 1, 1))  # son (period - 1) kapanış
+
+    def _commit(self, close, high, low):
+        if self.period > 1:
+            self.window.append(close)
+
+    def _value(self, close, high, low):
+        if len(self.window) < self.period - 1:
+            return None
+        return (sum(self.window) + close) / self.period if self.period > 1 else close
+
+
+class EMAStream(SMAStream):
+    def _reset(self):
+        super()._reset()
+        self.ema = None
+
+    def _commit(self, close, high, low):
+        if self.ema is not None:
+            self.ema += 2.0 / (self.period + 1) * (close - self.ema)
+        elif len(self.window) == self.period - 1:
+            self.ema = (sum(self.window) + close) / self.period  # SMA tohumu
+        else:
+            super()._commit(close, high, low)
+
+    def _value(self, close, high, low):
+        if self.ema is None:
+            return super()._value(close, high, low)
+        return self.ema + 2.0 / (self.period + 1) * (close - self.ema)
+
+
+class ATRStream(Stream):
+    def __init__(self, period: int = 14):
+        self.period = period
+        super().__init__()
+
+    def _reset(self):
+        self.prev_close = None
+        self.ranges = []   # tohum öncesi gerçek aralıklar
+        self.atr = None
+
+    def _range(self, close, high, low):
+        prev = self.prev_close
+        return max(high - low, abs(high - prev), abs(low - prev))
+
+    def _commit(self, close, high, low):
+        if self.prev_close is not None:
+            tr = self._range(close, high, low)
+            if self.atr is not None:
+                self.atr += (tr - self.atr) / self.period
+            else:
+                self.ranges.append(tr)
+                if len(self.ranges) == self.period:
+                    self.atr = sum(self.ranges) / self.period
+        self.prev_close = close
+
+    def _value(self, close, high, low):
+        if self.prev_close is None:
+            return None
+        tr = self._range(close, high, low)
+        if self.atr is not None:
+            return self.atr + (tr - self.atr) / self.period
+        if len(self.ranges) == self.period - 1:
+            return (sum(self.ranges) + tr) / self.period
+        return None
+
+
+class BollingerStream(SMAStream):
+    def __init__(self, period: int = 20, width: float = 2.0):
+        self.width = width
+        super().__init__(period)
+
+    def _value(self, close, high, low):
+        if len(self.window) < self.period - 1:
+            return None
+        values = np.fromiter(self.window, float, len(self.window)) if self.period > 1 else np.empty(0)
+        values = np.append(values, close)
+        middle = values.mean()
+        std = values.std()
+        return {"middle": middle, "upper": middle + self.width * std, "lower": middle - self.width * std}
+
+
+class StochasticStream(Stream):
+    def __init__(self, k_period: int = 14, d_period: int = 3):
+        self.k_period = k_period
+        self.d_period = d_period
+        super().__init__()
+
+    def _reset(self):
+        size = max(self.k_period - 1, 1)
+        self.highs = deque(maxlen=size)
+        self.lows = deque(maxlen=size)
+        self.ks = deque(maxlen=max(self.d_period - 1, 1))  # kapanmış barların %K değerleri
+
+    def _k(self, close, high, low):
+        if len(self.highs) < self.k_period - 1:
+            return None
+        highest = max(self.highs, default=high) if self.k_period > 1 else high
+        lowest = min(self.lows, default=low) if self.k_period > 1 else low
+        highest, lowest = max(highest, high), min(lowest, low)
+        span = highest - lowest
+        return 100.0 * (close - lowest) / span if span > 0 else 50.0
+
+    def _commit(self, close, high, low):
+        k = self._k(close, high, low)
+        if k is not None and self.d_period > 1:
+            self.ks.append(k)
+        if self.k_period > 1:
+            self.highs.append(high)
+            self.lows.append(low)
+
+    def _value(self, close, high, low):
+        k = self._k(close, high, low)
+        if k is None:
+            return None
+        d = None
+        if self.d_period == 1:
+            d = k
+        elif len(self.ks) == self.d_period - 1:
+            d = (sum(self.ks) + k) / self.d_period
+        return {"k": k, "d": d}
+
+
+STREAMS = {
+    "rsi": RSIStream,
+    "sma": SMAStream,
+    "ema": EMAStream,
+    "atr": ATRStream,
+    "bb": BollingerStream,
+    "stoch": StochasticStream,
+}
+
+
+def stream(spec: str):
+    name, params = parse_spec(spec)
+    return STREAMS[name](**params)
+
+
+# Süreç genelinde paylaşılan akışlar: bot, REST ve websocket aynı durumu
+# kullanır; her gösterge bar başına bir kez güncellenir
+_streams = {}
+
+
+def get_stream(symbol: str, timeframe, spec: str):
+    name, params = parse_spec(spec)
+    key = (symbol, timeframe) + spec_key(name, params)
+    s = _streams.get(key)
+    if s is None:
+        s = _streams[key] = STREAMS[name](**params)
+    return s
@@ -0,0 +1,249 @@
+import asyncio
+import itertools
+import os
+import queue
+import secrets
+import sys
+import tempfile
+import threading
+import time
+
+# Süreçler arası istek / yanıt kanalı
+#
+# multiprocessing Connection üzerinde çalışır (Pipe ucu ya da
+# Listener / Client bağlantısı): Linux'ta Unix soketi, Windows'ta named pipe;
+# mesajlar pickle'lanır. İstek (id, op, args), yanıt (id, ok, değer).
+#
+# Her iki uçta da okuma ve yazma ayrı thread'lerdedir; event loop hiçbir
+# zaman soket üzerinde bloke olmaz. Karşı taraf donarsa (GIL'i tutan bir
+# MT5 çağrısı gibi) istekler sadece zaman aşımına düşer, çağıran loop ve
+# diğer kanallar etkilenmez. Karşı süreç ölünce bekleyen tüm istekler
+# ChannelClosed ile biter.
+
+
+# Listener / Client adresi: Windows'ta named pipe, diğerlerinde Unix soketi
+def default_address(name: str):
+    if sys.platform == "win32":
+        return rf"\\.\pipe\{name}"
+    return os.path.join(tempfile.gettempdir(), f"{name}.sock")
+
+
+# Listener / Client anahtarı: sabit bir varsayılan yok. Sunucu her başlangıçta
+# rastgele bir anahtar üretip sadece sahibinin okuyabildiği (0600) dosyaya
+# yazar; istemciler aynı kullanıcıyla çalışıp dosyadan okur.
+def default_authkey_path(name: str):
+    return os.path.join(tempfile.gettempdir(), f"{name}.key")
+
+
+def create_authkey(path: str):
+    key = secrets.token_hex(32).encode()
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    # O_EXCL: arada başkasının oluşturduğu dosya / sembolik bağ kullanılmaz
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+def read_authkey(path: str):
+    with open(path, "rb") as f:
+        if hasattr(os, "getuid"):
+            st = os.fstat(f.fileno())
+            if st.st_uid != os.getuid() or st.st_mode & 0o077:
+                raise PermissionError(f"Anahtar dosyası başka kullanıcılara açık ya da başkasına ait: {path}")
+        key = f.read().strip()
+    if not key:
+        raise ValueError(f"Anahtar dosyası boş: {path}")
+    return key
+
+
+class ChannelClosed(Exception):
+    pass
+
+
+# Karşı tarafta işleyici hata verdi; status HTTP kodu gibi taşınır
+class RemoteError(Exception):
+    def __init__(self, status: int, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+class _Writer:
+    def __init__(self, conn, name):
+        self.conn = conn
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name=f"{name}-send", daemon=True)
+        self.thread.start()
+
+    def send(self, message):
+        self.queue.put(message)
+
+    def close(self):
+        self.queue.put(None)
+
+    def _run(self):
+        while True:
+            message = self.queue.get()
+            if message is None:
+                return
+            try:
+                self.conn.send(message)
+            except (OSError, EOFError, ValueError):
+                return
+            except Exception:  # pickle'lanamayan değer: mesaj atlanır, çağıran zaman aşımına düşer
+                continue
+
+
+def _reader(conn, deliver, done, name):
+    def run():
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError, ValueError):
+                break
+            try:
+                deliver(message)
+            except RuntimeError:  # event loop kapandı
+                return
+        try:
+            done()
+        except RuntimeError:
+            pass
+    thread = threading.Thread(target=run, name=f"{name}-recv", daemon=True)
+    thread.start()
+    return thread
+
+
+# İstemci ucu: await channel.call("status", timeout=2.0, symbol="XAUUSD")
+class Channel:
+    def __init__(self, conn, name: str = "ipc"):
+        self.conn = conn
+        self.name = name
+        self.ids = itertools.count(1)
+        self.pending = {}
+        self.loop = None
+        self.writer = None
+        self.closed = False
+        self.requests = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.rtt_total = 0.0
+        self.rtt_max = 0.0
+
+    def start(self, loop=None):
+        self.loop = loop or asyncio.get_running_loop()
+        self.writer = _Writer(self.conn, self.name)
+        _reader(self.conn, lambda m: self.loop.call_soon_threadsafe(self._deliver, m),
+                lambda: self.loop.call_soon_threadsafe(self._fail_all), self.name)
+        return self
+
+    def _deliver(self, message):
+        request_id, ok, value = message
+        future = self.pending.pop(request_id, None)
+        if future is not None and not future.done():
+            future.set_result((ok, value))
+
+    def _fail_all(self):
+        self.closed = True
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ChannelClosed(self.name))
+        self.pending.clear()
+
+    async def call(self, op: str, timeout: float = 5.0, **args):
+        if self.closed:
+            raise ChannelClosed(self.name)
+        request_id = next(self.ids)
+        future = self.loop.create_future()
+        self.pending[request_id] = future
+        self.requests += 1
+        start = time.perf_counter()
+        self.writer.send((request_id, op, args))
+        try:
+            ok, value = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.pending.pop(request_id, None)
+        elapsed = time.perf_counter() - start
+        self.rtt_total += elapsed
+        self.rtt_max = max(self.rtt_max, elapsed)
+        if not ok:
+            self.errors += 1
+            raise RemoteError(*value)
+        return value
+
+    def close(self):
+        self.closed = True
+        if self.writer is not None:
+            self.writer.close()
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+    def stats(self):
+        answered = self.requests - self.timeouts - len(self.pending)
+        return {
+            "requests": self.requests,
+            "pending": len(self.pending),
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "rtt_ms_avg": round(self.rtt_total / answered * 1000, 3) if answered > 0 else None,
+            "rtt_ms_max": round(self.rtt_max * 1000, 3),
+            "closed": self.closed,
+        }
+
+
+# Sunucu ucu: her istek event loop'ta ayrı görev olarak işlenir (yavaş bir
+# işleyici diğerlerini bekletmez). Bağlantı kapanınca on_close çağrılır.
+class Server:
+    def __init__(self, conn, handlers, name: str = "ipc", on_close=None):
+        self.conn = conn
+        self.handlers = handlers  # op -> async fn(**args)
+        self.name = name
+        self.on_close = on_close
+        self.loop = None
+        self.writer = None
+        self.tasks = set()
+        self.handled = 0
+        self.failed = 0
+
+    def start(self, loop=None):
+        self.loop = loop or asyncio.get_running_loop()
+        self.writer = _Writer(self.conn, self.name)
+        _reader(self.conn, lambda m: self.loop.call_soon_threadsafe(self._spawn, m),
+                lambda: self.loop.call_soon_threadsafe(self._closed), self.name)
+        return self
+
+    def _spawn(self, message):
+        task = self.loop.create_task(self._handle(*message))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _handle(self, request_id, op, args):
+        handler = self.handlers.get(op)
+        try:
+            if handler is None:
+                raise RemoteError(404, f"Bilinmeyen işlem: {op}")
+            value = await handler(**args)
+            reply = (request_id, True, value)
+            self.handled += 1
+        except Exception as e:
+            self.failed += 1
+            reply = (request_id, False, (getattr(e, "status_code", getattr(e, "status", 500)),
+                                         getattr(e, "detail", None) or str(e)))
+        self.writer.send(reply)
+
+    def _closed(self):
+        if self.on_close is not None:
+            self.on_close()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
@@ -0,0 +1,181 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+import numpy as np
+import websockets
+
+# Yük testi: sahte terminale karşı N websocket istemcisi ve M REST çağırıcı
+#
+# Varsayılan olarak API'yi MT5_FAKE=1 ile alt süreçte başlatır (--url verilirse
+# çalışan sunucuya bağlanır). Sahte terminalin gecikme / hata enjeksiyonu
+# FAKE_MT5_* ortamı ile geçirilir (--latency, --jitter, --fail-rate, --speed).
+# Raporlanan:
+#   - REST: endpoint başına istek/sn, p50/p99/max gecikme, hata sayısı
+#   - websocket: mesaj/sn, yayın gecikmesi (payload zamanından alıma) p50/p99,
+#     düşürülen (yavaş ya da kopan) istemciler
+#
+# Çalıştırma:
+#   python loadtest.py --ws 100 --rest 20 --duration 30
+#   python loadtest.py --url http://127.0.0.1:8000 --ws 500 --json sonuc.json
+
+DEFAULT_PATHS = (
+    "/status",
+    "/rsi/{symbol}?timeframe=M1",
+    "/ohlc/{symbol}?count=100&format=delta",
+    "/indicators/{symbol}?indicators=rsi:5,atr:14&count=100",
+)
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": None, "p99": None, "max": None}
+    a = np.asarray(values) * 1000
+    return {"p50": round(float(np.percentile(a, 50)), 2), "p99": round(float(np.percentile(a, 99)), 2),
+            "max": round(float(a.max()), 2)}
+
+
+def start_server(port, args):
+    env = dict(os.environ, MT5_FAKE="1", WS_INTERVAL=str(args.ws_interval), BOT_SYMBOLS=",".join(args.symbols))
+    env.setdefault("BAR_STORE_ENABLED", "0")
+    for name, value in (("LATENCY", args.latency / 1000), ("LATENCY_JITTER", args.jitter / 1000),
+                        ("FAIL_RATE", args.fail_rate), ("SPEED", args.speed)):
+        env[f"FAKE_MT5_{name}"] = str(value)
+    return subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+
+
+async def wait_ready(url, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{url}/status")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError("sunucu hazır olmadı")
+
+
+async def rest_caller(client, paths, stats, stop):
+    i = 0
+    while not stop.is_set():
+        name, path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        elapsed = time.perf_counter() - start
+        entry = stats[name]
+        entry["latency"].append(elapsed)
+        if not ok:
+            entry["errors"] += 1
+
+
+async def ws_client(url, stats, stop):
+    try:
+        async with websockets.connect(url, max_queue=None) as ws:
+            while not stop.is_set():
+                try:
+                    message = await asyncio.wait_for(ws.recv(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    continue
+                received = datetime.utcnow()
+                stats["messages"] += 1
+                sent = json.loads(message).get("time")
+                if sent:
+                    stats["lag"].append((received - datetime.fromisoformat(sent)).total_seconds())
+    except (websockets.ConnectionClosed, OSError):
+        stats["dropped"] += 1
+
+
+async def run(args):
+    server = None
+    url = args.url
+    if url is None:
+        url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args.port, args)
+    try:
+        await wait_ready(url)
+        await asyncio.sleep(args.warmup)
+        paths = [(p.split("?")[0], p.format(symbol=s)) for p in args.paths for s in args.symbols]
+        rest_stats = {name: {"latency": [], "errors": 0} for name, _ in paths}
+        ws_stats = {"messages": 0, "lag": [], "dropped": 0}
+        stop = asyncio.Event()
+        limits = httpx.Limits(max_connections=args.rest, max_keepalive_connections=args.rest)
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0) as client:
+            ws_base = url.replace("http", "ws", 1)
+            tasks = [asyncio.create_task(ws_client(f"{ws_base}/ws/{args.symbols[i % len(args.symbols)]}", ws_stats, stop))
+                     for i in range(args.ws)]
+            tasks += [asyncio.create_task(rest_caller(client, paths[i % len(paths):] + paths[:i % len(paths)],
+                                                      rest_stats, stop)) for i in range(args.rest)]
+            start = time.perf_counter()
+            await asyncio.sleep(args.duration)
+            stop.set()
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {"duration": round(elapsed, 2), "ws_clients": args.ws, "rest_callers": args.rest, "rest": {}}
+    total = 0
+    for name, entry in rest_stats.items():
+        count = len(entry["latency"])
+        total += count
+        report["rest"][name] = {"requests": count, "rps": round(count / elapsed, 1), "errors": entry["errors"],
+                                **percentiles(entry["latency"])}
+    report["rest_rps"] = round(total / elapsed, 1)
+    report["ws"] = {"messages": ws_stats["messages"], "msg_per_s": round(ws_stats["messages"] / elapsed, 1),
+                    "dropped": ws_stats["dropped"], **percentiles(ws_stats["lag"])}
+    return report
+
+
+def print_report(report):
+    print(f"[LOADTEST] {report['duration']} sn, {report['ws_clients']} ws, {report['rest_callers']} REST")
+    print(f"{'endpoint':>28} {'istek':>8} {'istek/sn':>9} {'hata':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, r in report["rest"].items():
+        print(f"{name:>28} {r['requests']:>8} {r['rps']:>9} {r['errors']:>6} {r['p50']!s:>8} {r['p99']!s:>8} {r['max']!s:>8}")
+    print(f"{'REST toplam':>28} {'':>8} {report['rest_rps']:>9}")
+    ws = report["ws"]
+    print(f"{'websocket':>28} {ws['messages']:>8} {ws['msg_per_s']:>9} {ws['dropped']:>6} {ws['p50']!s:>8} "
+          f"{ws['p99']!s:>8} {ws['max']!s:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sahte terminale karşı API yük testi")
+    parser.add_argument("--url", help="çalışan sunucu (verilmezse MT5_FAKE=1 ile başlatılır)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ws", type=int, default=50, help="websocket istemci sayısı")
+    parser.add_argument("--rest", type=int, default=10, help="eşzamanlı REST çağırıcı sayısı")
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--symbols", nargs="+", default=["XAUUSD"])
+    parser.add_argument("--paths", nargs="+", default=list(DEFAULT_PATHS))
+    parser.add_argument("--ws-interval", type=float, default=1.0, help="yayın aralığı (başlatılan sunucu)")
+    parser.add_argument("--latency", type=float, default=1.0, help="sahte terminal gecikmesi, ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="ek üstel gecikme ortalaması, ms")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--speed", type=float, default=1.0, help="simülasyon saati hızı")
+    parser.add_argument("--json", help="raporu bu dosyaya yaz")
+    args = parser.parse_args()
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
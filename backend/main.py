@@ -1,17 +1,45 @@
 import os
 import asyncio
-from fastapi import FastAPI, WebSocket, BackgroundTasks, HTTPException
+import json
+import sys
+import tempfile
+import time
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, BackgroundTasks, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from dotenv import load_dotenv
-import MetaTrader5 as mt5
 import atexit
 from datetime import datetime, timedelta
+from bar_cache import BarCache
+from mt5_gateway import MT5Gateway, MT5Timeout
+from ws_hub import WSHub
+from bar_store import BarStore, BarSyncer
+from tick_store import TickStore, TickRecorder
+from resampler import ResamplerSet, parse_timeframe, resample
+from batch_close import BatchCloser
+from risk import RiskEngine
+from snapshot import AccountSnapshot
+from metrics import registry, monitor_loop_lag, STAGE_SECONDS, SIGNAL_TO_ORDER_SECONDS
+from strategy import RSIMartingale, StrategyScheduler
+from deal_journal import DealJournal
+from event_log import LEVELS as LOG_LEVELS, events, log
+from indicators import IndicatorCache, compute as compute_indicator, get_stream, parse_spec, warmup as indicator_warmup
+import ohlc_codec
+import numpy as np
 
 load_dotenv()
 
-MT5_LOGIN = int(os.getenv("MT5_LOGIN"))
+# MT5_FAKE=1 ile Linux'ta sahte terminal kullanılır
+if os.getenv("MT5_FAKE") == "1":
+    import fake_mt5 as mt5
+else:
+    import MetaTrader5 as mt5
+
+MT5_LOGIN = int(os.getenv("MT5_LOGIN", "0"))
 MT5_PASSWORD = os.getenv("MT5_PASSWORD")
 MT5_SERVER = os.getenv("MT5_SERVER")
+MT5_PATH = os.getenv("MT5_PATH")  # Birden fazla terminal kuruluysa bu sürecin bağlanacağı terminal64.exe
 
 app = FastAPI()
 
@@ -21,306 +49,450 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Cursor"],  # /ohlc artımlı çekme için
+)
+# Tüm terminal çağrıları tek bir MT5 thread'inde sıralanır
+gateway = MT5Gateway(
+    mt5,
+    default_timeout=float(os.getenv("MT5_TIMEOUT", "10.0")),
 )
+
 # MT5 başlat
-if not mt5.initialize(login=MT5_LOGIN, password=MT5_PASSWORD, server=MT5_SERVER):
-    print("MT5 başlatılamadı:", mt5.last_error())
+if not gateway.call(mt5.initialize, *([MT5_PATH] if MT5_PATH else []), login=MT5_LOGIN, password=MT5_PASSWORD,
+                    server=MT5_SERVER):
+    log("MT5", "error", "MT5 başlatılamadı: {error}", error=gateway.call(mt5.last_error))
+    events.close()
     exit(1)
 
-# Bot durumu ve değişkenler
-bot_state = {
-    "bot_active": True,
-    "total_profit_today": 0.0,
-    "current_lot": 0.01,
-    "trade_direction": None,  # "BUY" veya "SELL"
-    "last_rsi_signal": None,  # "BUY" veya "SELL"
-    "positions": [],
-    "max_lot": 0.16,
-    "profit_target": 100.0,
-    "last_profit_reset": datetime.utcnow().date(),
-    "no_trade_today": False,  # Kar hedefi sonrası gün sonuna kadar işlem açılmasın
-}
-
-# Yardımcı fonksiyon: RSI hesaplama (Basit, Close fiyatları ile)
-def calculate_rsi(closes, period=5):
-    # Kapanışlar en eski -> en yeni sırada olmalı
-    if len(closes) < period + 1:
+# Tüm tüketicilerin (bot, REST, websocket) ortak bar önbelleği
+bar_cache = BarCache(gateway, min_refresh=float(os.getenv("BAR_CACHE_REFRESH", "1.0")))
+
+# Yerel geçmiş bar deposu ve terminalden arkaplan senkronizasyonu
+bar_store = BarStore(os.getenv("BAR_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "bars")))
+bar_syncer = BarSyncer(
+    bar_store, gateway,
+    [(s, tf) for s in os.getenv("BAR_STORE_SYMBOLS", "XAUUSD").split(",")
+     for tf in (mt5.TIMEFRAME_M1,)],
+    interval=float(os.getenv("BAR_STORE_SYNC", "60")),
+)
+
+# Tik kaydı: son tikler bellekte sabit boy halkada, eskileri sıkıştırılmış segmentlerde
+tick_store = TickStore(
+    os.getenv("TICK_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ticks")),
+    capacity=int(os.getenv("TICK_RING_SIZE", "100000")),
+    segment_seconds=float(os.getenv("TICK_SEGMENT_SECONDS", "600")),
+)
+tick_recorder = TickRecorder(
+    tick_store, gateway, mt5,
+    [s.strip() for s in os.getenv("TICK_SYMBOLS", os.getenv("BOT_SYMBOLS", "XAUUSD")).split(",") if s.strip()],
+    interval=float(os.getenv("TICK_INTERVAL", "1.0")),
+)
+
+# M1 dışındaki tüm timeframe'ler tek M1 akışından türetilir
+resamplers = ResamplerSet(bar_cache, mt5.TIMEFRAME_M1, bar_store)
+
+CLOSE_COOLDOWN = float(os.getenv("CLOSE_COOLDOWN", "10"))  # Toplu kapamadan sonra bekleme
+
+# Sepet kapama: tek fiyat görüntüsü, sınırlı eşzamanlılık, requote tekrarı
+batch_closer = BatchCloser(gateway, mt5, concurrency=int(os.getenv("CLOSE_CONCURRENCY", "8")), deviation=10)
+
+# Gösterge serileri: (sembol, timeframe, gösterge, parametreler) başına LRU;
+# yeni bar geldiğinde sadece kuyruk yeniden hesaplanır
+indicator_cache = IndicatorCache(max_entries=int(os.getenv("INDICATOR_CACHE_SIZE", "256")))
+INDICATOR_BARS = int(os.getenv("INDICATOR_BARS", "2000"))  # Önbellekli serinin uzunluğu
+
+# Emir öncesi risk kontrolü: önbellekli sembol bilgisi, kısa TTL'li hesap görüntüsü
+risk_engine = RiskEngine(
+    gateway, mt5,
+    account_ttl=float(os.getenv("RISK_ACCOUNT_TTL", "1.0")),
+    max_basket_volume=float(os.getenv("RISK_MAX_BASKET_LOTS", "0")),
+    max_exposure=float(os.getenv("RISK_MAX_EXPOSURE", "0")),
+    min_margin_level=float(os.getenv("RISK_MIN_MARGIN_LEVEL", "100")),
+)
+
+# Emir yolu histogramları (etiket araması her kayıtta tekrarlanmasın)
+market_data_seconds = STAGE_SECONDS.labels(stage="market_data")
+indicator_seconds = STAGE_SECONDS.labels(stage="indicator")
+signal_to_order_seconds = SIGNAL_TO_ORDER_SECONDS.labels()
+
+# Yardımcı fonksiyon: Barları getir. M1 önbellekten, diğerleri M1'den türetilir.
+async def get_bars(symbol: str, timeframe: str, count: int = 100):
+    seconds = parse_timeframe(timeframe)
+    if seconds is None:
         return None
-    # Son (period+1) kapanışı al
-    closes = list(closes)[- (period + 1):]
-    gains = []
-    losses = []
-    for i in range(1, period + 1):
-        diff = closes[i] - closes[i - 1]
-        if diff > 0:
-            gains.append(diff)
-            losses.append(0)
-        else:
-            gains.append(0)
-            losses.append(-diff)
-    avg_gain = sum(gains) / period
-    avg_loss = sum(losses) / period
-    if avg_loss == 0:
-        return 100.0
-    rs = avg_gain / avg_loss
-    rsi = 100.0 - (100.0 / (1 + rs))
-    return round(rsi, 2)
-
-# Yardımcı fonksiyon: MT5 üzerinden RSI getir
-def get_rsi_value(symbol: str, timeframe: int, period: int = 5, count: int = 100):
-    rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, count)
+    return await get_bars_seconds(symbol, seconds, count)
+
+async def get_bars_seconds(symbol: str, seconds: int, count: int = 100):
+    start = time.perf_counter()
+    if seconds == 60:
+        rates = await bar_cache.get(symbol, mt5.TIMEFRAME_M1, count)
+    else:
+        rates = await resamplers.get(symbol, seconds, count)
+    market_data_seconds.observe(time.perf_counter() - start)
+    return rates
+
+# Yardımcı fonksiyon: RSI getir (artımlı akış; bot, REST ve websocket ortak)
+async def get_rsi_value(symbol: str, timeframe: str, period: int = 5, count: int = 100, method: str = "sma"):
+    rates = await get_bars(symbol, timeframe, count)
     if rates is None:
-        print(f"[RSI ERROR] Sembol: {symbol}, Timeframe: {timeframe}, rates=None")
+        log("RSI", "error", "Sembol: {symbol}, Timeframe: {timeframe}, rates=None", symbol=symbol, timeframe=timeframe)
         return None
     if len(rates) < period + 1:
-        print(f"[RSI ERROR] Sembol: {symbol}, Timeframe: {timeframe}, Veri yetersiz! (Adet: {len(rates)})")
+        log("RSI", "error", "Sembol: {symbol}, Timeframe: {timeframe}, Veri yetersiz! (Adet: {count})",
+            symbol=symbol, timeframe=timeframe, count=len(rates))
         return None
-    closes = [r['close'] for r in rates]
-    # Emin olmak için kapanışları en eski -> en yeni sırada kullanıyoruz
-    # (MT5 genellikle bu sırada döner, ama garanti için dokunmuyoruz)
-    print(f"[RSI DEBUG] Sembol: {symbol}, Timeframe: {timeframe}, Kapanışlar: {closes[-6:]}")
-    return calculate_rsi(closes, period)
-
-# Yardımcı fonksiyon: Tüm pozisyonları kapat
-def close_all_positions():
-    positions = mt5.positions_get(symbol="XAUUSD")
-    if not positions:
-        return 0.0
-
-    total_profit = 0.0
-
-    for pos in positions:
-        volume = pos.volume
-        close_type = mt5.ORDER_TYPE_SELL if pos.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
-        price = mt5.symbol_info_tick("XAUUSD").bid if pos.type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick("XAUUSD").ask
-
-        request = {
-            "action": mt5.TRADE_ACTION_DEAL,
-            "symbol": pos.symbol,
-            "volume": volume,
-            "type": close_type,
-            "position": pos.ticket,
-            "price": price,
-            "deviation": 10,
-            "magic": 234000,
-            "comment": "RSI Bot Kapat",
-            "type_time": mt5.ORDER_TIME_GTC,
-            "type_filling": mt5.ORDER_FILLING_IOC,
-        }
-        result = mt5.order_send(request)
-        if result.retcode == mt5.TRADE_RETCODE_DONE:
-            total_profit += pos.profit
-
-    return total_profit
-
-# Yardımcı fonksiyon: Pozisyon aç
-def open_position(direction: str):
-    if bot_state.get("no_trade_today", False):
-        print("[INFO] Bugün tekrar işlem açılmayacak.")
-        return False
-    if bot_state["last_rsi_signal"] == direction:
-        # Aynı yönde işlem varsa işlem yapma
-        return False
-    if bot_state["trade_direction"] and bot_state["trade_direction"] != direction:
-        # Trend değişmiş, lot artır (max 0.16)
-        new_lot = min(bot_state["current_lot"] * 2, bot_state["max_lot"])
-        bot_state["current_lot"] = new_lot
-    else:
-        # İlk işlem veya aynı trend devamı
-        bot_state["current_lot"] = 0.01
-    tick = mt5.symbol_info_tick("XAUUSD")
-    if tick is None:
-        print("[ERROR] Tick verisi alınamadı.")
-        return False
-    price = tick.ask if direction == "BUY" else tick.bid
-    order_type = mt5.ORDER_TYPE_BUY if direction == "BUY" else mt5.ORDER_TYPE_SELL
-    request = {
-        "action": mt5.TRADE_ACTION_DEAL,
-        "symbol": "XAUUSD",
-        "volume": bot_state["current_lot"],
-        "type": order_type,
-        "price": price,
-        "deviation": 10,
-        "magic": 234000,
-        "comment": "RSI Bot Trade",
-        "type_time": mt5.ORDER_TIME_GTC,
-        "type_filling": mt5.ORDER_FILLING_IOC,
-    }
-    result = mt5.order_send(request)
-    if result.retcode != mt5.TRADE_RETCODE_DONE:
-        print(f"[ERROR] İşlem başarısız: {result.retcode}")
-        return False
-    bot_state["trade_direction"] = direction
-    bot_state["last_rsi_signal"] = direction
-    print(f"[INFO] {direction} işlemi açıldı, lot: {bot_state['current_lot']}")
-    return True
-
-# Günlük kâr reseti
-def reset_daily_profit_if_needed():
-    today = datetime.utcnow().date()
-    if bot_state["last_profit_reset"] != today:
-        bot_state["total_profit_today"] = 0.0
-        bot_state["current_lot"] = 0.01
-        bot_state["trade_direction"] = None
-        bot_state["last_rsi_signal"] = None
-        bot_state["positions"] = []
-        bot_state["last_profit_reset"] = today
-        bot_state["no_trade_today"] = False  # Gün başında tekrar işlem açılabilir
-        print("[INFO] Günlük kar hedefi ve işlem izni resetlendi.")
-
-# Arkaplan task: Bot mantığı (async)
-async def bot_logic():
-    while True:
-        if bot_state["bot_active"]:
-            reset_daily_profit_if_needed()
-            if bot_state.get("no_trade_today", False):
-                print("[INFO] Bugün tekrar işlem açılmayacak (no_trade_today aktif).")
-                await asyncio.sleep(5)
-                continue
-            if bot_state["total_profit_today"] >= bot_state["profit_target"]:
-                profit = close_all_positions()
-                bot_state["total_profit_today"] += profit
-                print("[INFO] Bugün hedefe ulaşıldı, işlem durduruldu.")
-                bot_state["no_trade_today"] = True
-                await asyncio.sleep(10)
-                continue
-            rsi_1m = get_rsi_value("XAUUSD", mt5.TIMEFRAME_M1, period=5)
-            rsi_5m = get_rsi_value("XAUUSD", mt5.TIMEFRAME_M5, period=5)
-            if rsi_1m is None or rsi_5m is None:
-                print("[WARN] RSI verisi alınamadı.")
-                await asyncio.sleep(5)
-                continue
-            print(f"[DEBUG] RSI 1m: {rsi_1m}, RSI 5m: {rsi_5m}")
-            # 5dk RSI ile toplu pozisyon kapama
-            if bot_state["trade_direction"] == "BUY" and rsi_5m >= 80:
-                profit = close_all_positions()
-                bot_state["total_profit_today"] += profit
-                print(f"[INFO] 5dk RSI 80+, tüm BUY pozisyonları kapatıldı. Güncel kar: {bot_state['total_profit_today']}")
-                bot_state["trade_direction"] = None
-                bot_state["last_rsi_signal"] = None
-                bot_state["current_lot"] = 0.01
-                await asyncio.sleep(10)
-                continue
-            if bot_state["trade_direction"] == "SELL" and rsi_5m <= 20:
-                profit = close_all_positions()
-                bot_state["total_profit_today"] += profit
-                print(f"[INFO] 5dk RSI 20-, tüm SELL pozisyonları kapatıldı. Güncel kar: {bot_state['total_profit_today']}")
-                bot_state["trade_direction"] = None
-                bot_state["last_rsi_signal"] = None
-                bot_state["current_lot"] = 0.01
-                await asyncio.sleep(10)
-                continue
-            # 1dk RSI ile işlem açma
-            if rsi_1m >= 80:
-                open_position("BUY")
-            elif rsi_1m <= 20:
-                open_position("SELL")
-        await asyncio.sleep(5)  # 5 saniyede bir kontrol
+    # MT5 barları en eski -> en yeni sırada döner; akış sadece yeni/güncellenen barları işler
+    if events.enabled("RSI", "debug"):
+        log("RSI", "debug", "Sembol: {symbol}, Timeframe: {timeframe}, Kapanışlar: {closes}", symbol=symbol,
+            timeframe=timeframe, closes=rates["close"][-6:].tolist())
+    start = time.perf_counter()
+    value = get_stream(symbol, parse_timeframe(timeframe), f"rsi:{period}:{method}").feed(rates)
+    indicator_seconds.observe(time.perf_counter() - start)
+    return value
+
+# Stratejinin gösterge grafiği: timeframe başına bir bar okuması, düğüm başına bir akış
+async def get_indicator_values(symbol: str, graph, count: int = 100):
+    rates = {seconds: await get_bars_seconds(symbol, seconds, count) for seconds in graph.timeframes()}
+    start = time.perf_counter()
+    values = graph.evaluate(symbol, rates)
+    indicator_seconds.observe(time.perf_counter() - start)
+    return values
+
+# Tick tespitinden emir sonucuna kadar geçen süre
+def record_signal_latency(event):
+    if event is not None:
+        elapsed = time.perf_counter() - event.detected
+        scheduler.order_latency.record(elapsed)
+        signal_to_order_seconds.observe(elapsed)
+
+# Gerçekleşen kar defteri: sadece yeni işlemler çekilir, toplamlar artımlı
+deal_journal = DealJournal()
+
+# Sembol başına strateji; hepsi tek zamanlayıcı ve tek event loop üzerinde çalışır
+BOT_SYMBOLS = [s.strip() for s in os.getenv("BOT_SYMBOLS", "XAUUSD").split(",") if s.strip()]
+for _symbol in BOT_SYMBOLS:
+    gateway.call(mt5.symbol_select, _symbol, True)
+strategies = [
+    RSIMartingale(s, gateway, mt5, batch_closer, get_indicator_values, close_cooldown=CLOSE_COOLDOWN,
+                 on_order=record_signal_latency, journal=deal_journal, risk=risk_engine)
+    for s in BOT_SYMBOLS
+]
+scheduler = StrategyScheduler(
+    gateway, bar_cache, strategies, mt5.TIMEFRAME_M1, bar_count=resamplers.m1_window,
+    min_interval=float(os.getenv("WATCH_MIN_INTERVAL", "0.25")),
+    max_interval=float(os.getenv("WATCH_MAX_INTERVAL", "2.0")),
+    closed_interval=float(os.getenv("WATCH_CLOSED_INTERVAL", "30.0")),
+)
 
 # API endpointler (diğerlerin üstüne ekleyebilirsin)
 
+# WebSocket güncellemesi: sembol başına bir kez hesaplanır, tüm abonelere dağıtılır
+async def ws_payload(symbol: str):
+    rsi = await get_rsi_value(symbol, "M1")
+    bars = await get_bars(symbol, "M1", 1)  # önbellekten; RSI'ın ait olduğu oluşan bar
+    tick = await gateway.symbol_info_tick(symbol)
+    return {
+        "rsi": rsi,
+        "bar_time": int(bars["time"][-1]) if bars is not None and len(bars) else None,
+        "bid": tick.bid if tick else None,
+        "ask": tick.ask if tick else None,
+        "time": datetime.utcnow().isoformat(),
+    }
+
+ws_hub = WSHub(ws_payload, interval=float(os.getenv("WS_INTERVAL", "5")), queue_size=int(os.getenv("WS_QUEUE_SIZE", "8")))
+
 @app.websocket("/ws/{symbol}")
 async def websocket_endpoint(websocket: WebSocket, symbol: str):
     await websocket.accept()
+    sub = ws_hub.subscribe(symbol)
     try:
         while True:
-            # Örnek: her 5 saniyede RSI ve fiyat gönder
-            rsi = get_rsi_value(symbol, mt5.TIMEFRAME_M1)
-            tick = mt5.symbol_info_tick(symbol)
-            data = {
-                "rsi": rsi,
-                "bid": tick.bid if tick else None,
-                "ask": tick.ask if tick else None,
-                "time": datetime.utcnow().isoformat(),
-            }
-            await websocket.send_json(data)
-            await asyncio.sleep(5)
+            message = await sub.queue.get()
+            if message is None:
+                # Kuyruğu taşan (yavaş) istemci düşürüldü
+                await websocket.close(code=1013)
+                break
+            await websocket.send_text(message)
     except WebSocketDisconnect:
-        print(f"WebSocket bağlantısı kesildi: {symbol}")
+        log("WS", "info", "WebSocket bağlantısı kesildi: {symbol}", symbol=symbol)
+    finally:
+        ws_hub.unsubscribe(sub)
 
 
 @app.get("/ohlc/{symbol}")
-async def get_ohlc(symbol: str, timeframe: str = "M1", count: int = 100):
-    tf_map = {
-        "M1": mt5.TIMEFRAME_M1,
-        "M5": mt5.TIMEFRAME_M5,
-        "H1": mt5.TIMEFRAME_H1,
-    }
-    tf = tf_map.get(timeframe.upper())
-    if tf is None:
+async def get_ohlc(request: Request, symbol: str, timeframe: str = "M1", count: int = 100, start: int = None,
+                   end: int = None, since: int = None, format: str = "rows"):
+    seconds = parse_timeframe(timeframe)
+    if seconds is None:
         raise HTTPException(status_code=400, detail="Invalid timeframe")
+    if format not in ohlc_codec.FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid format")
+    if not ohlc_codec.available(format):
+        raise HTTPException(status_code=406, detail=f"{format} desteği kurulu değil")
 
-    rates = mt5.copy_rates_from_pos(symbol, tf, 0, count)
-    if rates is None:
-        raise HTTPException(status_code=404, detail="Symbol not found or no data")
-
-    ohlc_data = []
-    for r in rates:
-        ohlc_data.append({
-            "time": r['time'],
-            "open": r['open'],
-            "high": r['high'],
-            "low": r['low'],
-            "close": r['close'],
-            "tick_volume": r['tick_volume'],
-        })
-    return ohlc_data
+    if start is not None or end is not None:
+        # Zaman aralığı: MT5'e gitmeden yerel depodaki M1 barlarından (kapanmış barlar)
+        series = bar_store.get(symbol, mt5.TIMEFRAME_M1)
+        if seconds == 60:
+            rates = series.range_columns(start, end)
+        else:
+            # Aralığın başındaki üst bar tam olsun diye başlangıç kovaya hizalanır
+            rates = resample(series.range(None if start is None else start - start % seconds, end), seconds)
+        if len(rates["time"]) == 0:
+            raise HTTPException(status_code=404, detail="No stored bars in range")
+    else:
+        rates = await get_bars(symbol, timeframe, count)
+        if rates is None:
+            raise HTTPException(status_code=404, detail="Symbol not found or no data")
+
+    # since: sadece bu zamandan itibaren olan barlar (oluşan bar dahil); istemci
+    # X-Cursor başlığındaki son bar zamanıyla bir sonraki isteği yapar
+    columns = ohlc_codec.select(rates, since)
+    tag = ohlc_codec.etag(f"{symbol}:{timeframe}:{count}:{start}:{end}:{since}:{format}", columns)
+    headers = {"ETag": tag, "Vary": "Accept-Encoding"}
+    if len(columns["time"]):
+        headers["X-Cursor"] = str(int(columns["time"][-1]))
+    if request.headers.get("if-none-match") == tag:
+        return Response(status_code=304, headers=headers)
+    body = ohlc_codec.encode(columns, format)
+    body, encoding = ohlc_codec.compress(body, request.headers.get("accept-encoding", ""))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=ohlc_codec.MEDIA_TYPES[format], headers=headers)
 
 @app.get("/rsi/{symbol}")
-async def get_rsi(symbol: str, timeframe: str = "M1", period: int = 5):
-    tf_map = {
-        "M1": mt5.TIMEFRAME_M1,
-        "M5": mt5.TIMEFRAME_M5,
-        "H1": mt5.TIMEFRAME_H1,
-    }
-    tf = tf_map.get(timeframe.upper())
-    if tf is None:
+async def get_rsi(symbol: str, timeframe: str = "M1", period: int = 5, method: str = "sma"):
+    if parse_timeframe(timeframe) is None:
         raise HTTPException(status_code=400, detail="Invalid timeframe")
+    if method not in ("sma", "wilder"):
+        raise HTTPException(status_code=400, detail="Invalid method")
 
-    rates = mt5.copy_rates_from_pos(symbol, tf, 0, 100)
-    if rates is None or len(rates) < period + 1:
+    rsi_value = await get_rsi_value(symbol, timeframe.upper(), period, method=method)
+    if rsi_value is None:
         raise HTTPException(status_code=404, detail="Symbol not found or insufficient data")
-
-    closes = [r['close'] for r in rates]
-    rsi_value = calculate_rsi(closes, period)
     return {"rsi": rsi_value}
 
+# indicators: virgülle ayrılmış "ad:parametre:..." listesi (rsi:14:wilder, ema:20, sma:50)
+# Yanıt barlarla hizalı sütunlardır: {"time": [...], "rsi:14:wilder": [...], "cursor": ..};
+# ısınma bölgesi null. start/end verilirse yerel depodaki kapanmış barlardan hesaplanır.
+@app.get("/indicators/{symbol}")
+async def get_indicators(request: Request, symbol: str, timeframe: str = "M1", indicators: str = "rsi:5",
+                         count: int = 100, start: int = None, end: int = None):
+    seconds = parse_timeframe(timeframe)
+    if seconds is None:
+        raise HTTPException(status_code=400, detail="Invalid timeframe")
+    try:
+        specs = [(spec.strip(), *parse_spec(spec)) for spec in indicators.split(",") if spec.strip()]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not specs or count < 1:
+        raise HTTPException(status_code=400, detail="Invalid indicators")
+    timeframe = timeframe.upper()
+
+    if start is not None or end is not None:
+        # Aralık öncesinden ısınma payı: her göstergenin kendi penceresi / yakınsaması
+        warmup = max(indicator_warmup(name, params) for _, name, params in specs) * seconds
+        series = bar_store.get(symbol, mt5.TIMEFRAME_M1)
+        bars = series.range(None if start is None else start - start % seconds - warmup, end)
+        if seconds != 60:
+            bars = resample(bars, seconds)
+        if len(bars) == 0:
+            raise HTTPException(status_code=404, detail="No stored bars in range")
+        results = [(spec, compute_indicator(bars, name, params)) for spec, name, params in specs]
+        rows = slice(0 if start is None else int(np.searchsorted(bars["time"], start)), None)
+    else:
+        bars = await get_bars(symbol, timeframe, max(count, INDICATOR_BARS))
+        if bars is None or len(bars) == 0:
+            raise HTTPException(status_code=404, detail="Symbol not found or no data")
+        results = [(spec, indicator_cache.get((symbol, timeframe, name, tuple(sorted(params.items()))),
+                                              bars, name, params))
+                   for spec, name, params in specs]
+        rows = slice(-count, None)
+
+    body = {"time": bars["time"][rows].tolist()}
+    for spec, outputs in results:
+        for output, values in outputs.items():
+            column = spec if output == "value" else f"{spec}.{output}"
+            body[column] = [None if v != v else v for v in values[rows].tolist()]
+    body["cursor"] = body["time"][-1] if body["time"] else None
+    payload, encoding = ohlc_codec.compress(json.dumps(body, separators=(",", ":")).encode(),
+                                            request.headers.get("accept-encoding", ""))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(payload, media_type="application/json", headers=headers)
+
+# Tik aralığı (epoch saniye, kesirli olabilir); varsayılan son 60 sn. Halka ve
+# disk segmentleri birleşik okunur; limit aşılırsa `next` ile devam edilir
+# (limitten büyük tek bir ms grubu bölünmeden tek sayfada döner)
+@app.get("/ticks/{symbol}")
+async def get_ticks(request: Request, symbol: str, start: float = None, end: float = None, limit: int = 50000):
+    if symbol not in tick_recorder.symbols:
+        raise HTTPException(status_code=404, detail="Symbol not recorded")
+    hi = int(end * 1000) if end is not None else int(time.time() * 1000)
+    lo = int(start * 1000) if start is not None else hi - 60000
+    ticks, next_msc = tick_store.range(symbol, lo, hi, max(1, min(limit, 500000)))
+    body = {name: ticks[name].tolist() for name in ticks.dtype.names}
+    body["next"] = next_msc
+    body["cursor"] = int(ticks["time_msc"][-1]) if len(ticks) else None
+    payload, encoding = ohlc_codec.compress(json.dumps(body, separators=(",", ":")).encode(),
+                                            request.headers.get("accept-encoding", ""))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(payload, media_type="application/json", headers=headers)
+
+@app.get("/cache")
+async def get_cache_stats():
+    return {"bars": bar_cache.stats(), "resampled": resamplers.stats(), "gateway": gateway.stats(), "ws": ws_hub.stats(),
+            "scheduler": scheduler.stats(), "store": bar_store.stats(), "close": batch_closer.stats(),
+            "journal": deal_journal.stats(), "indicators": indicator_cache.stats(),
+            "risk": risk_engine.stats(), "snapshot": account_snapshot.stats(), "ticks": tick_recorder.stats()}
+
+# Son olaylar (halka tampon); since=önceki yanıtın cursor'ı ile sadece yeniler
+@app.get("/logs")
+async def get_logs(level: str = None, category: str = None, since: int = None, contains: str = None,
+                   limit: int = 200):
+    if level is not None and level not in LOG_LEVELS:
+        raise HTTPException(status_code=400, detail=f"level: {', '.join(LOG_LEVELS)}")
+    categories = {c.strip() for c in category.split(",") if c.strip()} if category else None
+    items = events.query(level, categories, since, contains, max(1, min(limit, events.ring.maxlen)))
+    return {"events": items, "cursor": items[-1]["seq"] if items else since, "stats": events.stats()}
+
+# Prometheus metin formatı: emir yolu histogramları, event loop gecikmesi, kuyruklar
+registry.gauge("mt5_gateway_queue_depth", "MT5 thread'inde bekleyen çağrı sayısı", gateway.depth)
+registry.gauge("ws_subscribers", "Sembol başına websocket abonesi",
+               lambda: {(("symbol", s),): len(subs) for s, subs in ws_hub.subscribers.items()})
+registry.gauge("bar_cache_hit_ratio", "Bar önbelleği isabet oranı", lambda: bar_cache.stats()["hit_ratio"])
+
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+# Geriye uyumluluk: üst seviyede ilk sembolün durumu, `symbols` altında hepsi
+def status_payload():
+    states = scheduler.states()
+    status = states[BOT_SYMBOLS[0]].as_dict() if BOT_SYMBOLS else {}
+    status["bot_active"] = scheduler.active
+    status["symbols"] = {s: state.as_dict() for s, state in states.items()}
+    status["realized"] = deal_journal.as_dict()
+    return status
+
 @app.get("/status")
 async def get_status():
-    return bot_state
+    return status_payload()
+
+ACCOUNT_FIELDS = ("login", "balance", "equity", "profit", "margin", "margin_free", "currency", "leverage", "name",
+                  "server")
+account_snapshot = AccountSnapshot(gateway, mt5, lambda: jsonable_encoder(status_payload()),
+                                   interval=float(os.getenv("SNAPSHOT_INTERVAL", "1.0")))
+
+@app.get("/status/{symbol}")
+async def get_symbol_status(symbol: str):
+    state = scheduler.states().get(symbol)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Symbol not traded")
+    return state.as_dict()
 
+# symbol verilmezse tüm bot, verilirse sadece o sembol
 @app.post("/toggle")
-async def toggle_bot(state: bool):
-    bot_state["bot_active"] = state
-    return bot_state
+async def toggle_bot(state: bool, symbol: str = None):
+    account_snapshot.poke()  # akış aboneleri değişikliği aralığı beklemeden görsün
+    if symbol is None:
+        scheduler.active = state
+        return await get_status()
+    strategy_state = scheduler.states().get(symbol)
+    if strategy_state is None:
+        raise HTTPException(status_code=404, detail="Symbol not traded")
+    strategy_state.bot_active = state
+    return strategy_state.as_dict()
 
+# Hesap ve pozisyonlar ortak görüntüden; eşzamanlı çağrılar tek terminal okumasını paylaşır
 @app.get("/account")
 async def get_account_info():
-    info = mt5.account_info()
+    info = (await account_snapshot.refresh())["account"]
     if info is None:
         raise HTTPException(status_code=500, detail="MT5 account info alınamadı")
-    print(info.balance)  # Hesap bakiyesi
-    print(info.equity)   # Anlık toplam varlık (bakiyeye açık işlemler dahil)
-    print(info.profit)   # Açık işlemlerden toplam kar/zarar
-    return {
-        "login": info.login,
-        "balance": info.balance,
-        "equity": info.equity,
-        "profit": info.profit,
-        "margin": info.margin,
-        "margin_free": info.margin_free,
-        "currency": info.currency,
-        "leverage": info.leverage,
-        "name": info.name,
-        "server": info.server,
-    }
+    # Bakiye, anlık toplam varlık (açık işlemler dahil) ve açık işlemlerin kar/zararı
+    log("ACCOUNT", "debug", "bakiye {balance}, varlık {equity}, kar {profit}", balance=info["balance"],
+        equity=info["equity"], profit=info["profit"])
+    return {field: info.get(field) for field in ACCOUNT_FIELDS}
+
+@app.get("/positions")
+async def get_positions(symbol: str = None):
+    positions = (await account_snapshot.refresh())["positions"].values()
+    return [p for p in positions if symbol is None or p["symbol"] == symbol]
+
+# Server-sent events: önce tam görüntü (event: snapshot), sonra sadece değişen
+# alanlar (event: patch, JSON Merge Patch); boşta 15 sn'de bir yorum satırı
+@app.get("/stream")
+async def stream_snapshot(request: Request):
+    async def events_stream():
+        if account_snapshot.state is None:
+            await account_snapshot.refresh()
+        queue = account_snapshot.subscribe()  # ilk mesaj tam görüntü
+        try:
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), 15.0)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+        finally:
+            account_snapshot.unsubscribe(queue)
+
+    return StreamingResponse(events_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.exception_handler(MT5Timeout)
+async def mt5_timeout_handler(request, exc):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+# Hesap başına tek bot: `uvicorn main:app --workers N` ya da ikinci bir motor
+# aynı hesapta ikinci bir strateji döngüsü başlatamaz. Kilit süreç yaşadıkça
+# tutulur (işletim sistemi süreç ölünce bırakır). Birden fazla HTTP işçisi için
+# engine.py + `uvicorn api:app --workers N` kullanılır.
+BOT_LOCK_FILE = os.getenv("BOT_LOCK_FILE") or os.path.join(tempfile.gettempdir(), f"mt5bot-{MT5_LOGIN}.lock")
+bot_lock = None
+
+def acquire_bot_lock(path):
+    f = open(path, "a+")
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+def claim_bot():
+    global bot_lock
+    if bot_lock is None:
+        bot_lock = acquire_bot_lock(BOT_LOCK_FILE)
+        if bot_lock is None:
+            log("STRATEGY", "error", "Bu hesapta bot zaten çalışıyor ({path}); birden fazla işçi için engine.py + api.py kullanın",
+                path=BOT_LOCK_FILE)
+            raise RuntimeError(f"Bot kilidi alınamadı: {BOT_LOCK_FILE}")
 
 # Background task başlat
 @app.on_event("startup")
 async def startup_event():
-    asyncio.create_task(bot_logic())
+    claim_bot()
+    asyncio.create_task(monitor_loop_lag())
+    if os.getenv("BAR_STORE_ENABLED", "1") == "1":
+        asyncio.create_task(bar_syncer.run())
+    asyncio.create_task(deal_journal.run(gateway, float(os.getenv("JOURNAL_INTERVAL", "2.0"))))
+    asyncio.create_task(scheduler.run())
+    asyncio.create_task(account_snapshot.run())
+    if os.getenv("TICK_RECORDER_ENABLED", "1") == "1":
+        asyncio.create_task(tick_recorder.run())
 
-atexit.register(mt5.shutdown)
+atexit.register(gateway.shutdown)
+atexit.register(tick_store.flush_all)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,145 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from bar_cache import timeframe_seconds
+from event_log import log
+
+# Olay tabanlı piyasa izleyici
+#
+# Sabit `sleep(5)` yerine symbol_info_tick().time_msc izlenir. Tick değiştiğinde
+# (ve timeframe başına yeni bar açıldığında) bir MarketEvent yayınlanır; strateji
+# sadece girdiler gerçekten değiştiğinde çalışır.
+#
+# Yoklama aralığı uyarlanır: tick geldikçe `min_interval`, durgunlukta kademeli
+# olarak `max_interval`a kadar artar; piyasa kapalıyken (hafta sonu veya
+# `stale_after` saniyedir tick yoksa) `closed_interval` kullanılır.
+
+
+class MarketEvent:
+    __slots__ = ("version", "tick", "new_bars", "detected")
+
+    def __init__(self, version, tick, new_bars, detected):
+        self.version = version
+        self.tick = tick
+        self.new_bars = new_bars  # yeni bar açılan timeframe'ler
+        self.detected = detected  # time.perf_counter() anı
+
+
+class LatencyStats:
+    __slots__ = ("count", "total", "last", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "last_ms": round(self.last * 1000, 3),
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+def market_closed_now(now=None):
+    # Forex/metal piyasası: Cuma 22:00 UTC - Pazar 22:00 UTC arası kapalı
+    now = now or datetime.now(timezone.utc)
+    wd = now.weekday()
+    return wd == 5 or (wd == 4 and now.hour >= 22) or (wd == 6 and now.hour < 22)
+
+
+class MarketWatcher:
+    def __init__(self, gateway, symbol: str, timeframes=(), on_tick=None,
+                 min_interval: float = 0.25, max_interval: float = 2.0,
+                 closed_interval: float = 30.0, stale_after: float = 120.0):
+        self.gateway = gateway
+        self.symbol = symbol
+        self.timeframes = tuple(timeframes)
+        self.on_tick = on_tick  # fn(symbol, tick) -> her yeni tickte çağrılır (ör. bar önbelleği)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.closed_interval = closed_interval
+        self.stale_after = stale_after
+        self.interval = min_interval
+        self.version = 0
+        self.event = None
+        self.last_time_msc = None
+        self.last_change = time.monotonic()
+        self.bar_opens = {}
+        self._changed = asyncio.Event()
+        self.polls = 0
+        self.changes = 0
+        self.new_bar_count = 0
+        self.order_latency = LatencyStats()  # sinyal (tick tespiti) -> emir sonucu
+
+    async def run(self):
+        while True:
+            try:
+                tick = await self.gateway.symbol_info_tick(self.symbol)
+                self.polls += 1
+                self.handle(tick)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log("WATCH", "error", "Sembol: {symbol}, {error}", symbol=self.symbol, error=e)
+            await asyncio.sleep(self.interval)
+
+    def handle(self, tick):
+        now = time.monotonic()
+        if tick is None or tick.time_msc == self.last_time_msc:
+            # Değişiklik yok: aralığı aç
+            idle = now - self.last_change
+            if idle > self.stale_after or (idle > 10 and market_closed_now()):
+                self.interval = self.closed_interval
+            else:
+                self.interval = min(self.interval * 1.5, self.max_interval)
+            return
+        self.last_time_msc = tick.time_msc
+        self.last_change = now
+        self.interval = self.min_interval
+        new_bars = []
+        for tf in self.timeframes:
+            secs = timeframe_seconds(tf)
+            bar_open = tick.time - tick.time % secs
+            if self.bar_opens.get(tf) != bar_open:
+                if tf in self.bar_opens:
+                    new_bars.append(tf)
+                    self.new_bar_count += 1
+                self.bar_opens[tf] = bar_open
+        if self.on_tick is not None:
+            self.on_tick(self.symbol, tick)
+        self.changes += 1
+        self.version += 1
+        self.event = MarketEvent(self.version, tick, new_bars, time.perf_counter())
+        # Bekleyenleri uyandır ve yeni tur için olayı yenile
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    # `version`dan daha yeni bir olay gelene kadar bekle
+    async def wait(self, version: int = 0, timeout: float = None):
+        while self.event is None or self.event.version <= version:
+            waiter = self._changed
+            try:
+                await asyncio.wait_for(waiter.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self.event
+
+    def stats(self):
+        return {
+            "symbol": self.symbol,
+            "polls": self.polls,
+            "changes": self.changes,
+            "new_bars": self.new_bar_count,
+            "interval": round(self.interval, 3),
+            "signal_to_order": self.order_latency.as_dict(),
+        }
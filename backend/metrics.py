@@ -0,0 +1,155 @@
+import asyncio
+import time
+from bisect import bisect_left
+
+# Düşük maliyetli metrikler ve Prometheus metin formatı
+#
+# Histogramlar sabit kova sınırları üzerinde bisect (C) ile sayar; kayıt başına
+# maliyet bir arama ve iki toplamadır (~birkaç yüz ns), kilit yoktur. Tüm
+# kayıtlar event loop thread'inden yapılır; MT5 işçi thread'lerinde metrik
+# yazılmaz. /metrics her istekte metni baştan üretir (sadece okuma).
+
+# Saniye cinsinden kova sınırları: 50 µs .. 10 s
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # son kova: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    # Kovalardan yaklaşık yüzdelik (kova üst sınırı)
+    def quantile(self, q: float):
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+
+# Aynı isimli, etiketleri farklı seriler ailesi
+class Family:
+    def __init__(self, name: str, kind: str, help_text: str, factory):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.factory = factory
+        self.children = {}
+
+    def labels(self, **labels):
+        key = tuple(sorted(labels.items()))
+        child = self.children.get(key)
+        if child is None:
+            child = self.children[key] = self.factory()
+        return child
+
+    def render(self, out):
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} {self.kind}")
+        for key, child in self.children.items():
+            if self.kind == "histogram":
+                cumulative = 0
+                for bound, n in zip(child.bounds + (float("inf"),), child.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    out.append(f"{self.name}_bucket{_labels(key + (('le', le),))} {cumulative}")
+                out.append(f"{self.name}_sum{_labels(key)} {child.sum}")
+                out.append(f"{self.name}_count{_labels(key)} {child.count}")
+            else:
+                out.append(f"{self.name}{_labels(key)} {child.value}")
+
+
+# Değeri okuma anında bir fonksiyondan alınan gösterge
+class GaugeFn:
+    def __init__(self, name: str, help_text: str, fn):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+
+    def render(self, out):
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} gauge")
+        try:
+            values = self.fn()
+        except Exception:
+            return
+        if isinstance(values, dict):
+            for labels, value in values.items():
+                out.append(f"{self.name}{_labels(labels)} {value}")
+        else:
+            out.append(f"{self.name} {values}")
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def histogram(self, name: str, help_text: str, bounds=LATENCY_BUCKETS):
+        return self.metrics.setdefault(name, Family(name, "histogram", help_text, lambda: Histogram(bounds)))
+
+    def counter(self, name: str, help_text: str):
+        return self.metrics.setdefault(name, Family(name, "counter", help_text, Counter))
+
+    def gauge(self, name: str, help_text: str, fn):
+        self.metrics[name] = GaugeFn(name, help_text, fn)
+        return self.metrics[name]
+
+    def render(self):
+        out = []
+        for metric in self.metrics.values():
+            metric.render(out)
+        return "\n".join(out) + "\n"
+
+
+registry = Registry()
+
+# Emir yolu metrikleri
+STAGE_SECONDS = registry.histogram("bot_stage_seconds", "Bot döngüsü aşama süreleri (market_data, indicator, decision)")
+CYCLE_SECONDS = registry.histogram("bot_cycle_seconds", "Zamanlayıcı turunun toplam süresi (tüm semboller)")
+SIGNAL_TO_ORDER_SECONDS = registry.histogram("bot_signal_to_order_seconds", "Tick tespitinden emir sonucuna kadar geçen süre")
+ORDER_SEND_SECONDS = registry.histogram("mt5_order_send_seconds", "order_send gidiş-dönüş süresi")
+ORDER_RETCODES = registry.counter("mt5_order_retcode_total", "order_send dönüş kodu dağılımı")
+RISK_CHECK_SECONDS = registry.histogram("risk_check_seconds", "Emir öncesi yerel risk kontrolü süresi")
+RISK_REJECTIONS = registry.counter("risk_rejections_total", "Terminale gitmeden reddedilen emirler (sebep)")
+LOOP_LAG_SECONDS = registry.histogram("event_loop_lag_seconds", "Event loop gecikmesi (planlanan uyanmaya göre)")
+
+
+# Event loop gecikmesi: kısa uykunun ne kadar geç uyandığı
+async def monitor_loop_lag(interval: float = 0.5):
+    lag = LOOP_LAG_SECONDS.labels()
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag.observe(max(0.0, time.perf_counter() - start - interval))
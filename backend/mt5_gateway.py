@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import ORDER_RETCODES, ORDER_SEND_SECONDS
+
+# Bloklamayan MT5 geçidi
+#
+# MetaTrader5 kütüphanesi thread-safe değil ve çağrıları senkron. Bu sınıf tüm
+# terminal erişimini tek bir özel işçi thread'e sıralar ve event loop'a
+# beklenebilir (awaitable) metodlar sunar. Yavaş bir terminal çağrısı artık
+# websocket ve HTTP isteklerini durdurmaz.
+#
+# Kuyruk derinliği: gönderilen - tamamlanan - iptal edilen iş sayısı.
+#
+# order_send dahil hiçbir çağrı bu thread dışında çalıştırılmaz; toplu
+# kapamada kazanç istekleri sıraya önceden koymaktan gelir, eşzamanlı
+# terminal çağrılarından değil.
+
+
+# pending: çağrı zaman aşımında zaten başlamışsa MT5 thread'inde sürmekte olan
+# iş (concurrent.futures.Future). Emir gibi geri alınamayan çağrılarda sonuç
+# buradan beklenir; None ise çağrı hiç çalışmadı.
+class MT5Timeout(Exception):
+    def __init__(self, message, pending=None):
+        super().__init__(message)
+        self.pending = pending
+
+
+class MT5Gateway:
+    def __init__(self, mt5, default_timeout: float = 10.0):
+        self.mt5 = mt5
+        self.default_timeout = default_timeout
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mt5")
+        self._lock = threading.Lock()  # işçi thread sayaçları
+        self.submitted = 0      # event loop thread'i yazar
+        self.completed = 0      # işçi thread'ler yazar
+        self.dropped = 0        # başlamadan iptal edilen işler (event loop thread'i yazar)
+        self.busy_seconds = 0.0  # işçi thread'ler yazar
+        self.max_depth = 0
+        self._order_seconds = ORDER_SEND_SECONDS.labels()
+        self.timeouts = 0
+        self.cancelled = 0
+        self.errors = 0
+
+    def _invoke(self, fn, args, kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.busy_seconds += time.perf_counter() - start
+                self.completed += 1
+
+    def _submit(self, fn, args, kwargs):
+        self.submitted += 1
+        depth = self.depth()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return self.executor.submit(self._invoke, fn, args, kwargs)
+
+    def depth(self):
+        return self.submitted - self.completed - self.dropped
+
+    def _cancel(self, cfut):
+        if cfut.cancel():
+            self.dropped += 1
+
+    # Herhangi bir senkron fonksiyonu MT5 thread'inde çalıştır ve sonucu bekle
+    async def run(self, fn, *args, timeout: float = None, **kwargs):
+        cfut = self._submit(fn, args, kwargs)
+        fut = asyncio.wrap_future(cfut)
+        try:
+            return await asyncio.wait_for(fut, self.default_timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            # Henüz başlamadıysa kuyruktan düşer; başladıysa sonucu MT5Timeout.pending ile beklenebilir
+            self._cancel(cfut)
+            self.timeouts += 1
+            raise MT5Timeout(f"MT5 çağrısı zaman aşımına uğradı: {getattr(fn, '__name__', fn)}",
+                             None if cfut.cancelled() else cfut)
+        except asyncio.CancelledError:
+            self._cancel(cfut)
+            self.cancelled += 1
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+
+    # Event loop dışından (ör. başlangıçta) senkron çağrı; yine aynı thread kullanılır
+    def call(self, fn, *args, **kwargs):
+        return self._submit(fn, args, kwargs).result()
+
+    # --- MT5 API sarmalayıcıları ---
+    async def copy_rates_from_pos(self, symbol, timeframe, start_pos, count, timeout=None):
+        return await self.run(self.mt5.copy_rates_from_pos, symbol, timeframe, start_pos, count, timeout=timeout)
+
+    async def copy_rates_range(self, symbol, timeframe, date_from, date_to, timeout=None):
+        return await self.run(self.mt5.copy_rates_range, symbol, timeframe, date_from, date_to, timeout=timeout)
+
+    async def copy_ticks_from(self, symbol, date_from, count, flags, timeout=None):
+        return await self.run(self.mt5.copy_ticks_from, symbol, date_from, count, flags, timeout=timeout)
+
+    async def symbol_info_tick(self, symbol, timeout=None):
+        return await self.run(self.mt5.symbol_info_tick, symbol, timeout=timeout)
+
+    async def symbol_info(self, symbol, timeout=None):
+        return await self.run(self.mt5.symbol_info, symbol, timeout=timeout)
+
+    async def order_send(self, request, timeout=None):
+        start = time.perf_counter()
+        try:
+            result = await self.run(self.mt5.order_send, request, timeout=timeout)
+        except MT5Timeout:
+            ORDER_RETCODES.labels(retcode="timeout").inc()
+            raise
+        self._order_seconds.observe(time.perf_counter() - start)
+        ORDER_RETCODES.labels(retcode=result.retcode if result is not None else "none").inc()
+        return result
+
+    async def positions_get(self, timeout=None, **kwargs):
+        return await self.run(self.mt5.positions_get, timeout=timeout, **kwargs)
+
+    async def account_info(self, timeout=None):
+        return await self.run(self.mt5.account_info, timeout=timeout)
+
+    async def history_deals_get(self, *args, timeout=None, **kwargs):
+        return await self.run(self.mt5.history_deals_get, *args, timeout=timeout, **kwargs)
+
+    def stats(self):
+        return {
+            "queue_depth": self.depth(),
+            "max_queue_depth": self.max_depth,
+            "calls": self.completed,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "errors": self.errors,
+            "avg_call_ms": round(self.busy_seconds / self.completed * 1000, 3) if self.completed else 0.0,
+        }
+
+    def shutdown(self):
+        try:
+            self.call(self.mt5.shutdown)
+        except RuntimeError:
+            # Yorumlayıcı kapanırken executor zaten durdurulmuş olabilir
+            self.mt5.shutdown()
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
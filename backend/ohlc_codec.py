@@ -0,0 +1,131 @@
+import gzip
+import json
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # isteğe bağlı: pip install msgpack
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # isteğe bağlı: pip install pyarrow
+    pa = None
+
+try:
+    import brotli
+except ImportError:  # isteğe bağlı: pip install brotli
+    brotli = None
+
+# /ohlc yanıt kodlaması
+#
+# Barlar NumPy sütunları olarak tutulduğundan satır başına Python sözlüğü
+# üretmeden sütun sütun kodlanır:
+#   rows     -> [{"time": .., "open": .., ...}, ...]  (eski biçim, varsayılan)
+#   columns  -> {"time": [...], "open": [...], ..., "cursor": son_bar_zamanı}
+#   delta    -> columns ile aynı alanlar, fakat fiyatlar `scale` ile tam sayıya
+#               çevrilmiş ve her sütun farklar olarak (ilk eleman mutlak);
+#               istemci kümülatif toplar ve fiyatları scale'e böler. Tam sayı
+#               JSON'u hem küçük hem hızlıdır, gzip ile de çok iyi sıkışır.
+#   msgpack  -> sütunlar ham little-endian bayt dizileri (Float64Array /
+#               BigInt64Array olarak kopyasız okunur), dtype bilgisiyle
+#   arrow    -> Arrow IPC stream (tek record batch)
+# Sıkıştırma Accept-Encoding'e göre seçilir (br > gzip); küçük gövdeler
+# sıkıştırılmaz.
+
+FIELDS = ("time", "open", "high", "low", "close", "tick_volume")
+FORMATS = ("rows", "columns", "delta", "msgpack", "arrow")
+PRICE_FIELDS = ("open", "high", "low", "close")
+MEDIA_TYPES = {
+    "rows": "application/json",
+    "columns": "application/json",
+    "delta": "application/json",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+MIN_COMPRESS = 1024
+
+
+def available(fmt: str):
+    if fmt == "msgpack":
+        return msgpack is not None
+    if fmt == "arrow":
+        return pa is not None
+    return fmt in FORMATS
+
+
+# Yapılandırılmış dizi ya da sütun sözlüğünden `since` sonrası sütunlar
+def select(rates, since=None):
+    time_col = np.asarray(rates["time"])
+    lo = 0 if since is None else int(np.searchsorted(time_col, since, "left"))
+    return {f: np.asarray(rates[f][lo:]) for f in FIELDS}
+
+
+# Son barı da kapsayan ucuz sürüm etiketi (oluşan bar değişince değişir)
+def etag(key, columns):
+    n = len(columns["time"])
+    if n == 0:
+        return f'W/"{key}:0"'
+    return (f'W/"{key}:{n}:{int(columns["time"][0])}:{int(columns["time"][-1])}:'
+            f'{float(columns["close"][-1])!r}:{int(columns["tick_volume"][-1])}"')
+
+
+# Fiyatları tam sayı yapan en küçük 10^k ölçeği (k <= 8)
+def price_scale(columns):
+    prices = np.concatenate([columns[f] for f in PRICE_FIELDS])
+    for k in range(9):
+        scaled = prices * 10 ** k
+        if np.all(np.abs(scaled - np.rint(scaled)) < 1e-6):
+            return 10 ** k
+    return 10 ** 8
+
+
+def _deltas(values):
+    return np.concatenate((values[:1], np.diff(values)))
+
+
+def encode(columns, fmt: str):
+    n = len(columns["time"])
+    cursor = int(columns["time"][-1]) if n else None
+    if fmt == "rows":
+        lists = [columns[f].tolist() for f in FIELDS]
+        return json.dumps([dict(zip(FIELDS, row)) for row in zip(*lists)], separators=(",", ":")).encode()
+    if fmt == "columns":
+        body = {f: columns[f].tolist() for f in FIELDS}
+        body["cursor"] = cursor
+        return json.dumps(body, separators=(",", ":")).encode()
+    if fmt == "delta":
+        scale = price_scale(columns) if n else 1
+        body = {"scale": scale, "cursor": cursor, "time": _deltas(columns["time"].astype(np.int64)).tolist()}
+        for f in PRICE_FIELDS:
+            body[f] = _deltas(np.rint(columns[f] * scale).astype(np.int64)).tolist()
+        body["tick_volume"] = _deltas(columns["tick_volume"].astype(np.int64)).tolist()
+        return json.dumps(body, separators=(",", ":")).encode()
+    if fmt == "msgpack":
+        body = {
+            "count": n,
+            "cursor": cursor,
+            "dtype": {f: columns[f].dtype.str for f in FIELDS},
+        }
+        for f in FIELDS:
+            body[f] = np.ascontiguousarray(columns[f]).tobytes()
+        return msgpack.packb(body)
+    if fmt == "arrow":
+        table = pa.table({f: np.ascontiguousarray(columns[f]) for f in FIELDS})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    raise ValueError(fmt)
+
+
+def compress(body: bytes, accept_encoding: str):
+    if len(body) < MIN_COMPRESS or not accept_encoding:
+        return body, None
+    accepted = {part.split(";")[0].strip() for part in accept_encoding.lower().split(",")}
+    if brotli is not None and "br" in accepted:
+        return brotli.compress(body, quality=4), "br"
+    if "gzip" in accepted:
+        return gzip.compress(body, compresslevel=1), "gzip"
+    return body, None
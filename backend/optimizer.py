@@ -0,0 +1,178 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+from multiprocessing import Pool, shared_memory
+import numpy as np
+
+from backtest import DEFAULT_PARAMS, equity_curve, load_bars, prepare, simulate, summarize
+
+# Parametre taraması (grid / rastgele örnekleme), süreç havuzu ile
+#
+# Gösterge dizileri her (RSI periyodu, htf_seconds) çifti için ana süreçte bir
+# kez hesaplanır ve shared_memory bloklarına konur; işçiler bunlara kopyasız
+# bağlanır, görev başına sadece küçük bir parametre sözlüğü gönderilir.
+# Sonuçlar diskte JSONL olarak saklanır; aynı veri + parametre tekrar
+# çalıştırılmaz (kaldığı yerden devam).
+#
+# Örnek:
+#   python optimizer.py bars.npy --grid '{"period": [3, 5, 7], "upper": [75, 80, 85],
+#       "lower": [15, 20, 25], "max_lot": [0.08, 0.16, 0.32],
+#       "profit_target": [50, 100, 200], "reset_on_max": [false, true]}' --objective ratio
+
+# Sıralama hedefleri: (özet alanı veya fonksiyon, büyük olan mı iyi)
+OBJECTIVES = {
+    "net_profit": (lambda s: s["net_profit"], True),
+    "max_drawdown": (lambda s: s["max_drawdown"], False),
+    "max_depth": (lambda s: s["max_depth"], False),
+    "profit_factor": (lambda s: s["profit_factor"] or 0.0, True),
+    "ratio": (lambda s: s["net_profit"] / max(s["max_drawdown"], 1.0), True),
+}
+
+# Önbellek anahtarına katılır; eski sürümün hatalı sonuçları yeniden kullanılmaz
+# (2: htf_seconds daha önce yok sayılıyordu)
+_CACHE_VERSION = 2
+
+_SHARED_FIELDS = ("time", "close", "day")
+_PERIOD_FIELDS = ("rsi_1m", "rsi_htf")
+
+# İşçi süreç durumu
+_worker = {}
+
+
+def _to_shared(array, blocks):
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    blocks.append(shm)
+    return (shm.name, array.dtype.str, array.shape)
+
+
+def _attach(desc, handles):
+    name, dtype, shape = desc
+    shm = shared_memory.SharedMemory(name=name)
+    handles.append(shm)  # referans tutulmazsa blok kapanır
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _init_worker(layout):
+    handles = []
+    base = {f: _attach(layout["base"][f], handles) for f in _SHARED_FIELDS}
+    data = {}
+    for series, fields in layout["series"].items():
+        data[series] = dict(base, **{f: _attach(fields[f], handles) for f in _PERIOD_FIELDS})
+    _worker["data"] = data
+    _worker["handles"] = handles
+
+
+def _run_task(task):
+    key, params = task
+    data = _worker["data"][(params["period"], params["htf_seconds"])]
+    result = simulate(data, params)
+    summary = summarize(data, result, equity_curve(data, result))
+    return key, params, summary
+
+
+def expand(grid: dict, samples: int = 0, seed: int = 0):
+    names = sorted(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    if samples and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return [dict(DEFAULT_PARAMS, **c) for c in combos]
+
+
+def task_key(fingerprint: str, params: dict):
+    return hashlib.sha1(f"v{_CACHE_VERSION}:{fingerprint}{json.dumps(params, sort_keys=True)}".encode()).hexdigest()
+
+
+def file_fingerprint(path: str):
+    st = os.stat(path)
+    return f"{os.path.abspath(path)}:{st.st_size}:{int(st.st_mtime)}"
+
+
+def load_cache(path: str):
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    row = json.loads(line)
+                    done[row["key"]] = row
+    return done
+
+
+def sweep(bars, param_list, fingerprint, cache_path, workers=None, progress=True):
+    done = load_cache(cache_path)
+    tasks = []
+    for params in param_list:
+        key = task_key(fingerprint, params)
+        if key not in done:
+            tasks.append((key, params))
+    if progress:
+        print(f"[OPT] {len(param_list)} kombinasyon, {len(param_list) - len(tasks)} önbellekte, {len(tasks)} çalıştırılacak")
+    if not tasks:
+        return [done[task_key(fingerprint, p)] for p in param_list]
+
+    blocks = []
+    try:
+        # Periyoda bağlı olmayan diziler bir kez, RSI dizileri (periyot, htf_seconds) başına bir kez
+        pairs = sorted({(p["period"], p["htf_seconds"]) for _, p in tasks})
+        layout = {"base": None, "series": {}}
+        for period, htf_seconds in pairs:
+            data = prepare(bars, period, htf_seconds)
+            if layout["base"] is None:
+                layout["base"] = {f: _to_shared(data[f], blocks) for f in _SHARED_FIELDS}
+            layout["series"][(period, htf_seconds)] = {f: _to_shared(data[f], blocks) for f in _PERIOD_FIELDS}
+
+        start = time.perf_counter()
+        workers = workers or os.cpu_count()
+        chunksize = max(1, len(tasks) // (workers * 8))
+        with open(cache_path, "a") as cache, Pool(workers, initializer=_init_worker, initargs=(layout,)) as pool:
+            for i, (key, params, summary) in enumerate(pool.imap_unordered(_run_task, tasks, chunksize), 1):
+                row = {"key": key, "params": params, "summary": summary}
+                done[key] = row
+                cache.write(json.dumps(row) + "\n")
+                if progress and (i % 50 == 0 or i == len(tasks)):
+                    cache.flush()
+                    elapsed = time.perf_counter() - start
+                    print(f"[OPT] {i}/{len(tasks)} tamamlandı ({i / elapsed:.1f} görev/s)")
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+    return [done[task_key(fingerprint, p)] for p in param_list]
+
+
+def rank(rows, objective: str):
+    score, higher_better = OBJECTIVES[objective]
+    return sorted(rows, key=lambda r: score(r["summary"]), reverse=higher_better)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSI martingale parametre taraması")
+    parser.add_argument("bars", help=".npy (BARS_DTYPE) veya CSV M1 bar dosyası")
+    parser.add_argument("--grid", required=True, help="JSON: parametre -> değer listesi")
+    parser.add_argument("--samples", type=int, default=0, help="Grid yerine rastgele N kombinasyon")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--objective", default="net_profit", choices=sorted(OBJECTIVES))
+    parser.add_argument("--cache", default="optimizer_results.jsonl", help="Sonuç önbelleği (devam için)")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    bars = load_bars(args.bars)
+    param_list = expand(json.loads(args.grid), args.samples, args.seed)
+    rows = sweep(bars, param_list, file_fingerprint(args.bars), args.cache, args.workers)
+    tuned = sorted(set(json.loads(args.grid)))
+    for row in rank(rows, args.objective)[:args.top]:
+        s = row["summary"]
+        shown = {k: row["params"][k] for k in tuned}
+        print(f"{json.dumps(shown)} | net={s['net_profit']:.2f} dd={s['max_drawdown']:.2f} "
+              f"derinlik={s['max_depth']} pf={s['profit_factor']}")
+
+
+if __name__ == "__main__":
+    main()
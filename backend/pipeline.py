@@ -0,0 +1,117 @@
+import numpy as np
+
+from indicators import STREAMS, compute, get_stream, parse_spec, rsi_forming, spec_key
+from resampler import resample
+
+# Strateji arayüzü ve ortak gösterge grafiği
+#
+# Strateji, ihtiyaç duyduğu göstergeleri takma adlarla (takma ad -> (timeframe
+# saniyesi, spec)) bir IndicatorGraph olarak bildirir; kararları sadece bu
+# değerlere bakan saf fonksiyonlardır. Aynı grafik üç yerde değerlendirilir:
+#   - canlı bot: evaluate() süreç genelindeki paylaşılan akışları besler; aynı
+#     (sembol, timeframe, gösterge) REST ve websocket ile ortaktır, her bar
+#     bir kez işlenir
+#   - backtest: batch() tüm geçmişi vektörel hesaplar; üst timeframe düğümleri
+#     her taban barında oluşan üst bar dahil değerlendirilir (canlı bakış)
+#   - API: /indicators aynı kütüphanenin toplu fonksiyonlarını kullanır
+# Aynı düğümü isteyen takma adlar (ör. iki kuralın ortak RSI'ı) bir kez hesaplanır.
+
+
+class IndicatorGraph:
+    def __init__(self, inputs):
+        self.inputs = {}  # takma ad -> düğüm anahtarı
+        self.nodes = {}   # düğüm anahtarı -> (saniye, spec, ad, parametreler)
+        for alias, (seconds, spec) in inputs.items():
+            name, params = parse_spec(spec)
+            key = (seconds,) + spec_key(name, params)
+            self.nodes.setdefault(key, (seconds, spec, name, params))
+            self.inputs[alias] = key
+
+    def timeframes(self):
+        return sorted({node[0] for node in self.nodes.values()})
+
+    # Canlı: rates = {saniye: bar dizisi}; değerler oluşan bar dahil
+    def evaluate(self, symbol: str, rates):
+        results = {}
+        for key, (seconds, spec, _, _) in self.nodes.items():
+            bars = rates.get(seconds)
+            results[key] = None if bars is None else get_stream(symbol, seconds, spec).feed(bars)
+        return {alias: results[key] for alias, key in self.inputs.items()}
+
+    # Backtest: taban barlarla hizalı seriler (tek çıktılılar dizi, diğerleri sözlük)
+    def batch(self, bars, base_seconds: int = 60):
+        results = {}
+        higher = {}
+        for key, (seconds, _, name, params) in self.nodes.items():
+            if seconds == base_seconds:
+                outputs = compute(bars, name, params)
+            else:
+                if seconds not in higher:
+                    higher[seconds] = resample(bars, seconds)
+                outputs = _forming(bars, higher[seconds], seconds, name, params)
+            results[key] = outputs["value"] if list(outputs) == ["value"] else outputs
+        return {alias: results[key] for alias, key in self.inputs.items()}
+
+
+# Üst timeframe göstergesi, her taban barında o anki oluşan üst bar ile
+def _forming(bars, htf, seconds, name, params):
+    if name == "rsi" and params["method"] == "sma":
+        return {"value": rsi_forming(bars, htf, params["period"], seconds)}
+    # Genel yol: üst timeframe akışı taban barlarıyla beslenir (canlı botla aynı)
+    s = STREAMS[name](**params)
+    n = len(bars)
+    out = None
+    buckets = (bars["time"] - bars["time"] % seconds).tolist()
+    closes, highs, lows = bars["close"].tolist(), bars["high"].tolist(), bars["low"].tolist()
+    current = high = low = None
+    for i in range(n):
+        if buckets[i] != current:
+            current, high, low = buckets[i], highs[i], lows[i]
+        else:
+            high, low = max(high, highs[i]), min(low, lows[i])
+        value = s.update(current, closes[i], high, low)
+        if value is None:
+            continue
+        if not isinstance(value, dict):
+            value = {"value": value}
+        if out is None:
+            out = {k: np.full(n, np.nan) for k in value}
+        for k, v in value.items():
+            if v is not None:
+                out[k][i] = v
+    if out is None:
+        out = {k: np.full(n, np.nan) for k in compute(bars[:0], name, params)}
+    return out
+
+
+class Strategy:
+    graph = None  # IndicatorGraph
+
+    # Açılış sinyali: 1 (BUY), -1 (SELL), 0 (yok)
+    def entry(self, values):
+        return 0
+
+    # Açık sepet (direction: 1 BUY, -1 SELL) kapatılsın mı
+    def exit(self, values, direction: int):
+        return False
+
+
+# RSI martingale kuralları: 1dk RSI eşikte işlem açar, üst timeframe RSI'ı
+# sepet yönünde eşiği geçince tüm sepet kapanır
+class RSIThreshold(Strategy):
+    def __init__(self, period: int = 5, upper: float = 80.0, lower: float = 20.0, htf_seconds: int = 300,
+                 method: str = "sma"):
+        self.upper = upper
+        self.lower = lower
+        self.graph = IndicatorGraph({
+            "rsi_1m": (60, f"rsi:{period}:{method}"),
+            "rsi_htf": (htf_seconds, f"rsi:{period}:{method}"),
+        })
+
+    def entry(self, values):
+        rsi = values["rsi_1m"]
+        return 1 if rsi >= self.upper else -1 if rsi <= self.lower else 0
+
+    def exit(self, values, direction: int):
+        rsi = values["rsi_htf"]
+        return (direction == 1 and rsi >= self.upper) or (direction == -1 and rsi <= self.lower)
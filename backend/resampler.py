@@ -0,0 +1,170 @@
+import re
+import numpy as np
+
+from bar_cache import BARS_DTYPE
+
+# M1'den üst timeframe türetme
+#
+# Tüm timeframe'ler (M2..D1, M3/M10 gibi özel olanlar dahil) tek bir M1
+# akışından üretilir. Resampler kapanmış üst barları sabit tutar; mevcut üst
+# barın kapanmış M1 kısmını bir toplayıcıda (acc) saklar ve oluşan M1 barı
+# ile birleştirerek yerinde günceller. Her güncelleme sadece yeni M1 barlarını
+# işler (genelde 1-2 bar).
+
+_TF_RE = re.compile(r"^([MHD])(\d+)$")
+_TF_UNIT = {"M": 60, "H": 3600, "D": 86400}
+
+
+# "M1", "M3", "H4", "D1" -> saniye; geçersizse None
+def parse_timeframe(name: str):
+    m = _TF_RE.match(name.strip().upper())
+    if not m:
+        return None
+    n = int(m.group(2))
+    seconds = n * _TF_UNIT[m.group(1)]
+    if n < 1 or seconds > 86400:
+        return None
+    return seconds
+
+
+# Barları daha yüksek timeframe'e topla (vektörel)
+def resample(bars, seconds: int):
+    if len(bars) == 0:
+        return np.zeros(0, dtype=BARS_DTYPE)
+    bucket = bars["time"] - bars["time"] % seconds
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(bars)] - 1
+    out = np.zeros(len(starts), dtype=BARS_DTYPE)
+    out["time"] = bucket[starts]
+    out["open"] = bars["open"][starts]
+    out["close"] = bars["close"][ends]
+    out["high"] = np.maximum.reduceat(bars["high"], starts)
+    out["low"] = np.minimum.reduceat(bars["low"], starts)
+    out["tick_volume"] = np.add.reduceat(bars["tick_volume"], starts)
+    out["real_volume"] = np.add.reduceat(bars["real_volume"], starts)
+    out["spread"] = bars["spread"][ends]
+    return out
+
+
+class Resampler:
+    def __init__(self, seconds: int, capacity: int = 5000):
+        self.seconds = seconds
+        self.capacity = capacity
+        self.bars = np.zeros(0, dtype=BARS_DTYPE)
+        self.last_m1_time = None  # işlenen son (oluşan) M1 barının zamanı
+        self.acc = None           # mevcut üst barın kapanmış M1 toplamı (BARS_DTYPE satırı)
+
+    def _bucket(self, t):
+        return t - t % self.seconds
+
+    def rebuild(self, m1):
+        self.bars = resample(m1, self.seconds)[-self.capacity:]
+        self.last_m1_time = int(m1["time"][-1])
+        # Mevcut kovanın son M1 hariç (oluşan) kapanmış kısmı
+        bucket = self._bucket(self.last_m1_time)
+        first = int(np.searchsorted(m1["time"], bucket))
+        closed = m1[first:-1]
+        self.acc = resample(closed, self.seconds)[0].copy() if len(closed) else None
+
+    def _fold(self, bar):
+        # Kapanmış bir M1 barını mevcut üst bar toplayıcısına ekle
+        if self.acc is None:
+            self.acc = bar.copy()
+            self.acc["time"] = self._bucket(int(bar["time"]))
+            return
+        self.acc["high"] = max(self.acc["high"], bar["high"])
+        self.acc["low"] = min(self.acc["low"], bar["low"])
+        self.acc["close"] = bar["close"]
+        self.acc["tick_volume"] += bar["tick_volume"]
+        self.acc["real_volume"] += bar["real_volume"]
+        self.acc["spread"] = bar["spread"]
+
+    def _fold_closed(self, bar):
+        self._fold(bar)
+        # Kova kapanmış olabilir: üst barı kesin değerleriyle yaz (yoksa ekle)
+        self._write(self.acc)
+
+    def _write(self, row):
+        if len(self.bars) and self.bars["time"][-1] == row["time"]:
+            self.bars[-1] = row
+        else:
+            self.bars = np.concatenate((self.bars, np.array([row], dtype=BARS_DTYPE)))[-self.capacity:]
+
+    def _set_current(self, forming):
+        # Mevcut üst bar = toplayıcı + oluşan M1
+        bucket = self._bucket(int(forming["time"]))
+        if self.acc is None:
+            current = forming.copy()
+            current["time"] = bucket
+        else:
+            current = self.acc.copy()
+            current["high"] = max(current["high"], forming["high"])
+            current["low"] = min(current["low"], forming["low"])
+            current["close"] = forming["close"]
+            current["tick_volume"] += forming["tick_volume"]
+            current["real_volume"] += forming["real_volume"]
+            current["spread"] = forming["spread"]
+        self._write(current)
+
+    # M1 dizisi (eski -> yeni, son bar oluşuyor) ile durumu ilerlet
+    def update(self, m1):
+        if len(m1) == 0:
+            return self.bars
+        if self.last_m1_time is None or m1["time"][0] > self.last_m1_time:
+            # İlk çağrı ya da arada kopukluk: baştan kur
+            self.rebuild(m1)
+            return self.bars
+        start = int(np.searchsorted(m1["time"], self.last_m1_time))
+        new = m1[start:]
+        for i in range(len(new)):
+            bar = new[i]
+            t = int(bar["time"])
+            if t > self.last_m1_time:
+                # Önceki oluşan M1 kapandı; kovası değiştiyse toplayıcı sıfırlanır
+                if self._bucket(t) != (int(self.acc["time"]) if self.acc is not None else None):
+                    self.acc = None
+                self.last_m1_time = t
+            if i < len(new) - 1:
+                self._fold_closed(bar)
+            else:
+                self._set_current(bar)
+        return self.bars
+
+
+# Sembol/timeframe başına resampler; M1 önbellekten (ve varsa yerel depodan) beslenir
+class ResamplerSet:
+    def __init__(self, bar_cache, m1_timeframe: int, bar_store=None, m1_window: int = 5000):
+        self.bar_cache = bar_cache
+        self.m1_timeframe = m1_timeframe
+        self.bar_store = bar_store
+        self.m1_window = m1_window
+        self.resamplers = {}
+
+    async def get(self, symbol: str, seconds: int, count: int = 100):
+        m1 = await self.bar_cache.get(symbol, self.m1_timeframe, self.m1_window)
+        if m1 is None or len(m1) == 0:
+            return None
+        key = (symbol, seconds)
+        rs = self.resamplers.get(key)
+        if rs is None or len(rs.bars) < count and rs.capacity < count:
+            rs = Resampler(seconds, capacity=max(count, 5000))
+            self.resamplers[key] = rs
+            seed = self._seed(symbol, seconds, count, m1)
+            rs.rebuild(seed)
+        rs.update(m1)
+        return rs.bars[-count:]
+
+    # İlk kurulum: derin geçmiş için yerel depodaki kapanmış M1 barları + önbellek
+    def _seed(self, symbol, seconds, count, m1):
+        needed = count * (seconds // 60) + seconds // 60
+        if self.bar_store is None or needed <= len(m1):
+            return m1
+        stored = self.bar_store.get(symbol, self.m1_timeframe)
+        first = int(m1["time"][0])
+        older = stored.range(end=first - 1, limit=needed - len(m1))
+        if len(older) == 0:
+            return m1
+        return np.concatenate((older, m1))
+
+    def stats(self):
+        return {f"{s}:{sec}": len(r.bars) for (s, sec), r in self.resamplers.items()}
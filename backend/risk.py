@@ -0,0 +1,266 @@
+import asyncio
+import math
+import time
+
+from metrics import RISK_CHECK_SECONDS, RISK_REJECTIONS
+
+# Emir öncesi yerel risk kontrolü
+#
+# open_position eskiden emri körlemesine gönderiyordu; hacim adımı, marjin ya da
+# stop seviyesi hatası terminal gidiş-dönüşünden sonra anlaşılıyordu ve
+# martingale yetersiz marjine doğru ikiye katlayabiliyordu. Burada:
+#   - symbol_info (kontrat büyüklüğü, hacim adımı / min / max, stop seviyesi)
+#     sembol başına önbellekte tutulur (symbol_ttl),
+#   - account_info ve açık pozisyonlar tek MT5 işinde, kısa bir TTL ile
+#     (account_ttl) anlık görüntü olarak alınır,
+#   - gereken marjin ve sepet büyüklüğü yerelde hesaplanır (mikrosaniyeler);
+#     kurala uymayan emir terminale hiç gitmez.
+# Görüntüden sonra kabul edilen emirler yerelde rezerve edilir (lot, nominal,
+# marjin), böylece aynı TTL içindeki art arda emirler birbirini görür; bir
+# sonraki görüntü rezervleri sıfırlar.
+#
+# Marjin formülü sembolün hesap moduna göredir. Brokerın marjin oranı
+# symbol_info'da yoktur; sembol ilk yüklendiğinde terminalin order_calc_margin
+# sonucu ile bir kez kalibre edilir (varsa).
+
+# MetaTrader5: SYMBOL_CALC_MODE_*
+CALC_FOREX = 0
+CALC_FOREX_NO_LEVERAGE = 1
+CALC_CFD = 2
+CALC_CFD_LEVERAGE = 4
+
+_EPS = 1e-9
+
+_check_seconds = RISK_CHECK_SECONDS.labels()
+
+
+# MT5 thread'inde: hesap ve pozisyonlar tek işte
+def _snapshot(mt5):
+    return mt5.account_info(), mt5.positions_get()
+
+
+# MT5 thread'inde: sembol bilgisi ve 1 lot için terminalin marjin hesabı
+def _load_symbol(mt5, symbol):
+    info = mt5.symbol_info(symbol)
+    if info is None:
+        return None, None, None
+    tick = mt5.symbol_info_tick(symbol)
+    calc = getattr(mt5, "order_calc_margin", None)
+    if tick is None or calc is None:
+        return info, None, None
+    return info, tick.ask, calc(mt5.ORDER_TYPE_BUY, symbol, 1.0, tick.ask)
+
+
+class SymbolSpec:
+    __slots__ = ("symbol", "point", "contract_size", "volume_min", "volume_max", "volume_step", "stops_level",
+                 "calc_mode", "margin_initial", "margin_currency", "margin_rate", "loaded")
+
+    def __init__(self, info):
+        self.symbol = info.name
+        self.point = info.point
+        self.contract_size = info.trade_contract_size
+        self.volume_min = info.volume_min
+        self.volume_max = info.volume_max
+        self.volume_step = info.volume_step
+        self.stops_level = info.trade_stops_level
+        self.calc_mode = getattr(info, "trade_calc_mode", CALC_CFD_LEVERAGE)
+        self.margin_initial = getattr(info, "margin_initial", 0.0)
+        self.margin_currency = getattr(info, "currency_margin", None)
+        self.margin_rate = 1.0
+        self.loaded = time.monotonic()
+
+    # Adıma aşağı yuvarlanmış hacim
+    def normalize_volume(self, volume: float):
+        steps = math.floor(volume / self.volume_step + _EPS)
+        return round(steps * self.volume_step, 8)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class RiskDecision:
+    __slots__ = ("ok", "reason", "detail", "symbol", "volume", "margin", "notional", "elapsed_us")
+
+    def __init__(self, symbol, volume):
+        self.ok = False
+        self.reason = None
+        self.detail = ""
+        self.symbol = symbol
+        self.volume = volume
+        self.margin = 0.0
+        self.notional = 0.0
+        self.elapsed_us = 0.0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class RiskEngine:
+    def __init__(self, gateway, mt5, account_ttl: float = 1.0, symbol_ttl: float = 3600.0,
+                 max_basket_volume: float = 0.0, max_exposure: float = 0.0, min_margin_level: float = 100.0):
+        self.gateway = gateway
+        self.mt5 = mt5
+        self.account_ttl = account_ttl
+        self.symbol_ttl = symbol_ttl
+        self.max_basket_volume = max_basket_volume  # sembol başına açık lot tavanı (0: kapalı)
+        self.max_exposure = max_exposure            # sembol başına nominal tavan, hesap para birimi (0: kapalı)
+        self.min_margin_level = min_margin_level    # emirden sonra kalması gereken marjin seviyesi % (0: kapalı)
+        self.specs = {}
+        self.account = None
+        self.account_time = 0.0
+        self.volume = {}     # sembol -> açık brüt lot (görüntüden)
+        self.exposure = {}   # sembol -> açık brüt nominal (görüntüden)
+        self.reserved = {}   # sembol -> [lot, nominal, marjin] (görüntüden sonra kabul edilenler)
+        self.lock = asyncio.Lock()
+        self.checks = 0
+        self.refreshes = 0
+        self.symbol_loads = 0
+        self.rejections = {}
+
+    async def spec(self, symbol: str):
+        spec = self.specs.get(symbol)
+        if spec is not None and time.monotonic() - spec.loaded < self.symbol_ttl:
+            return spec
+        if self.account is None:
+            await self.refresh()  # kalibrasyon için kaldıraç gerekli
+        info, price, terminal_margin = await self.gateway.run(_load_symbol, self.mt5, symbol)
+        self.symbol_loads += 1
+        if info is None:
+            return spec  # eski bilgi varsa onunla devam
+        spec = SymbolSpec(info)
+        if terminal_margin and self.account is not None:
+            local = self._base_margin(spec, 1.0, price)
+            if local > 0:
+                spec.margin_rate = terminal_margin / local
+        self.specs[symbol] = spec
+        self.invalidate()  # açık pozisyonların nominali bu bilgiyle yeniden hesaplansın
+        return spec
+
+    # Hesap görüntüsü; TTL içinde eşzamanlı istekler tek yenilemeyi bekler
+    async def refresh(self, force: bool = False):
+        async with self.lock:
+            if not force and self.account is not None and time.monotonic() - self.account_time < self.account_ttl:
+                return
+            account, positions = await self.gateway.run(_snapshot, self.mt5)
+            self.refreshes += 1
+            if account is None:
+                return
+            volume = {}
+            exposure = {}
+            for pos in positions or ():
+                volume[pos.symbol] = volume.get(pos.symbol, 0.0) + pos.volume
+                spec = self.specs.get(pos.symbol)
+                if spec is not None:
+                    exposure[pos.symbol] = (exposure.get(pos.symbol, 0.0)
+                                            + pos.volume * spec.contract_size * pos.price_current)
+            self.account = account
+            self.account_time = time.monotonic()
+            self.volume = volume
+            self.exposure = exposure
+            self.reserved = {}
+
+    # Pozisyonlar dışarıda değişti (toplu kapama): bir sonraki kontrol yeni görüntü alsın
+    def invalidate(self):
+        self.account_time = 0.0
+
+    def _base_margin(self, spec, volume, price):
+        leverage = self.account.leverage or 1
+        lots = volume * spec.contract_size
+        mode = spec.calc_mode
+        if mode in (CALC_FOREX, CALC_FOREX_NO_LEVERAGE):
+            margin = lots / leverage if mode == CALC_FOREX else lots
+            # Marjin baz para biriminde; hesap para birimi farklıysa fiyatla çevrilir
+            return margin if spec.margin_currency == self.account.currency else margin * price
+        if mode == CALC_CFD:
+            return lots * price
+        return lots * price / leverage
+
+    def margin(self, spec, volume: float, price: float):
+        if spec.margin_initial > 0:
+            return volume * spec.margin_initial
+        return self._base_margin(spec, volume, price) * spec.margin_rate
+
+    async def check(self, symbol: str, volume: float, price: float, sl: float = 0.0, tp: float = 0.0):
+        spec = await self.spec(symbol)
+        await self.refresh()
+        return self.evaluate(spec, symbol, volume, price, sl, tp)
+
+    # Önbellekteki verilerle karar (await yok); kabul edilen emir rezerve edilir
+    def evaluate(self, spec, symbol: str, volume: float, price: float, sl: float = 0.0, tp: float = 0.0):
+        start = time.perf_counter()
+        self.checks += 1
+        decision = RiskDecision(symbol, volume)
+        reason, detail = self._reject_reason(decision, spec, symbol, volume, price, sl, tp)
+        if reason is None:
+            decision.ok = True
+            reserved = self.reserved.setdefault(symbol, [0.0, 0.0, 0.0])
+            reserved[0] += volume
+            reserved[1] += decision.notional
+            reserved[2] += decision.margin
+        else:
+            decision.reason = reason
+            decision.detail = detail
+            self.rejections[reason] = self.rejections.get(reason, 0) + 1
+            RISK_REJECTIONS.labels(reason=reason).inc()
+        elapsed = time.perf_counter() - start
+        decision.elapsed_us = elapsed * 1e6
+        _check_seconds.observe(elapsed)
+        return decision
+
+    def _reject_reason(self, decision, spec, symbol, volume, price, sl, tp):
+        if spec is None:
+            return "symbol_info", "sembol bilgisi alınamadı"
+        account = self.account
+        if account is None:
+            return "account", "hesap bilgisi alınamadı"
+        if volume < spec.volume_min - _EPS:
+            return "volume_min", f"{volume} < {spec.volume_min}"
+        if volume > spec.volume_max + _EPS:
+            return "volume_max", f"{volume} > {spec.volume_max}"
+        if abs(spec.normalize_volume(volume) - volume) > _EPS:
+            return "volume_step", f"{volume} adım {spec.volume_step} katı değil"
+        min_distance = spec.stops_level * spec.point
+        for name, level in (("sl", sl), ("tp", tp)):
+            if level and abs(price - level) < min_distance - _EPS:
+                return "stops_level", f"{name} {level} fiyata {min_distance} mesafeden yakın"
+        reserved = self.reserved.get(symbol, (0.0, 0.0, 0.0))
+        if self.max_basket_volume > 0:
+            basket = self.volume.get(symbol, 0.0) + reserved[0] + volume
+            if basket > self.max_basket_volume + _EPS:
+                return "basket_volume", f"sepet {basket:.2f} lot > {self.max_basket_volume}"
+        decision.notional = volume * spec.contract_size * price
+        if self.max_exposure > 0:
+            exposure = self.exposure.get(symbol, 0.0) + reserved[1] + decision.notional
+            if exposure > self.max_exposure:
+                return "exposure", f"nominal {exposure:.0f} > {self.max_exposure:.0f}"
+        decision.margin = self.margin(spec, volume, price)
+        reserved_margin = sum(r[2] for r in self.reserved.values())
+        free = account.margin_free - reserved_margin
+        if decision.margin > free:
+            return "margin", f"gereken {decision.margin:.2f} > serbest {free:.2f}"
+        if self.min_margin_level > 0:
+            used = account.margin + reserved_margin + decision.margin
+            level = account.equity / used * 100 if used > 0 else float("inf")
+            if level < self.min_margin_level:
+                return "margin_level", f"marjin seviyesi %{level:.0f} < %{self.min_margin_level:.0f}"
+        return None, ""
+
+    # Kabul edilen emir terminalde başarısız oldu: rezervi geri al
+    def release(self, decision):
+        reserved = self.reserved.get(decision.symbol)
+        if not decision.ok or reserved is None:
+            return
+        reserved[0] -= decision.volume
+        reserved[1] -= decision.notional
+        reserved[2] -= decision.margin
+
+    def stats(self):
+        return {
+            "checks": self.checks,
+            "rejections": dict(self.rejections),
+            "refreshes": self.refreshes,
+            "symbol_loads": self.symbol_loads,
+            "symbols": {s: spec.as_dict() for s, spec in self.specs.items()},
+            "volume": self.volume,
+            "reserved": {s: [round(v, 2) for v in r] for s, r in self.reserved.items()},
+        }
@@ -0,0 +1,46 @@
+from indicators import RSIStream, get_stream
+
+# Artımlı (O(1)) RSI motoru
+#
+# Her (sembol, timeframe, periyot, yöntem) için bir durum tutulur. Kapanmış
+# barlar "commit" edilir; son (henüz oluşmakta olan) bar ise durumu bozmadan
+# geçici olarak hesaba katılır. Böylece aynı bar 5 saniyede bir güncellense
+# bile her güncelleme sabit sürede biter.
+#
+# method="sma"    -> calculate_rsi ile aynı sonuç (son periyot farkının basit ortalaması)
+# method="wilder" -> Wilder yumuşatması (ilk değer SMA ile tohumlanır)
+
+
+# Yardımcı fonksiyon: RSI hesaplama (Basit, Close fiyatları ile)
+def calculate_rsi(closes, period=5):
+    # Kapanışlar en eski -> en yeni sırada olmalı
+    if len(closes) < period + 1:
+        return None
+    # Son (period+1) kapanışı al
+    closes = list(closes)[- (period + 1):]
+    gains = []
+    losses = []
+    for i in range(1, period + 1):
+        diff = closes[i] - closes[i - 1]
+        if diff > 0:
+            gains.append(diff)
+            losses.append(0)
+        else:
+            gains.append(0)
+            losses.append(-diff)
+    avg_gain = sum(gains) / period
+    avg_loss = sum(losses) / period
+    if avg_loss == 0:
+        return 100.0
+    rs = avg_gain / avg_loss
+    rsi = 100.0 - (100.0 / (1 + rs))
+    return round(rsi, 2)
+
+
+# Artımlı motor gösterge kütüphanesindeki RSI akışıdır (toplu rsi_sma / rsi_wilder ile aynı sonuç)
+RSIEngine = RSIStream
+
+
+# Süreç genelinde paylaşılan motorlar: bot döngüsü, REST ve websocket aynı durumu kullanır
+def get_engine(symbol: str, timeframe, period: int = 5, method: str = "sma"):
+    return get_stream(symbol, timeframe, f"rsi:{period}:{method}")
@@ -0,0 +1,158 @@
+import json
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+# Paylaşımlı bellekte tek yazar / çok okuyucu durum bölgesi (seqlock)
+#
+# Motor süreci (engine.py) durumu JSON olarak tek bir adlandırılmış paylaşımlı
+# bellek bölgesine yazar; API işçileri kilitsiz okur:
+#   yazar:   seq += 1 (tek: yazılıyor) -> veri + uzunluk -> seq += 1 (çift)
+#   okuyucu: seq oku (tekse tekrar) -> uzunluk + veri kopyala -> seq tekrar oku;
+#            iki seq farklıysa yazarla çakışıldı, tekrar dene.
+# Okuyucu yazarı hiç bekletmez; yazar da okuyucuları beklemez. Sıralama x86
+# (TSO) bellek modeline dayanır: yazarın veriden sonra yazdığı seq, okuyucuya
+# veriden önce görünmez. seq 8 bayt hizalı tek alandır.
+#
+# Okuyucu çözülmüş JSON'u seq ile önbellekler; durum değişmedikçe istek başına
+# maliyet sadece 8 baytlık seq okumasıdır.
+#
+# Başlık: magic (4) | kapasite (4) | seq (8) | uzunluk (8), ardından veri
+
+MAGIC = b"MT5S"
+HEADER = struct.Struct("<4sIQQ")
+SEQ = struct.Struct("<Q")
+SEQ_OFFSET = 8
+LENGTH_OFFSET = 16
+
+
+class StateWriter:
+    def __init__(self, name: str, capacity: int = 1 << 20):
+        try:
+            stale = shared_memory.SharedMemory(name)  # önceki çökmüş motordan kalan bölge
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        self.shm = shared_memory.SharedMemory(name, create=True, size=HEADER.size + capacity)
+        self.capacity = capacity
+        self.seq = 0
+        self.published = 0
+        self.too_large = 0
+        self.last_size = 0
+        HEADER.pack_into(self.shm.buf, 0, MAGIC, capacity, 0, 0)
+
+    def publish(self, payload: bytes):
+        size = len(payload)
+        if size > self.capacity:
+            self.too_large += 1
+            return False
+        buf = self.shm.buf
+        self.seq += 1
+        SEQ.pack_into(buf, SEQ_OFFSET, self.seq)
+        buf[HEADER.size:HEADER.size + size] = payload
+        SEQ.pack_into(buf, LENGTH_OFFSET, size)
+        self.seq += 1
+        SEQ.pack_into(buf, SEQ_OFFSET, self.seq)
+        self.published += 1
+        self.last_size = size
+        return True
+
+    def publish_json(self, data):
+        return self.publish(json.dumps(data, separators=(",", ":")).encode())
+
+    def close(self):
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def stats(self):
+        return {"seq": self.seq, "published": self.published, "bytes": self.last_size, "capacity": self.capacity,
+                "too_large": self.too_large}
+
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name)
+        # Okuyucu çıkarken resource_tracker bölgeyi silmesin (sahibi motor)
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+class StateReader:
+    def __init__(self, name: str, spins: int = 100):
+        self.name = name
+        self.spins = spins
+        self.shm = None
+        self.seq = None
+        self.value = None
+        self.reads = 0
+        self.decodes = 0
+        self.retries = 0
+
+    def _open(self):
+        if self.shm is None:
+            try:
+                shm = _attach(self.name)
+            except FileNotFoundError:
+                return None
+            if bytes(shm.buf[:4]) != MAGIC:
+                shm.close()
+                return None
+            self.shm = shm
+        return self.shm
+
+    # (seq, bayt) ya da motor yoksa / henüz yazmadıysa None
+    def read_raw(self):
+        shm = self._open()
+        if shm is None:
+            return None
+        buf = shm.buf
+        for attempt in range(self.spins):
+            before = SEQ.unpack_from(buf, SEQ_OFFSET)[0]
+            if before & 1:
+                self.retries += 1
+                if attempt > 10:
+                    time.sleep(0)  # yazar bu sırada kesilmiş olabilir; CPU'yu bırak
+                continue
+            size = SEQ.unpack_from(buf, LENGTH_OFFSET)[0]
+            data = bytes(buf[HEADER.size:HEADER.size + size])
+            if SEQ.unpack_from(buf, SEQ_OFFSET)[0] == before:
+                return (before, data) if before else None
+            self.retries += 1
+        return None
+
+    # Çözülmüş son durum; seq değişmediyse önbellekten
+    def get(self):
+        shm = self._open()
+        if shm is None:
+            return None
+        self.reads += 1
+        seq = SEQ.unpack_from(shm.buf, SEQ_OFFSET)[0]
+        if seq == self.seq:
+            return self.value
+        raw = self.read_raw()
+        if raw is None:
+            return self.value
+        self.seq, data = raw
+        self.value = json.loads(data)
+        self.decodes += 1
+        return self.value
+
+    # Motor yeniden başlayınca eski bölge silinir; bağlantı yenilensin
+    def reset(self):
+        if self.shm is not None:
+            self.shm.close()
+        self.shm = None
+        self.seq = None
+
+    def stats(self):
+        return {"seq": self.seq, "reads": self.reads, "decodes": self.decodes, "retries": self.retries,
+                "attached": self.shm is not None}
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import time
+
+from event_log import log
+
+# Hesap ve pozisyon anlık görüntüsü, SSE ile alan düzeyinde farklar
+#
+# /account her istekte terminale gidiyordu, StatusPanel de /status'u 3 sn'de
+# bir yokluyordu; birkaç operatör bakarken terminal aynı soruları tekrar tekrar
+# cevaplıyordu. Burada account_info ve positions_get tek MT5 işinde, `interval`
+# aralıkla bir kez okunur; bot durumu (status_fn, yerel ve ucuz) aynı görüntüye
+# eklenir. Her yenilemede önceki görüntüyle alan alan karşılaştırılır ve sadece
+# değişenler JSON Merge Patch (RFC 7386) olarak yayınlanır: iç içe nesneler
+# birleştirilir, null anahtarı siler (kapanan pozisyon), diziler bütün gelir.
+#
+# Yayın bir kez serileştirilir ve tüm abonelere aynı SSE çerçevesi gider.
+# Kuyruğu dolan (yavaş) abonenin bekleyen farkları atılır ve tam görüntü
+# yeniden gönderilir. REST çağıranlar da aynı görüntüden beslenir; görüntü
+# `interval`'dan eskiyse eşzamanlı çağrılar tek yenilemeyi bekler.
+
+_MISSING = object()
+
+
+# MT5 thread'inde: hesap ve pozisyonlar tek işte
+def _read(mt5):
+    return mt5.account_info(), mt5.positions_get()
+
+
+def merge_diff(old, new):
+    patch = {}
+    for key, value in new.items():
+        before = old.get(key, _MISSING)
+        if isinstance(value, dict) and isinstance(before, dict):
+            sub = merge_diff(before, value)
+            if sub:
+                patch[key] = sub
+        elif before is _MISSING or before != value:
+            patch[key] = value
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    return patch
+
+
+def _fields(patch):
+    count = 0
+    for value in patch.values():
+        count += _fields(value) if isinstance(value, dict) and value else 1
+    return count
+
+
+def _frame(event, version, data):
+    return f"event: {event}\nid: {version}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class AccountSnapshot:
+    def __init__(self, gateway, mt5, status_fn=None, interval: float = 1.0, queue_size: int = 32):
+        self.gateway = gateway
+        self.mt5 = mt5
+        self.status_fn = status_fn  # () -> dict, bot durumu
+        self.interval = interval
+        self.queue_size = queue_size
+        self.state = None
+        self.version = 0
+        self.updated = 0.0
+        self.subscribers = set()
+        self.lock = asyncio.Lock()
+        self.wake = asyncio.Event()
+        self.refreshes = 0
+        self.patches = 0
+        self.patch_fields = 0
+        self.resyncs = 0
+
+    def _build(self, account, positions):
+        state = {
+            "account": account._asdict() if account is not None else None,
+            "positions": {str(p.ticket): p._asdict() for p in positions or ()},
+        }
+        if self.status_fn is not None:
+            state["status"] = self.status_fn()
+        return state
+
+    async def refresh(self, force: bool = False):
+        async with self.lock:
+            if not force and self.state is not None and time.monotonic() - self.updated < self.interval:
+                return self.state
+            account, positions = await self.gateway.run(_read, self.mt5)
+            self.refreshes += 1
+            self.updated = time.monotonic()
+            new = self._build(account, positions)
+            if new["account"] is None and self.state is not None:
+                new["account"] = self.state["account"]  # okunamadı: son bilinen hesap bilgisi kalsın
+            return self.apply(new)
+
+    # Yeni görüntüyü yerleştir; değişen alanlar abonelere yama olarak gider
+    def apply(self, new):
+        old = self.state
+        self.state = new
+        if old is None:
+            self.version += 1
+            return new
+        patch = merge_diff(old, new)
+        if patch:
+            self.version += 1
+            self.patches += 1
+            self.patch_fields += _fields(patch)
+            self._publish(_frame("patch", self.version, {"version": self.version, "patch": patch}))
+        return new
+
+    # Aralık dolmadan yenile (ör. /toggle sonrası)
+    def poke(self):
+        self.wake.set()
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh(force=True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log("SNAPSHOT", "error", "{error}", error=e)
+            try:
+                await asyncio.wait_for(self.wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+
+    def full_frame(self):
+        return _frame("snapshot", self.version, {"version": self.version, "state": self.state})
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.state is not None:
+            queue.put_nowait(self.full_frame())
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def _publish(self, frame):
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Yavaş abone: farklar atılır, tam görüntüyle yeniden eşitlenir
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.full_frame())
+                self.resyncs += 1
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "age": round(time.monotonic() - self.updated, 3) if self.updated else None,
+            "refreshes": self.refreshes,
+            "patches": self.patches,
+            "patch_fields": self.patch_fields,
+            "subscribers": len(self.subscribers),
+            "resyncs": self.resyncs,
+        }
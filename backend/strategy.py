@@ -0,0 +1,356 @@
+import asyncio
+import time
+from datetime import datetime
+
+from event_log import log
+from market_watcher import LatencyStats, MarketWatcher
+from metrics import CYCLE_SECONDS, STAGE_SECONDS
+from mt5_gateway import MT5Timeout
+from pipeline import RSIThreshold
+
+# Çok sembollü RSI martingale çalıştırıcısı
+#
+# Her sembolün kendi strateji örneği ve küçük bir durum nesnesi (slots) vardır.
+# Tek bir zamanlayıcı tüm sembollerin tick'lerini tek MT5 thread işinde okur,
+# değişen sembollerin bayat barlarını yine tek işte yeniler ve sadece girdisi
+# değişen stratejileri aynı event loop içinde eşzamanlı değerlendirir. Sabit
+# maliyetler (thread gidiş-dönüşleri, uyanmalar) sembol sayısına bölünür.
+
+_decision_seconds = STAGE_SECONDS.labels(stage="decision")
+_SIDES = {"BUY": 1, "SELL": -1}
+_cycle_seconds = CYCLE_SECONDS.labels()
+
+
+class SymbolState:
+    __slots__ = (
+        "symbol", "bot_active", "total_profit_today", "current_lot", "trade_direction",
+        "last_rsi_signal", "positions", "max_lot", "profit_target", "last_profit_reset",
+        "no_trade_today", "rsi_1m", "rsi_5m", "cooldown_until", "evaluations",
+    )
+
+    def __init__(self, symbol: str, max_lot: float = 0.16, profit_target: float = 100.0):
+        self.symbol = symbol
+        self.bot_active = True
+        self.total_profit_today = 0.0
+        self.current_lot = 0.01
+        self.trade_direction = None  # "BUY" veya "SELL"
+        self.last_rsi_signal = None  # "BUY" veya "SELL"
+        self.positions = []
+        self.max_lot = max_lot
+        self.profit_target = profit_target
+        self.last_profit_reset = datetime.utcnow().date()
+        self.no_trade_today = False  # Kar hedefi sonrası gün sonuna kadar işlem açılmasın
+        self.rsi_1m = None
+        self.rsi_5m = None
+        self.cooldown_until = 0.0  # Toplu kapamadan sonra bu ana (monotonic) kadar bekle
+        self.evaluations = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class RSIMartingale:
+    def __init__(self, symbol: str, gateway, mt5, closer, indicators, base_lot: float = 0.01, max_lot: float = 0.16,
+                 profit_target: float = 100.0, period: int = 5, upper: float = 80.0, lower: float = 20.0,
+                 close_cooldown: float = 10.0, on_order=None, journal=None, signal=None, risk=None):
+        self.symbol = symbol
+        self.gateway = gateway
+        self.mt5 = mt5
+        self.closer = closer  # BatchCloser
+        self.indicators = indicators  # async fn(symbol, graph) -> {takma ad: değer}
+        # Kurallar backtest ile ortak strateji nesnesinde (pipeline.RSIThreshold)
+        self.signal = signal or RSIThreshold(period, upper, lower)
+        self.base_lot = base_lot
+        self.close_cooldown = close_cooldown
+        self.on_order = on_order  # fn(event): emir sonuçlandığında (gecikme ölçümü)
+        self.journal = journal    # DealJournal: gerçekleşen kar (manuel kapamalar dahil)
+        self.risk = risk          # RiskEngine: emir terminale gitmeden yerel kontrol
+        self.pending = None       # zaman aşımına uğrayıp terminalde süren emir: (future, yön, lot, risk kararı)
+        self.state = SymbolState(symbol, max_lot, profit_target)
+
+    def reset_daily_if_needed(self):
+        state = self.state
+        today = datetime.utcnow().date()
+        if state.last_profit_reset != today:
+            state.total_profit_today = 0.0
+            state.current_lot = self.base_lot
+            state.trade_direction = None
+            state.last_rsi_signal = None
+            state.positions = []
+            state.last_profit_reset = today
+            state.no_trade_today = False  # Gün başında tekrar işlem açılabilir
+            log("STRATEGY", "info", "{symbol}: Günlük kar hedefi ve işlem izni resetlendi.", symbol=self.symbol)
+
+    async def close_all_positions(self):
+        positions = await self.gateway.positions_get(symbol=self.symbol)
+        if not positions:
+            return 0.0
+        report = await self.closer.close(positions)
+        if self.risk is not None:
+            self.risk.invalidate()
+        for r in report.failed:
+            log("STRATEGY", "error", "Pozisyon kapatılamadı: Ticket {ticket} | Retcode: {retcode} | {comment} | Deneme: {attempts} | Kapanan: {filled}/{volume}",
+                ticket=r.ticket, retcode=r.retcode, comment=r.comment, attempts=r.attempts, filled=r.filled,
+                volume=r.volume)
+        log("STRATEGY", "info", "{symbol}: {closed}/{total} pozisyon {elapsed_ms:.0f} ms içinde kapatıldı",
+            symbol=self.symbol, closed=len(positions) - len(report.failed), total=len(positions),
+            elapsed_ms=report.elapsed_ms)
+        return report.profit
+
+    # Zaman aşımına uğrayan emir terminalde gerçekleşmiş olabilir. MT5 thread'i
+    # tek olduğundan çağrı er geç sonuçlanır; sonucu gelene kadar hiçbir yönde
+    # yeni emir gönderilmez (aynı sinyal tekrar gönderilip lot katlanmasın),
+    # gelince zamanında dönmüş gibi işlenir.
+    def _settle_pending(self):
+        future, direction, volume, decision = self.pending
+        if not future.done():
+            return False
+        self.pending = None
+        try:
+            result = future.result()
+        except Exception:
+            result = None
+        if result is not None and result.retcode == self.mt5.TRADE_RETCODE_DONE:
+            self._filled(direction, volume)
+            return True
+        if decision is not None:
+            self.risk.release(decision)
+        log("STRATEGY", "warn", "{symbol}: Zaman aşımına uğrayan {direction} emri gerçekleşmedi: {retcode}",
+            symbol=self.symbol, direction=direction, retcode=result.retcode if result else None)
+        return True
+
+    def _filled(self, direction, volume):
+        state = self.state
+        state.current_lot = volume
+        state.trade_direction = direction
+        state.last_rsi_signal = direction
+        log("STRATEGY", "info", "{symbol}: {direction} işlemi açıldı, lot: {volume}", symbol=self.symbol,
+            direction=direction, volume=volume)
+
+    async def open_position(self, direction: str):
+        state = self.state
+        if self.pending is not None and not self._settle_pending():
+            return False
+        if state.no_trade_today:
+            log("STRATEGY", "info", "{symbol}: Bugün tekrar işlem açılmayacak.", symbol=self.symbol)
+            return False
+        if state.last_rsi_signal == direction:
+            # Aynı yönde işlem varsa işlem yapma
+            return False
+        # Aday lot; state.current_lot sadece emir gerçekleşince güncellenir, reddedilen
+        # ya da başarısız denemeler bir sonraki değerlendirmede lotu tekrar katlamaz
+        if state.trade_direction and state.trade_direction != direction:
+            # Trend değişmiş, lot artır (max_lot sınırı)
+            volume = min(state.current_lot * 2, state.max_lot)
+        else:
+            # İlk işlem veya aynı trend devamı
+            volume = self.base_lot
+        tick = await self.gateway.symbol_info_tick(self.symbol)
+        if tick is None:
+            log("STRATEGY", "error", "{symbol}: Tick verisi alınamadı.", symbol=self.symbol)
+            return False
+        price = tick.ask if direction == "BUY" else tick.bid
+        decision = None
+        if self.risk is not None:
+            decision = await self.risk.check(self.symbol, volume, price)
+            if not decision.ok:
+                log("RISK", "warn", "{symbol}: {direction} {volume} lot reddedildi: {reason} ({detail})",
+                    symbol=self.symbol, direction=direction, volume=volume, reason=decision.reason,
+                    detail=decision.detail)
+                return False
+        mt5 = self.mt5
+        request = {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": self.symbol,
+            "volume": volume,
+            "type": mt5.ORDER_TYPE_BUY if direction == "BUY" else mt5.ORDER_TYPE_SELL,
+            "price": price,
+            "deviation": 10,
+            "magic": 234000,
+            "comment": "RSI Bot Trade",
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_IOC,
+        }
+        try:
+            result = await self.gateway.order_send(request)
+        except MT5Timeout as e:
+            if e.pending is not None:
+                self.pending = (e.pending, direction, volume, decision)
+                log("STRATEGY", "warn", "{symbol}: {direction} emri zaman aşımına uğradı; sonucu gelene kadar yeni emir gönderilmez",
+                    symbol=self.symbol, direction=direction)
+            else:  # terminale hiç ulaşmadı
+                if decision is not None:
+                    self.risk.release(decision)
+                log("STRATEGY", "error", "{symbol}: İşlem başarısız: {error}", symbol=self.symbol, error=e)
+            return False
+        if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+            if decision is not None:
+                self.risk.release(decision)
+            log("STRATEGY", "error", "{symbol}: İşlem başarısız: {retcode}", symbol=self.symbol,
+                retcode=result.retcode if result else await self.gateway.run(mt5.last_error))
+            return False
+        self._filled(direction, volume)
+        return True
+
+    # Gerçekleşen günlük kar: defter varsa oradan (O(1)), yoksa kapama raporundan
+    async def _book(self, profit):
+        if self.journal is None:
+            self.state.total_profit_today += profit
+            return
+        await self.journal.sync(self.gateway)
+        self.state.total_profit_today = self.journal.today(self.symbol)
+
+    async def _after_close(self, profit, event):
+        state = self.state
+        await self._book(profit)
+        state.trade_direction = None
+        state.last_rsi_signal = None
+        state.current_lot = self.base_lot
+        if self.on_order:
+            self.on_order(event)
+        return self.close_cooldown
+
+    # Tek bir değerlendirme; ek bekleme süresini (saniye) döndürür.
+    # event: tetikleyen MarketEvent (zaman aşımıyla çağrıldıysa None)
+    async def evaluate(self, event=None):
+        state = self.state
+        state.evaluations += 1
+        self.reset_daily_if_needed()
+        if self.pending is not None and not self._settle_pending():
+            return 1  # zaman aşımına uğrayan emrin sonucu beklenirken karar verilmez
+        # Her tickte log basmamak için ayrıntılar sadece yeni barda yazılır
+        verbose = event is None or bool(event.new_bars)
+        if self.journal is not None:
+            state.total_profit_today = self.journal.today(self.symbol)
+        if state.no_trade_today:
+            return 0
+        if state.total_profit_today >= state.profit_target:
+            await self._book(await self.close_all_positions())
+            log("STRATEGY", "info", "{symbol}: Bugün hedefe ulaşıldı, işlem durduruldu.", symbol=self.symbol)
+            state.no_trade_today = True
+            return self.close_cooldown
+        values = await self.indicators(self.symbol, self.signal.graph)
+        rsi_1m, rsi_5m = values["rsi_1m"], values["rsi_htf"]
+        state.rsi_1m, state.rsi_5m = rsi_1m, rsi_5m
+        if rsi_1m is None or rsi_5m is None:
+            log("STRATEGY", "warn", "{symbol}: RSI verisi alınamadı.", symbol=self.symbol)
+            return 5
+        if verbose:
+            log("STRATEGY", "debug", "{symbol} RSI 1m: {rsi_1m}, RSI 5m: {rsi_5m}", symbol=self.symbol,
+                rsi_1m=rsi_1m, rsi_5m=rsi_5m)
+        # Karar: 5dk RSI ile toplu kapama, 1dk RSI ile işlem açma
+        decided = time.perf_counter()
+        close = self.signal.exit(values, _SIDES.get(state.trade_direction, 0))
+        direction = {1: "BUY", -1: "SELL"}.get(self.signal.entry(values))
+        _decision_seconds.observe(time.perf_counter() - decided)
+        if close:
+            side = state.trade_direction
+            delay = await self._after_close(await self.close_all_positions(), event)
+            log("STRATEGY", "info", "{symbol}: 5dk RSI {rsi_5m}, tüm {side} pozisyonları kapatıldı. Güncel kar: {profit}",
+                symbol=self.symbol, rsi_5m=rsi_5m, side=side, profit=state.total_profit_today)
+            return delay
+        if direction and await self.open_position(direction):
+            if self.on_order:
+                self.on_order(event)
+        return 0
+
+
+class StrategyScheduler:
+    def __init__(self, gateway, bar_cache, strategies, bar_timeframe: int, bar_count: int = 5000,
+                 min_interval: float = 0.25, max_interval: float = 2.0, closed_interval: float = 30.0,
+                 idle_timeout: float = 5.0):
+        self.gateway = gateway
+        self.bar_cache = bar_cache
+        self.strategies = {s.symbol: s for s in strategies}
+        self.bar_timeframe = bar_timeframe
+        self.bar_count = bar_count
+        self.idle_timeout = idle_timeout  # tick gelmese de (günlük reset için) en geç bu kadar sürede bir
+        self.active = True
+        # Sembol başına değişim tespiti; yoklamayı zamanlayıcı topluca yapar
+        self.watchers = {
+            s: MarketWatcher(gateway, s, timeframes=(bar_timeframe,), on_tick=bar_cache.apply_tick,
+                             min_interval=min_interval, max_interval=max_interval, closed_interval=closed_interval)
+            for s in self.strategies
+        }
+        self.versions = {s: 0 for s in self.strategies}
+        self.last_eval = {s: 0.0 for s in self.strategies}
+        self.order_latency = LatencyStats()
+        self.cycles = 0
+        self.evaluations = 0
+        self.busy_seconds = 0.0
+        self.last_cycle_ms = 0.0
+
+    def states(self):
+        return {s: strat.state for s, strat in self.strategies.items()}
+
+    async def run(self):
+        if not self.watchers:
+            log("SCHED", "warn", "İşlem yapılacak sembol yok (BOT_SYMBOLS boş); zamanlayıcı başlatılmadı")
+            return
+        while True:
+            try:
+                await self.cycle()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log("SCHED", "error", "{error}", error=e)
+            await asyncio.sleep(min(w.interval for w in self.watchers.values()))
+
+    async def cycle(self):
+        start = time.perf_counter()
+        symbols = list(self.strategies)
+        ticks = await self.gateway.run(_read_ticks, self.gateway.mt5, symbols)
+        now = time.monotonic()
+        due = []
+        for symbol, tick in zip(symbols, ticks):
+            watcher = self.watchers[symbol]
+            watcher.polls += 1
+            watcher.handle(tick)
+            event = watcher.event if watcher.version != self.versions[symbol] else None
+            self.versions[symbol] = watcher.version
+            if not self.active or not self.strategies[symbol].state.bot_active:
+                continue
+            if self.strategies[symbol].state.cooldown_until > now:
+                continue
+            if event is not None or now - self.last_eval[symbol] >= self.idle_timeout:
+                due.append((symbol, event))
+        if due:
+            # Değerlendirilecek sembollerin bayat M1 serileri tek işte yenilenir
+            await self.bar_cache.prefetch([(s, self.bar_timeframe) for s, _ in due], self.bar_count)
+            await asyncio.gather(*(self._evaluate(s, e) for s, e in due))
+        self.cycles += 1
+        elapsed = time.perf_counter() - start
+        _cycle_seconds.observe(elapsed)
+        self.last_cycle_ms = elapsed * 1000
+        self.busy_seconds += self.last_cycle_ms / 1000
+        return len(due)
+
+    async def _evaluate(self, symbol, event):
+        strategy = self.strategies[symbol]
+        self.last_eval[symbol] = time.monotonic()
+        self.evaluations += 1
+        try:
+            delay = await strategy.evaluate(event)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log("SCHED", "warn", "{symbol}: {error}", symbol=symbol, error=e)
+            delay = 5
+        if delay:
+            strategy.state.cooldown_until = time.monotonic() + delay
+
+    def stats(self):
+        return {
+            "symbols": len(self.strategies),
+            "cycles": self.cycles,
+            "evaluations": self.evaluations,
+            "last_cycle_ms": round(self.last_cycle_ms, 3),
+            "avg_cycle_ms": round(self.busy_seconds / self.cycles * 1000, 3) if self.cycles else 0.0,
+            "interval": round(min(w.interval for w in self.watchers.values()), 3) if self.watchers else None,
+            "signal_to_order": self.order_latency.as_dict(),
+        }
+
+
+# MT5 thread'inde çalışır: tüm sembollerin tick'leri tek işte
+def _read_ticks(mt5, symbols):
+    return [mt5.symbol_info_tick(s) for s in symbols]
@@ -0,0 +1,370 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+import time
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+
+import worker
+from event_log import LEVELS as LOG_LEVELS, log
+from ipc import Channel, ChannelClosed, RemoteError
+
+load_dotenv()
+
+# Çok hesaplı bot: hesap / terminal başına bir işçi süreci, tek FastAPI ön yüzü
+#
+# MetaTrader5 kütüphanesi süreç başına tek terminale bağlandığından her hesap
+# ayrı bir süreçte (worker.py) kendi terminaliyle çalışır; süreçler ayrı
+# çekirdeklerde ve ayrı GIL'lerle çalışır. Ön yüz işçilerle ipc kanalı
+# (multiprocessing Pipe; Windows'ta named pipe) üzerinden konuşur ve durum,
+# metrik ve komutları birleştirir.
+#
+# İzolasyon:
+#   - her istek işçi başına zaman aşımıyla gönderilir; birleşik uçlarda
+#     (/status, /account, ...) cevap vermeyen işçi {"error": ...} olarak
+#     döner, diğerlerini bekletmez,
+#   - her `heartbeat` sn'de ping atılır; `stall_timeout` sn cevap gelmezse
+#     (ör. GIL'i tutarak donmuş bir terminal çağrısı) işçi "stuck" sayılır,
+#     öldürülür ve yeniden başlatılır; ölen işçi artan beklemeyle (en çok
+#     `max_backoff`) yeniden başlatılır.
+#   Yeniden başlayan işçi açık pozisyonları terminalden görür, ancak
+#   martingale durumu (yön, lot) bellekte olduğundan sıfırdan başlar.
+#
+# Hesaplar SUPERVISOR_ACCOUNTS ile verilen JSON dosyasından okunur:
+#   [{"name": "demo1", "MT5_LOGIN": 123, "MT5_PASSWORD": "...", "MT5_SERVER": "...",
+#     "MT5_PATH": "C:/MT5-1/terminal64.exe", "BOT_SYMBOLS": "XAUUSD"}, ...]
+# "name" dışındaki alanlar işçinin ortam değişkenleridir (.env'dekileri ezer).
+# Depo klasörleri verilmezse hesap başına data/<name>/ altına ayrılır.
+#
+# Çalıştırma: SUPERVISOR_ACCOUNTS=accounts.json uvicorn supervisor:app --port 8000
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+_SAMPLE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})?( .*)$")
+
+
+def load_accounts(path: str):
+    with open(path) as f:
+        accounts = json.load(f)
+    names = [a["name"] for a in accounts]
+    if len(set(names)) != len(names):
+        raise ValueError("hesap adları benzersiz olmalı")
+    result = []
+    for account in accounts:
+        env = {k: str(v) for k, v in account.items() if k != "name"}
+        env.setdefault("BAR_STORE_DIR", os.path.join(DATA_DIR, account["name"], "bars"))
+        env.setdefault("TICK_STORE_DIR", os.path.join(DATA_DIR, account["name"], "ticks"))
+        result.append((account["name"], env))
+    return result
+
+
+def _kill(channel, process, timeout: float = 5.0):
+    if channel is not None:
+        channel.close()
+    if process is not None and process.is_alive():
+        process.terminate()
+        process.join(timeout)
+        if process.is_alive():
+            process.kill()
+            process.join(timeout)
+
+
+class WorkerHandle:
+    __slots__ = ("name", "env", "process", "channel", "state", "started", "last_seen", "restarts", "failures",
+                 "next_start", "last_error", "pid")
+
+    def __init__(self, name: str, env: dict):
+        self.name = name
+        self.env = env
+        self.process = None
+        self.channel = None
+        self.state = "stopped"   # starting, running, stuck, dead, stopped
+        self.started = 0.0
+        self.last_seen = 0.0
+        self.restarts = 0
+        self.failures = 0        # art arda başarısız başlatma (bekleme süresi için)
+        self.next_start = 0.0
+        self.last_error = None
+        self.pid = None
+
+    def start(self, ctx, loop):
+        parent, child = ctx.Pipe()
+        self.process = ctx.Process(target=worker.run, args=(child, self.name, self.env), name=f"bot-{self.name}")
+        self.process.start()
+        child.close()
+        self.pid = self.process.pid
+        self.channel = Channel(parent, name=f"sup-{self.name}").start(loop)
+        self.state = "starting"
+        self.started = self.last_seen = time.monotonic()
+
+    def kill(self):
+        _kill(self.channel, self.process)
+
+    def as_dict(self):
+        now = time.monotonic()
+        return {
+            "state": self.state,
+            "pid": self.pid,
+            "uptime": round(now - self.started, 1) if self.process is not None else None,
+            "last_seen": round(now - self.last_seen, 2) if self.process is not None else None,
+            "restarts": self.restarts,
+            "last_error": self.last_error,
+            "ipc": self.channel.stats() if self.channel is not None else None,
+        }
+
+
+class Supervisor:
+    def __init__(self, accounts, heartbeat: float = 2.0, stall_timeout: float = 20.0, start_timeout: float = 120.0,
+                 call_timeout: float = 5.0, restart: bool = True, max_backoff: float = 60.0):
+        self.workers = {name: WorkerHandle(name, env) for name, env in accounts}
+        self.heartbeat = heartbeat
+        self.stall_timeout = stall_timeout
+        self.start_timeout = start_timeout
+        self.call_timeout = call_timeout
+        self.restart = restart
+        self.max_backoff = max_backoff
+        self.ctx = multiprocessing.get_context("spawn")  # Windows ile aynı; thread'li süreç çatallanmaz
+        self.loop = None
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        for handle in self.workers.values():
+            handle.start(self.ctx, self.loop)
+            log("SUPERVISOR", "info", "{name}: işçi başlatıldı (pid {pid})", name=handle.name, pid=handle.pid)
+
+    def get(self, name: str):
+        handle = self.workers.get(name)
+        if handle is None:
+            raise HTTPException(status_code=404, detail="Unknown worker")
+        return handle
+
+    async def call(self, name: str, op: str, timeout: float = None, **args):
+        handle = self.get(name)
+        if handle.channel is None or handle.state in ("dead", "stopped"):
+            raise HTTPException(status_code=503, detail=f"{name}: {handle.state}")
+        try:
+            return await handle.channel.call(op, timeout or self.call_timeout, **args)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail=f"{name}: zaman aşımı")
+        except ChannelClosed:
+            raise HTTPException(status_code=503, detail=f"{name}: bağlantı kapandı")
+        except RemoteError as e:
+            raise HTTPException(status_code=e.status, detail=e.detail)
+
+    # Tüm (ya da seçili) işçilere aynı istek; hata veren işçi diğerlerini bekletmez
+    async def gather(self, op: str, names=None, **args):
+        names = list(names or self.workers)
+
+        async def one(name):
+            try:
+                return await self.call(name, op, **args)
+            except HTTPException as e:
+                return {"error": e.detail, "status": e.status_code}
+
+        return dict(zip(names, await asyncio.gather(*(one(n) for n in names))))
+
+    async def _check(self, handle):
+        now = time.monotonic()
+        if handle.state == "stopped":
+            return
+        if handle.state == "dead":
+            if self.restart and now >= handle.next_start:
+                handle.restarts += 1
+                handle.start(self.ctx, self.loop)
+                log("SUPERVISOR", "warn", "{name}: yeniden başlatıldı (pid {pid}, {restarts}. kez)",
+                    name=handle.name, pid=handle.pid, restarts=handle.restarts)
+            return
+        if not handle.process.is_alive():
+            self._down(handle, f"süreç çıktı (kod {handle.process.exitcode})")
+            return
+        try:
+            await handle.channel.call("ping", min(self.heartbeat, self.call_timeout))
+        except (asyncio.TimeoutError, ChannelClosed, RemoteError):
+            limit = self.start_timeout if handle.state == "starting" else self.stall_timeout
+            if now - handle.last_seen > limit:
+                if handle.state != "starting":
+                    handle.state = "stuck"
+                self._down(handle, f"{limit:.0f} sn cevap yok")
+            elif handle.state == "running":
+                handle.state = "stuck"  # eşik dolana kadar sadece işaretli
+            return
+        handle.last_seen = time.monotonic()
+        if handle.state != "running":
+            log("SUPERVISOR", "info", "{name}: çalışıyor", name=handle.name)
+        handle.state = "running"
+        handle.failures = 0
+
+    def _down(self, handle, reason):
+        log("SUPERVISOR", "error", "{name}: {state} -> kapatılıyor: {reason}", name=handle.name, state=handle.state,
+            reason=reason)
+        handle.last_error = reason
+        # terminate/join kısa sürse de loop bloke olmasın
+        self.loop.run_in_executor(None, _kill, handle.channel, handle.process)
+        handle.channel = None
+        handle.state = "dead"
+        handle.failures += 1
+        handle.next_start = time.monotonic() + min(self.max_backoff, 2 ** (handle.failures - 1))
+
+    async def run(self):
+        while True:
+            await asyncio.gather(*(self._check(h) for h in self.workers.values()), return_exceptions=True)
+            await asyncio.sleep(self.heartbeat)
+
+    async def shutdown(self, timeout: float = 10.0):
+        for handle in self.workers.values():
+            if handle.channel is not None and handle.state != "dead":
+                try:
+                    await handle.channel.call("shutdown", 2.0)
+                except (asyncio.TimeoutError, ChannelClosed, RemoteError):
+                    pass
+            handle.state = "stopped"
+        deadline = time.monotonic() + timeout
+        for handle in self.workers.values():
+            if handle.process is not None:
+                await self.loop.run_in_executor(None, handle.process.join, max(0.0, deadline - time.monotonic()))
+                handle.kill()
+
+    def stats(self):
+        return {name: handle.as_dict() for name, handle in self.workers.items()}
+
+
+# İşçi metriklerine account etiketi. Prometheus bir ailenin örneklerini bir
+# arada beklediğinden satırlar aile başına toplanır; HELP / TYPE bir kez.
+def merge_metrics(texts):
+    families = {}  # ad -> (başlık satırları, örnekler)
+    for name, text in texts.items():
+        if not isinstance(text, str):
+            continue
+        current = None
+        for line in text.splitlines():
+            if line.startswith(("# HELP ", "# TYPE ")):
+                current = line.split()[2]
+                head = families.setdefault(current, ([], []))[0]
+                if line not in head:
+                    head.append(line)
+                continue
+            match = _SAMPLE.match(line)
+            if line.startswith("#") or match is None:
+                continue
+            metric, labels, value = match.groups()
+            labels = f'{{account="{name}"' + ("," + labels[1:] if labels and labels != "{}" else "}")
+            families.setdefault(current or metric, ([], []))[1].append(metric + labels + value)
+    out = []
+    for head, samples in families.values():
+        out.extend(head)
+        out.extend(samples)
+    return out
+
+
+app = FastAPI()
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:5173"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+supervisor = Supervisor(
+    load_accounts(os.getenv("SUPERVISOR_ACCOUNTS", "accounts.json")),
+    heartbeat=float(os.getenv("SUPERVISOR_HEARTBEAT", "2.0")),
+    stall_timeout=float(os.getenv("SUPERVISOR_STALL_TIMEOUT", "20.0")),
+    start_timeout=float(os.getenv("SUPERVISOR_START_TIMEOUT", "120.0")),
+    call_timeout=float(os.getenv("SUPERVISOR_CALL_TIMEOUT", "5.0")),
+    restart=os.getenv("SUPERVISOR_RESTART", "1") == "1",
+)
+
+
+def _selected(worker: str = None):
+    return [supervisor.get(worker).name] if worker else None
+
+
+@app.get("/workers")
+async def get_workers():
+    return supervisor.stats()
+
+
+@app.get("/status")
+async def get_status(worker: str = None):
+    return await supervisor.gather("status", _selected(worker))
+
+
+@app.get("/status/{worker}/{symbol}")
+async def get_symbol_status(worker: str, symbol: str):
+    return await supervisor.call(worker, "symbol_status", symbol=symbol)
+
+
+@app.get("/account")
+async def get_account(worker: str = None):
+    return await supervisor.gather("account", _selected(worker))
+
+
+@app.get("/positions")
+async def get_positions(worker: str = None, symbol: str = None):
+    return await supervisor.gather("positions", _selected(worker), symbol=symbol)
+
+
+# worker verilmezse tüm işçiler; symbol verilirse sadece o sembol
+@app.post("/toggle")
+async def toggle_bot(state: bool, worker: str = None, symbol: str = None):
+    return await supervisor.gather("toggle", _selected(worker), state=state, symbol=symbol)
+
+
+@app.get("/cache")
+async def get_cache(worker: str = None):
+    return await supervisor.gather("cache", _selected(worker))
+
+
+# Tüm işçilerin olayları zamana göre birleşik; her olaya "worker" eklenir.
+# since işçinin kendi olay sırasıdır, worker ile birlikte anlamlıdır.
+@app.get("/logs")
+async def get_logs(worker: str = None, level: str = None, category: str = None, since: int = None,
+                   contains: str = None, limit: int = 200):
+    if level is not None and level not in LOG_LEVELS:
+        raise HTTPException(status_code=400, detail=f"level: {', '.join(LOG_LEVELS)}")
+    categories = {c.strip() for c in category.split(",") if c.strip()} if category else None
+    results = await supervisor.gather("logs", _selected(worker), level=level, categories=categories, since=since,
+                                      contains=contains, limit=max(1, min(limit, 5000)))
+    items = []
+    for name, events in results.items():
+        if isinstance(events, list):
+            items.extend(dict(e, worker=name) for e in events)
+    items.sort(key=lambda e: e["time"])
+    # since ile takipte en eskiler (imleç atlamasın), yoksa en yeniler
+    return {"events": items[:limit] if since is not None else items[-limit:], "errors": {n: r for n, r in results.items() if isinstance(r, dict)}}
+
+
+@app.get("/metrics")
+async def get_metrics():
+    texts = await supervisor.gather("metrics")
+    lines = merge_metrics(texts)
+    lines.append("# HELP supervisor_worker_up İşçi süreci cevap veriyor (1) ya da vermiyor (0)")
+    lines.append("# TYPE supervisor_worker_up gauge")
+    for name, handle in supervisor.workers.items():
+        lines.append(f'supervisor_worker_up{{account="{name}"}} {int(handle.state == "running")}')
+    lines.append("# HELP supervisor_worker_restarts İşçi yeniden başlatma sayısı")
+    lines.append("# TYPE supervisor_worker_restarts gauge")
+    for name, handle in supervisor.workers.items():
+        lines.append(f'supervisor_worker_restarts{{account="{name}"}} {handle.restarts}')
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+
+@app.on_event("startup")
+async def startup_event():
+    supervisor.start()
+    asyncio.create_task(supervisor.run())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await supervisor.shutdown()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000)
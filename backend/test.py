@@ -5,6 +5,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from indicators import rsi_sma
 
 # .env yükle ve bağlantı kur
 load_dotenv()
@@ -22,25 +23,38 @@ if not mt5.login(login, password, server):
 
 print("✅ Bağlantı başarılı")
 
-# RSI hesaplama fonksiyonu
-def calculate_rsi(close_prices, period=5):
-    delta = close_prices.diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
-
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-# Dakika başında bekleyen fonksiyon
-def dakika_basinda_bekle():
-    now = datetime.now()
-    saniye_kalani = 60 - now.second
-    print(f"⏳ Yeni mum bekleniyor ({saniye_kalani} saniye)...")
-    time.sleep(saniye_kalani + 2)  # tampon: terminal gecikmesine karşı
+# Yeni 1 dakikalık mumu bekleyen fonksiyon
+# Sabit `sleep(60 - saniye + 2)` yerine tick zamanı (time_msc) izlenir; mum
+# sınırına yaklaşınca sık, uzaktayken seyrek, piyasa kapalıyken (tick
+# akmıyorsa) daha da seyrek yoklanır.
+son_mum = None
+
+def dakika_basinda_bekle(sik_aralik=0.2, kapali_aralik=30.0):
+    global son_mum
+    print("⏳ Yeni mum bekleniyor...")
+    son_tick_msc = None
+    durgun_basi = time.time()
+    while True:
+        tick = mt5.symbol_info_tick(symbol)
+        if tick is not None:
+            mum = tick.time - tick.time % 60
+            if son_mum is None or mum > son_mum:
+                ilk = son_mum is None
+                son_mum = mum
+                if not ilk:
+                    return
+            if tick.time_msc != son_tick_msc:
+                son_tick_msc = tick.time_msc
+                durgun_basi = time.time()
+            kalan = 60 - tick.time % 60
+        else:
+            kalan = 60
+        if time.time() - durgun_basi > 120:
+            time.sleep(kapali_aralik)
+        elif kalan > 3:
+            time.sleep(min(kalan - 2, 5))
+        else:
+            time.sleep(sik_aralik)
 
 # Bot ayarları
 symbol = "XAUUSD"
@@ -123,7 +137,7 @@ try:
         df['time'] = pd.to_datetime(df['time'], unit='s')
         df.set_index('time', inplace=True)
         df['close'] = df['close'].astype(float)
-        df['rsi'] = calculate_rsi(df['close'], period=5)
+        df['rsi'] = rsi_sma(df['close'].to_numpy(), 5)
 
         if df['rsi'].dropna().empty:
             print("❌ RSI değeri hesaplanamadı (yetersiz kapanış verisi).")
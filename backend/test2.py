@@ -4,6 +4,9 @@ import time
 import pandas as pd
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from indicators import rsi_sma
+from batch_close import build_close_request, retry_retcodes
+from deal_journal import DealJournal
 
 # .env yükle ve bağlantı kur
 load_dotenv()
@@ -21,23 +24,38 @@ if not mt5.login(login, password, server):
 
 print("✅ Bağlantı başarılı")
 
-# RSI hesaplama fonksiyonu
-def calculate_rsi(close_prices, period=5):
-    delta = close_prices.diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-# Dakika başında bekleyen fonksiyon
-def dakika_basinda_bekle():
-    now = datetime.now()
-    saniye_kalani = 60 - now.second
-    print(f"⏳ Yeni mum bekleniyor ({saniye_kalani} saniye)...")
-    time.sleep(saniye_kalani + 2)  # tampon: terminal gecikmesine karşı
+# Yeni 1 dakikalık mumu bekleyen fonksiyon
+# Sabit `sleep(60 - saniye + 2)` yerine tick zamanı (time_msc) izlenir; mum
+# sınırına yaklaşınca sık, uzaktayken seyrek, piyasa kapalıyken (tick
+# akmıyorsa) daha da seyrek yoklanır.
+son_mum = None
+
+def dakika_basinda_bekle(sik_aralik=0.2, kapali_aralik=30.0):
+    global son_mum
+    print("⏳ Yeni mum bekleniyor...")
+    son_tick_msc = None
+    durgun_basi = time.time()
+    while True:
+        tick = mt5.symbol_info_tick(symbol)
+        if tick is not None:
+            mum = tick.time - tick.time % 60
+            if son_mum is None or mum > son_mum:
+                ilk = son_mum is None
+                son_mum = mum
+                if not ilk:
+                    return
+            if tick.time_msc != son_tick_msc:
+                son_tick_msc = tick.time_msc
+                durgun_basi = time.time()
+            kalan = 60 - tick.time % 60
+        else:
+            kalan = 60
+        if time.time() - durgun_basi > 120:
+            time.sleep(kapali_aralik)
+        elif kalan > 3:
+            time.sleep(min(kalan - 2, 5))
+        else:
+            time.sleep(sik_aralik)
 
 # Tüm pozisyonları kapatma fonksiyonu
 def tum_pozisyonlari_kapat():
@@ -46,34 +64,26 @@ def tum_pozisyonlari_kapat():
         print("📭 Kapatılacak pozisyon yok.")
         return True
 
-    success = True
-    for pos in positions:
-        symbol = pos.symbol
-        ticket = pos.ticket
-        volume = pos.volume
-        # Pozisyon türüne göre ters emir tipi
-        order_type = mt5.ORDER_TYPE_SELL if pos.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
-        price = mt5.symbol_info_tick(symbol).bid if order_type == mt5.ORDER_TYPE_SELL else mt5.symbol_info_tick(symbol).ask
-
-        request = {
-            "action": mt5.TRADE_ACTION_DEAL,
-            "symbol": symbol,
-            "volume": volume,
-            "type": order_type,
-            "position": ticket,
-            "price": price,
-            "deviation": 100,
-            "magic": 123456,
-            "comment": "Toplu Pozisyon Kapatma",
-            "type_time": mt5.ORDER_TIME_GTC,
-            "type_filling": mt5.ORDER_FILLING_RETURN,
-        }
+    # Sembol başına tek tick; tüm istekler önceden hazırlanır
+    ticks = {symbol: mt5.symbol_info_tick(symbol) for symbol in {p.symbol for p in positions}}
+    requests = [(pos, build_close_request(mt5, pos, ticks[pos.symbol], deviation=100, magic=123456,
+                                          comment="Toplu Pozisyon Kapatma", filling=mt5.ORDER_FILLING_RETURN))
+                for pos in positions]
 
+    success = True
+    for pos, request in requests:
         result = mt5.order_send(request)
-        if result.retcode == mt5.TRADE_RETCODE_DONE:
-            print(f"✅ Pozisyon kapatıldı: Ticket {ticket}")
+        # Requote: yenilenmiş fiyatla en fazla 3 kez tekrar dene
+        for _ in range(3):
+            if result is None or result.retcode not in retry_retcodes(mt5):
+                break
+            tick = mt5.symbol_info_tick(pos.symbol)
+            request["price"] = tick.bid if pos.type == mt5.ORDER_TYPE_BUY else tick.ask
+            result = mt5.order_send(request)
+        if result is not None and result.retcode == mt5.TRADE_RETCODE_DONE:
+            print(f"✅ Pozisyon kapatıldı: Ticket {pos.ticket}")
         else:
-            print(f"❌ Pozisyon kapatma başarısız: Ticket {ticket} | Retcode: {result.retcode}")
+            print(f"❌ Pozisyon kapatma başarısız: Ticket {pos.ticket} | Retcode: {result.retcode if result else mt5.last_error()}")
             success = False
     return success
 
@@ -111,6 +121,7 @@ def durum_ozeti():
 
 durum_ozeti()
 
+journal = DealJournal()
 print("♻️ RSI botu başlatıldı. Her yeni 1 dakikalık mumda çalışacak...")
 
 try:
@@ -130,7 +141,7 @@ try:
             continue
 
         # 1 dakikalık mum verisi
-        rates_1m = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M1, 0, 100)
+        rates_1m = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M1, 0, 500)
         if rates_1m is None or len(rates_1m) < 6:
             print("❌ 1 dakikalık mum verisi alınamadı veya yetersiz.")
             continue
@@ -139,7 +150,7 @@ try:
         df_1m['time'] = pd.to_datetime(df_1m['time'], unit='s')
         df_1m.set_index('time', inplace=True)
         df_1m['close'] = df_1m['close'].astype(float)
-        df_1m['rsi'] = calculate_rsi(df_1m['close'], period=5)
+        df_1m['rsi'] = rsi_sma(df_1m['close'].to_numpy(), 5)
 
         if df_1m['rsi'].dropna().empty:
             print("❌ 1 dakikalık RSI değeri hesaplanamadı.")
@@ -149,30 +160,17 @@ try:
 
 
         
-        # 5 dakikalık RSI sadece her 5 dakikada bir güncellensin
-        if datetime.now().minute % 5 == 0:
-            rates_5m = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M5, 0, 100)
-            if rates_5m is None or len(rates_5m) < 6:
-                print("❌ 5 dakikalık mum verisi alınamadı veya yetersiz.")
-                continue
-
-            df_5m = pd.DataFrame(rates_5m)
-            df_5m['time'] = pd.to_datetime(df_5m['time'], unit='s')
-            df_5m.set_index('time', inplace=True)
-            df_5m['close'] = df_5m['close'].astype(float)
-            df_5m['rsi'] = calculate_rsi(df_5m['close'], period=5)
-
-            if df_5m['rsi'].dropna().empty:
-                print("❌ 5 dakikalık RSI değeri hesaplanamadı.")
-                continue
-
-            latest_rsi_5m = df_5m['rsi'].dropna().iloc[-1]
-
-        # Günlük karı kontrol et (son 24 saatteki kar toplamı)
-        deals = mt5.history_deals_get(datetime.now() - timedelta(days=1), datetime.now())
-        total_profit = 0
-        if deals:
-            total_profit = sum([d.profit for d in deals])
+        # 5 dakikalık RSI aynı M1 verisinden türetilir (ikinci terminal çağrısı yok)
+        df_5m = df_1m[['close']].resample('5min', label='left', closed='left').last().dropna()
+        df_5m['rsi'] = rsi_sma(df_5m['close'].to_numpy(), 5)
+        if df_5m['rsi'].dropna().empty:
+            print("❌ 5 dakikalık RSI değeri hesaplanamadı.")
+            continue
+        latest_rsi_5m = df_5m['rsi'].dropna().iloc[-1]
+
+        # Günlük karı kontrol et: sadece yeni işlemler çekilir (komisyon ve swap dahil, UTC günü)
+        journal.ingest(mt5.history_deals_get(*journal.window()))
+        total_profit = journal.today()
         if latest_rsi_5m is not None:
             print(f"🕒 {datetime.now().strftime('%H:%M:%S')} | 1m RSI: {latest_rsi_1m:.2f} | 5m RSI: {latest_rsi_5m:.2f} | Günlük Kar: {total_profit:.2f}", end=" ")
         else:
@@ -0,0 +1,383 @@
+import asyncio
+import bisect
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from event_log import log
+
+# Tik kaydı: bellekte sabit boy halka + diskte sıkıştırılmış zaman dilimleri
+#
+# Her sembolün son `capacity` tiki önceden ayrılmış bir NumPy halkasında
+# durur (bellek çalışma süresinden bağımsız sabittir); anlık sorgular
+# buradan kopyasız ikili aramayla cevaplanır. Henüz diske yazılmamış tikler
+# (halkanın sonundaki `pending` tik) şu durumlarda tek bir segment dosyası
+# olarak yazılır:
+#   - bekleyenler `segment_seconds`'tan uzun bir aralığı kapsıyorsa ya da en
+#     eskisi o kadar eskiyse,
+#   - yeni tikler henüz yazılmamış tiklerin üzerine yazacaksa (kayıp olmaz).
+# Segment dosyası adı kapsadığı ilk ve son time_msc'dir; dosya adları
+# bellekte sıralı bir indekstir, aralık sorgusu sadece kesişen dosyaları açar.
+# Sütunlar fark kodlanır (zaman ms farkı, fiyatlar 10^k ile tam sayı farkı) ve
+# np.savez_compressed ile yazılır.
+#
+# Sorgu birleşimi: halkadaki en eski tikten itibaren halka, öncesi diskten
+# okunur (halkadaki tikler diskte de olabilir; iki kez dönmez).
+
+TICK_DTYPE = np.dtype([
+    ("time_msc", "<i8"),
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+    ("last", "<f8"),
+    ("volume", "<f8"),
+    ("flags", "<u4"),
+])
+PRICE_FIELDS = ("bid", "ask", "last")
+
+
+# MT5 tik dizisinden (copy_ticks_*) kayıt biçimine
+def to_ticks(raw):
+    ticks = np.zeros(len(raw), dtype=TICK_DTYPE)
+    if len(raw):
+        ticks["time_msc"] = raw["time_msc"]
+        for name in PRICE_FIELDS:
+            ticks[name] = raw[name]
+        ticks["volume"] = raw["volume_real"]
+        ticks["flags"] = raw["flags"]
+    return ticks
+
+
+class TickRing:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.buf = np.zeros(capacity, dtype=TICK_DTYPE)
+        self.start = 0  # en eski tikin indeksi
+        self.count = 0
+
+    def append(self, ticks):
+        n = len(ticks)
+        if n == 0:
+            return
+        if n > self.capacity:
+            ticks = ticks[-self.capacity:]
+            n = self.capacity
+        end = (self.start + self.count) % self.capacity
+        first = min(n, self.capacity - end)
+        self.buf[end:end + first] = ticks[:first]
+        self.buf[:n - first] = ticks[first:]
+        overflow = max(self.count + n - self.capacity, 0)
+        self.start = (self.start + overflow) % self.capacity
+        self.count = min(self.count + n, self.capacity)
+
+    # Zaman sırasıyla en fazla iki görünüm (halka sarıldıysa)
+    def parts(self):
+        end = self.start + self.count
+        if end <= self.capacity:
+            return (self.buf[self.start:end],)
+        return self.buf[self.start:], self.buf[:end - self.capacity]
+
+    # Mantıksal indeks (0: en eski) için zaman
+    def time_at(self, i):
+        return int(self.buf["time_msc"][(self.start + i) % self.capacity])
+
+    def oldest(self):
+        return self.time_at(0) if self.count else None
+
+    def newest(self):
+        return self.time_at(self.count - 1) if self.count else None
+
+    def tail(self, n):
+        if n <= 0:
+            return np.zeros(0, dtype=TICK_DTYPE)
+        parts = self.parts()
+        return np.concatenate(parts)[-n:] if len(parts) > 1 else parts[0][-n:].copy()
+
+    def range(self, lo, hi):
+        out = []
+        for part in self.parts():
+            times = part["time_msc"]
+            a = int(np.searchsorted(times, lo, "left"))
+            b = int(np.searchsorted(times, hi, "right"))
+            if b > a:
+                out.append(part[a:b])
+        return np.concatenate(out) if out else np.zeros(0, dtype=TICK_DTYPE)
+
+
+def _scale(prices):
+    for k in range(9):
+        scaled = prices * 10 ** k
+        if np.all(np.abs(scaled - np.rint(scaled)) < 1e-6):
+            return 10 ** k
+    return 10 ** 8
+
+
+def _deltas(values):
+    return np.concatenate((values[:1], np.diff(values)))
+
+
+def encode_segment(ticks):
+    prices = np.concatenate([ticks[f] for f in PRICE_FIELDS])
+    scale = _scale(prices)
+    columns = {"scale": np.array([scale], dtype=np.int64), "time_msc": _deltas(ticks["time_msc"])}
+    for name in PRICE_FIELDS:
+        columns[name] = _deltas(np.rint(ticks[name] * scale).astype(np.int64))
+    columns["volume"] = ticks["volume"]
+    columns["flags"] = ticks["flags"]
+    return columns
+
+
+def decode_segment(columns):
+    scale = int(columns["scale"][0])
+    ticks = np.zeros(len(columns["time_msc"]), dtype=TICK_DTYPE)
+    ticks["time_msc"] = np.cumsum(columns["time_msc"])
+    for name in PRICE_FIELDS:
+        ticks[name] = np.cumsum(columns[name]) / scale
+    ticks["volume"] = columns["volume"]
+    ticks["flags"] = columns["flags"]
+    return ticks
+
+
+class TickSeries:
+    def __init__(self, path: str, capacity: int, segment_seconds: float, cache):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.ring = TickRing(capacity)
+        self.segment_ms = int(segment_seconds * 1000)
+        self.cache = cache  # ortak LRU: yol -> çözülmüş segment
+        self.pending = 0    # halkanın sonundaki, diske yazılmamış tik sayısı
+        self.firsts = []
+        self.lasts = []
+        self.names = []
+        self.disk_bytes = 0
+        self.written = 0
+        for name in sorted(os.listdir(path), key=lambda n: int(n.split("_")[0]) if n[0].isdigit() else -1):
+            if name.endswith(".npz") and name[0].isdigit():
+                first, last = name[:-4].split("_")
+                self.firsts.append(int(first))
+                self.lasts.append(int(last))
+                self.names.append(name)
+                self.disk_bytes += os.path.getsize(os.path.join(path, name))
+
+    def last_msc(self):
+        newest = self.ring.newest()
+        if newest is not None:
+            return newest
+        return self.lasts[-1] if self.lasts else None
+
+    def _write(self, ticks):
+        if len(ticks) == 0:
+            return
+        first, last = int(ticks["time_msc"][0]), int(ticks["time_msc"][-1])
+        if self.lasts and first < self.lasts[-1]:
+            return  # sıra dışı (yeniden başlatma sonrası tekrar): zaten diskte
+        name = f"{first}_{last}.npz"
+        path = os.path.join(self.path, name)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **encode_segment(ticks))
+        os.replace(tmp, path)
+        self.firsts.append(first)
+        self.lasts.append(last)
+        self.names.append(name)
+        self.disk_bytes += os.path.getsize(path)
+        self.written += len(ticks)
+
+    def flush(self):
+        self._write(self.ring.tail(self.pending))
+        self.pending = 0
+
+    def add(self, ticks):
+        n = len(ticks)
+        if n == 0:
+            return
+        capacity = self.ring.capacity
+        if self.pending + n > capacity:
+            self.flush()  # yazılmamış tiklerin üzerine yazılmadan önce
+        if n > capacity:
+            # Halkaya sığmayan (uzun kesinti sonrası) kısım doğrudan diske
+            for i in range(0, n - capacity, capacity):
+                self._write(ticks[i:min(i + capacity, n - capacity)])
+            ticks = ticks[n - capacity:]
+            n = capacity
+        self.ring.append(ticks)
+        self.pending += n
+
+    # Yaşa göre yuvarlama: bekleyenler bir segment süresini doldurduysa
+    def maintain(self, now_msc):
+        if self.pending == 0:
+            return
+        newest = self.ring.newest()
+        oldest_pending = self.ring.time_at(self.ring.count - self.pending)
+        if newest - oldest_pending >= self.segment_ms or now_msc - oldest_pending >= self.segment_ms:
+            self.flush()
+
+    def _segment(self, i):
+        path = os.path.join(self.path, self.names[i])
+        ticks = self.cache.get(path)
+        if ticks is None:
+            with np.load(path) as data:
+                ticks = decode_segment({k: data[k] for k in data.files})
+            self.cache[path] = ticks
+            while len(self.cache) > self.cache.max_entries:
+                self.cache.popitem(last=False)
+        self.cache.move_to_end(path)
+        return ticks
+
+    def _disk_range(self, lo, hi):
+        out = []
+        # İlk kesişen segment: son zamanı lo'dan küçük olmayan ilk dosya
+        i = bisect.bisect_left(self.lasts, lo)
+        while i < len(self.firsts) and self.firsts[i] <= hi:
+            ticks = self._segment(i)
+            times = ticks["time_msc"]
+            a = int(np.searchsorted(times, lo, "left"))
+            b = int(np.searchsorted(times, hi, "right"))
+            if b > a:
+                out.append(ticks[a:b])
+            i += 1
+        return out
+
+    def range(self, lo, hi):
+        oldest = self.ring.oldest()
+        parts = []
+        if oldest is None or lo < oldest:
+            parts += self._disk_range(lo, hi if oldest is None else min(hi, oldest - 1))
+        if oldest is not None and hi >= oldest:
+            parts.append(self.ring.range(max(lo, oldest), hi))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=TICK_DTYPE)
+
+    def stats(self):
+        return {"ring": self.ring.count, "capacity": self.ring.capacity, "pending": self.pending,
+                "oldest_in_ring": self.ring.oldest(), "last_msc": self.last_msc(), "segments": len(self.names),
+                "disk_bytes": self.disk_bytes, "written": self.written}
+
+
+class _SegmentCache(OrderedDict):
+    def __init__(self, max_entries):
+        super().__init__()
+        self.max_entries = max_entries
+
+
+class TickStore:
+    def __init__(self, root: str, capacity: int = 100000, segment_seconds: float = 600.0, cache_segments: int = 8):
+        self.root = root
+        self.capacity = capacity
+        self.segment_seconds = segment_seconds
+        self.cache = _SegmentCache(cache_segments)
+        self.series = {}
+
+    def get(self, symbol: str):
+        series = self.series.get(symbol)
+        if series is None:
+            series = TickSeries(os.path.join(self.root, symbol), self.capacity, self.segment_seconds, self.cache)
+            self.series[symbol] = series
+        return series
+
+    # [lo, hi] ms aralığı; limit aşılırsa baştan `limit` tik ve devam imleci.
+    # Sayfa sınırında aynı milisaniyedeki tikler bölünmesin diye son ms grubu
+    # bir sonraki sayfaya bırakılır (next = o grubun zamanı). Tek bir ms grubu
+    # limitten büyükse imleç ilerleyemez; o durumda sayfa grubun sonuna kadar
+    # büyütülür.
+    def range(self, symbol: str, lo: int, hi: int, limit: int = None):
+        ticks = self.get(symbol).range(lo, hi)
+        if limit is None or len(ticks) <= limit:
+            return ticks, None
+        times = ticks["time_msc"]
+        boundary = int(times[limit])
+        end = int(np.searchsorted(times[:limit], boundary, "left"))
+        if end == 0:
+            end = int(np.searchsorted(times, boundary, "right"))
+        if end >= len(ticks):
+            return ticks, None
+        return ticks[:end], int(times[end])
+
+    def flush_all(self):
+        for series in self.series.values():
+            series.flush()
+
+    def stats(self):
+        return {symbol: series.stats() for symbol, series in self.series.items()}
+
+
+# MT5 thread'inde: tüm sembollerin tikleri tek işte
+def _copy_ticks(mt5, requests, flags):
+    return [mt5.copy_ticks_from(symbol, date_from, count, flags) for symbol, date_from, count in requests]
+
+
+# Sembol başına imleç (son time_msc ve o milisaniyede görülen tik sayısı);
+# terminalden imlecin saniyesinden itibaren istenir, görülenler elenir
+class TickRecorder:
+    def __init__(self, store: TickStore, gateway, mt5, symbols, interval: float = 1.0, batch: int = 50000,
+                 backfill: float = 3600.0):
+        self.store = store
+        self.gateway = gateway
+        self.mt5 = mt5
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.batch = batch
+        self.backfill = backfill  # ilk çalıştırmada geriye doğru saniye
+        self.cursors = {}
+        self.polls = 0
+        self.recorded = 0
+
+    def _cursor(self, symbol):
+        cursor = self.cursors.get(symbol)
+        if cursor is None:
+            series = self.store.get(symbol)
+            last = series.last_msc()
+            if last is None:
+                cursor = [int((time.time() - self.backfill) * 1000), 0]
+            else:
+                # Yeniden başlatma: son ms'de zaten kaydedilmiş tikler tekrar yazılmasın
+                cursor = [last, len(series.range(last, last))]
+            self.cursors[symbol] = cursor
+        return cursor
+
+    def _accept(self, symbol, raw):
+        cursor = self._cursor(symbol)
+        last, seen = cursor
+        times = raw["time_msc"]
+        keep = times > last
+        same = np.flatnonzero(times == last)
+        keep[same[seen:]] = True  # aynı ms'de daha önce görülmemiş tikler
+        ticks = to_ticks(raw[keep])
+        if len(ticks):
+            newest = int(times[-1])
+            cursor[0] = newest
+            cursor[1] = int(np.count_nonzero(times == newest))
+            self.store.get(symbol).add(ticks)
+            self.recorded += len(ticks)
+        return len(ticks)
+
+    # Bir tur; True dönerse bazı sembollerde birikmiş tik kaldı
+    async def poll_once(self):
+        requests = [(s, self._cursor(s)[0] // 1000, self.batch) for s in self.symbols]
+        results = await self.gateway.run(_copy_ticks, self.mt5, requests, self.mt5.COPY_TICKS_ALL)
+        self.polls += 1
+        backlog = False
+        for (symbol, _, _), raw in zip(requests, results):
+            if raw is None or len(raw) == 0:
+                continue
+            self._accept(symbol, raw)
+            backlog |= len(raw) >= self.batch
+        now_msc = int(time.time() * 1000)
+        for symbol in self.symbols:
+            self.store.get(symbol).maintain(now_msc)
+        return backlog
+
+    async def run(self):
+        while True:
+            backlog = False
+            try:
+                backlog = await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log("TICKS", "error", "{error}", error=e)
+            if not backlog:
+                await asyncio.sleep(self.interval)
+
+    def stats(self):
+        return {"polls": self.polls, "recorded": self.recorded, "symbols": self.store.stats()}
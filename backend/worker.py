@@ -0,0 +1,107 @@
+import asyncio
+import os
+import time
+
+from ipc import Server
+
+# Hesap başına bot süreci (supervisor.py tarafından başlatılır)
+#
+# MetaTrader5 kütüphanesi süreç başına tek terminale bağlanır. Her işçi kendi
+# ortamıyla (MT5_LOGIN / MT5_PASSWORD / MT5_SERVER / MT5_PATH, BOT_SYMBOLS,
+# veri klasörleri) main.py'yi içe aktarır; gateway, bar önbelleği, strateji
+# zamanlayıcısı vb. bu süreçte tek bir terminal için kurulur. HTTP sunucusu
+# açılmaz: main'in arka plan görevleri başlatılır ve ön yüzün istekleri ipc
+# kanalından main'in endpoint fonksiyonlarına yönlendirilir.
+#
+# Kanal kapanırsa (supervisor öldü) süreç de kapanır; atexit kancaları
+# (gateway.shutdown, tik deposu) normal çıkıştaki gibi çalışır.
+
+
+# Bellek içi ASGI çağrısı: /ohlc, /rsi gibi uçlar HTTP sunucusu olmadan
+# main.app'e yönlendirilir. Akış yanıtları (SSE) desteklenmez.
+async def _asgi(app, method, path, query, headers, body):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 0),
+    }
+    sent = False
+    response = {"status": 500, "headers": [], "body": []}
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = [(k.decode("latin-1"), v.decode("latin-1")) for k, v in message.get("headers", ())]
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    response["body"] = b"".join(response["body"])
+    return response
+
+
+def handlers(engine, stop):
+    from fastapi.encoders import jsonable_encoder
+    from event_log import events
+
+    async def ping():
+        return {"time": time.time(), "pid": os.getpid(), "gateway": engine.gateway.stats()}
+
+    async def status():
+        return jsonable_encoder(engine.status_payload())
+
+    async def symbol_status(symbol):
+        return jsonable_encoder(await engine.get_symbol_status(symbol))
+
+    async def account():
+        return jsonable_encoder(await engine.get_account_info())
+
+    async def positions(symbol=None):
+        return jsonable_encoder(await engine.get_positions(symbol))
+
+    async def toggle(state, symbol=None):
+        return jsonable_encoder(await engine.toggle_bot(state, symbol))
+
+    async def cache():
+        return jsonable_encoder(await engine.get_cache_stats())
+
+    async def metrics():
+        return engine.registry.render()
+
+    async def logs(level=None, categories=None, since=None, contains=None, limit=200):
+        return events.query(level, categories, since, contains, limit)
+
+    async def http(method, path, query="", headers=(), body=b""):
+        return await _asgi(engine.app, method, path, query, headers, body)
+
+    async def shutdown():
+        stop.set()
+        return True
+
+    return {"ping": ping, "status": status, "symbol_status": symbol_status, "account": account,
+            "positions": positions, "toggle": toggle, "cache": cache, "metrics": metrics, "logs": logs,
+            "http": http, "shutdown": shutdown}
+
+
+async def _serve(conn, name):
+    import main as engine  # ortam bu süreçte ayarlandı; terminal burada başlatılır
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    server = Server(conn, handlers(engine, stop), name=f"worker-{name}", on_close=stop.set).start(loop)
+    await engine.startup_event()
+    await stop.wait()
+    server.close()
+
+
+# multiprocessing hedefi (spawn): env bu hesabın ortamı
+def run(conn, name, env):
+    os.environ.update({k: str(v) for k, v in env.items()})
+    asyncio.run(_serve(conn, name))
@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+from event_log import log
+
+# WebSocket yayın merkezi
+#
+# Her sembol için tek bir üretici task çalışır: güncellemeyi bir kez hesaplar,
+# bir kez JSON'a çevirir ve tüm abonelerin kuyruklarına dağıtır. Kuyruklar
+# sınırlıdır; yetişemeyen istemci düşürülür (kuyruğa None konur, bağlantı
+# kapatılır). Son abone ayrılınca üretici durdurulur.
+
+
+class Subscriber:
+    __slots__ = ("symbol", "queue", "dropped")
+
+    def __init__(self, symbol, queue_size):
+        self.symbol = symbol
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+
+class WSHub:
+    def __init__(self, produce, interval: float = 5.0, queue_size: int = 8):
+        self.produce = produce  # async fn(symbol) -> dict
+        self.interval = interval
+        self.queue_size = queue_size
+        self.subscribers = {}
+        self.producers = {}
+        self.last_message = {}
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, symbol: str):
+        sub = Subscriber(symbol, self.queue_size)
+        subs = self.subscribers.setdefault(symbol, set())
+        subs.add(sub)
+        # Yeni gelen istemci bir sonraki turu beklemesin
+        last = self.last_message.get(symbol)
+        if last is not None:
+            sub.queue.put_nowait(last)
+        if symbol not in self.producers:
+            self.producers[symbol] = asyncio.create_task(self._run(symbol))
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        subs = self.subscribers.get(sub.symbol)
+        if subs is None:
+            return
+        subs.discard(sub)
+        if not subs:
+            del self.subscribers[sub.symbol]
+            self.last_message.pop(sub.symbol, None)
+            task = self.producers.pop(sub.symbol, None)
+            if task is not None:
+                task.cancel()
+
+    def publish(self, symbol: str, message: str):
+        self.last_message[symbol] = message
+        self.published += 1
+        for sub in list(self.subscribers.get(symbol, ())):
+            try:
+                sub.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(sub)
+
+    def _drop(self, sub):
+        # Yavaş istemci: bekleyen mesajları at, kapanış işareti bırak
+        sub.dropped = True
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(None)
+        self.dropped += 1
+        self.unsubscribe(sub)
+
+    async def _run(self, symbol):
+        while True:
+            try:
+                data = await self.produce(symbol)
+                self.publish(symbol, json.dumps(data))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log("WS", "error", "Sembol: {symbol}, üretici hatası: {error}", symbol=symbol, error=e)
+            await asyncio.sleep(self.interval)
+
+    def stats(self):
+        return {
+            "producers": len(self.producers),
+            "subscribers": {s: len(subs) for s, subs in self.subscribers.items()},
+            "published": self.published,
+            "dropped": self.dropped,
+        }
@@ -11,27 +11,28 @@ export default function Chart({ selectedSymbol, isConnected, setIsConnected }) {
   // Close fiyatlarını tutmak için ref
   const closePricesRef = useRef([]);
 
-  // Basit RSI hesaplama fonksiyonu (14 periyot)
-  function calculateRSI(closes, period = 5) {
-    if (closes.length < period + 1) return null;
-
-    let gains = 0;
-    let losses = 0;
-
-    for (let i = closes.length - period; i < closes.length; i++) {
-      const diff = closes[i] - closes[i - 1];
-      if (diff > 0) gains += diff;
-      else losses -= diff;
+  // Sembol başına bar önbelleği; sembole geri dönülünce sadece yeni barlar çekilir
+  const ohlcCacheRef = useRef({});
+
+  // /ohlc?format=delta yanıtını mum dizisine çevir (farkların kümülatif toplamı)
+  function decodeDeltaOhlc(data) {
+    const candles = [];
+    let time = 0, open = 0, high = 0, low = 0, close = 0;
+    for (let i = 0; i < data.time.length; i++) {
+      time += data.time[i];
+      open += data.open[i];
+      high += data.high[i];
+      low += data.low[i];
+      close += data.close[i];
+      candles.push({
+        time,
+        open: open / data.scale,
+        high: high / data.scale,
+        low: low / data.scale,
+        close: close / data.scale,
+      });
     }
-
-    const avgGain = gains / period;
-    const avgLoss = losses / period;
-
-    if (avgLoss === 0) return 100;
-
-    const rs = avgGain / avgLoss;
-    const rsi = 100 - 100 / (1 + rs);
-    return rsi;
+    return candles;
   }
 
   // Chart oluştur
@@ -126,26 +127,44 @@ export default function Chart({ selectedSymbol, isConnected, setIsConnected }) {
   useEffect(() => {
     if (!selectedSymbol || !seriesRef.current || !rsiSeriesRef.current) return;
 
-    fetch(`http://localhost:8000/ohlc/${selectedSymbol}?timeframe=M1&count=100`)
+    const cached = ohlcCacheRef.current[selectedSymbol];
+    const since = cached ? `&since=${cached.cursor}` : "";
+    fetch(
+      `http://localhost:8000/ohlc/${selectedSymbol}?timeframe=M1&count=100&format=delta${since}`
+    )
       .then((res) => res.json())
       .then((data) => {
-        if (data.ohlc) {
-          seriesRef.current.setData(data.ohlc);
+        const fresh = decodeDeltaOhlc(data);
+        // Önbellekteki barlara ekle (oluşan bar yenisiyle değişir), son 100 bar tutulur
+        const first = fresh.length ? fresh[0].time : Infinity;
+        const candles = (cached ? cached.candles.filter((c) => c.time < first) : [])
+          .concat(fresh)
+          .slice(-100);
+        if (candles.length) {
+          ohlcCacheRef.current[selectedSymbol] = {
+            candles,
+            cursor: candles[candles.length - 1].time,
+          };
+          seriesRef.current.setData(candles);
 
           // Close fiyatlarını da doldur
-          closePricesRef.current = data.ohlc.map((candle) => candle.close);
+          closePricesRef.current = candles.map((candle) => candle.close);
         }
 
-        // RSI verisini ayrı çek
+        // RSI serisi sunucuda barlarla hizalı hesaplanır (ısınma bölgesi null)
         fetch(
-          `http://localhost:8000/rsi/${selectedSymbol}?timeframe=M1&period=5`
+          `http://localhost:8000/indicators/${selectedSymbol}?timeframe=M1&indicators=rsi:5&count=100`
         )
           .then((res) => res.json())
-          .then((rsiData) => {
-            console.log("RSI verisi:", rsiData);
-            if (rsiData && Array.isArray(rsiData)) {
-              rsiSeriesRef.current.setData(rsiData);
+          .then((data) => {
+            if (!data || !Array.isArray(data.time)) return;
+            const rsiData = [];
+            for (let i = 0; i < data.time.length; i++) {
+              if (data["rsi:5"][i] !== null) {
+                rsiData.push({ time: data.time[i], value: data["rsi:5"][i] });
+              }
             }
+            rsiSeriesRef.current.setData(rsiData);
           });
       });
   }, [selectedSymbol]);
@@ -190,25 +209,12 @@ export default function Chart({ selectedSymbol, isConnected, setIsConnected }) {
         seriesRef.current.update(data);
       }
 
-      // Close fiyatını al, fiyatlar array'ine ekle
-      if (data.close) {
-        closePricesRef.current.push(data.close);
-
-        // Gereksiz büyümeyi engellemek için eski fiyatları kırp (örnek 100 adetle sınırla)
-        if (closePricesRef.current.length > 100) {
-          closePricesRef.current.shift();
-        }
-
-        // RSI hesapla
-        const rsiValue = calculateRSI(closePricesRef.current, 5);
-
-        // RSI verisi varsa güncelle
-        if (rsiValue !== null && rsiSeriesRef.current) {
-          rsiSeriesRef.current.update({
-            time: data.time, // timestamp olmalı (Unix timestamp)
-            value: rsiValue,
-          });
-        }
+      // Sunucunun hesapladığı RSI ile oluşan barın (bar_time) RSI noktasını güncelle
+      if (data.rsi !== null && data.rsi !== undefined && data.bar_time && rsiSeriesRef.current) {
+        rsiSeriesRef.current.update({
+          time: data.bar_time,
+          value: data.rsi,
+        });
       }
     };
 
@@ -1,23 +1,40 @@
 import React, { useEffect, useState } from "react";
 
+// JSON Merge Patch (RFC 7386): null siler, nesneler birleşir, diğerleri değişir
+function applyPatch(target, patch) {
+  const result = { ...target };
+  for (const [key, value] of Object.entries(patch)) {
+    if (value === null) delete result[key];
+    else if (
+      typeof value === "object" &&
+      !Array.isArray(value) &&
+      typeof result[key] === "object" &&
+      result[key] !== null &&
+      !Array.isArray(result[key])
+    )
+      result[key] = applyPatch(result[key], value);
+    else result[key] = value;
+  }
+  return result;
+}
+
 export default function StatusPanel() {
-  const [status, setStatus] = useState(null);
+  const [snapshot, setSnapshot] = useState(null);
   const [loading, setLoading] = useState(false);
+  const status = snapshot?.status ?? null;
 
-  const fetchStatus = async () => {
-    try {
-      const response = await fetch("http://localhost:8000/status");
-      const data = await response.json();
-      setStatus(data);
-    } catch {
-      setStatus(null);
-    }
-  };
-
+  // Sunucu tam görüntüyü bir kez, sonra sadece değişen alanları gönderir
   useEffect(() => {
-    fetchStatus();
-    const interval = setInterval(fetchStatus, 3000);
-    return () => clearInterval(interval);
+    const source = new EventSource("http://localhost:8000/stream");
+    source.addEventListener("snapshot", (e) => {
+      setSnapshot(JSON.parse(e.data).state);
+    });
+    source.addEventListener("patch", (e) => {
+      const { patch } = JSON.parse(e.data);
+      setSnapshot((prev) => (prev ? applyPatch(prev, patch) : prev));
+    });
+    source.onerror = () => setSnapshot(null); // EventSource kendisi yeniden bağlanır
+    return () => source.close();
   }, []);
 
   const handleToggleBot = async () => {
@@ -25,10 +42,10 @@ export default function StatusPanel() {
     setLoading(true);
     try {
       const newState = !status.bot_active;
+      // Yeni durum akıştan gelir
       await fetch(`http://localhost:8000/toggle?state=${newState}`, {
         method: "POST",
       });
-      fetchStatus();
     } catch (error) {
       console.error("Bot durumu değiştirilemedi", error);
     } finally {
@@ -58,6 +75,11 @@ export default function StatusPanel() {
         Toplam Kar (Bugün): ${status?.total_profit_today?.toFixed(2) ?? "0.00"}
       </p>
       <p>Mevcut Lot: {status?.current_lot ?? 0}</p>
+      <p>
+        Bakiye: ${snapshot?.account?.balance?.toFixed(2) ?? "-"} | Varlık: $
+        {snapshot?.account?.equity?.toFixed(2) ?? "-"} | Açık Pozisyon:{" "}
+        {Object.keys(snapshot?.positions ?? {}).length}
+      </p>
       <button
         onClick={handleToggleBot}
         disabled={loading}